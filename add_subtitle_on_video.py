@@ -1,12 +1,12 @@
 import os
 import subprocess
-import wave
 import json
 import srt
 import tkinter as tk
 from tkinter import filedialog
 from vosk import Model, KaldiRecognizer
-from moviepy import VideoFileClip
+from audio_stream import AudioSource
+from subtitle_segments import segment_words
 
 # GUI for File Selection
 def select_file(title, filetypes):
@@ -26,42 +26,36 @@ VIDEO_PATH = select_file("Select a Video File", [("MP4 files", "*.mp4"), ("All f
 MODEL_PATH = r"C:/Users/dhruv/Downloads/vosk-model-en-us-0.42-gigaspeech"
 
 # Auto-generate paths
-AUDIO_PATH = "temp_audio.wav"
 SRT_PATH = "subtitles.srt"
 ASS_PATH = "subtitles.ass"
 OUTPUT_VIDEO_PATH = VIDEO_PATH.replace(".mp4", "_subtitled.mp4")
 
-# Step 1: Extract Audio from Video
-def extract_audio(video_path, audio_path):
-    video = VideoFileClip(video_path)
-    video.audio.write_audiofile(audio_path, codec='pcm_s16le', fps=16000, nbytes=2, ffmpeg_params=["-ac", "1"])
+# Step 1: Decode the audio track straight into memory (16kHz, Mono), no temp WAV
+def extract_audio(video_path):
+    audio = AudioSource.decode(video_path)
     print("✅ Audio extracted successfully.")
+    return audio
 
 # Step 2: Transcribe Audio using Vosk
-def transcribe_audio(audio_path, model_path):
+def transcribe_audio(audio, model_path):
     model = Model(model_path)
-    
-    with wave.open(audio_path, "rb") as wf:
-        rec = KaldiRecognizer(model, wf.getframerate())
-        rec.SetWords(True)
+    rec = KaldiRecognizer(model, audio.sample_rate)
+    rec.SetWords(True)
 
-        while True:
-            data = wf.readframes(4000)
-            if not data:
-                break
-            rec.AcceptWaveform(data)
+    for data in audio.pcm16_chunks(4000):
+        rec.AcceptWaveform(data)
 
-        result = json.loads(rec.FinalResult())
-        return result.get("result", [])
+    result = json.loads(rec.FinalResult())
+    return result.get("result", [])
 
 # Step 3: Convert Vosk Output to SRT
 def create_srt(transcriptions, srt_file):
     subtitles = []
     
-    for i, entry in enumerate(transcriptions):
+    for i, entry in enumerate(segment_words(transcriptions, max_words=1)):
         start_seconds = entry["start"]
         end_seconds = entry["end"]
-        text = entry["word"]
+        text = entry["text"]
 
         # Convert seconds to SRT timestamp format
         def format_time(seconds):
@@ -141,8 +135,8 @@ def generate_subtitled_video():
         print("❌ No file selected. Exiting...")
         return
 
-    extract_audio(VIDEO_PATH, AUDIO_PATH)
-    transcriptions = transcribe_audio(AUDIO_PATH, MODEL_PATH)
+    audio = extract_audio(VIDEO_PATH)
+    transcriptions = transcribe_audio(audio, MODEL_PATH)
     create_srt(transcriptions, SRT_PATH)
     convert_srt_to_ass(SRT_PATH, ASS_PATH)  # Convert SRT to ASS
     update_ass_style(ASS_PATH, font_color="&H0000FFFF",font_name="Montserrat")  # Yellow
@@ -1,12 +1,12 @@
 import os
 import subprocess
-import wave
 import json
 import srt
 import tkinter as tk
 from tkinter import filedialog
 from vosk import Model, KaldiRecognizer
-from moviepy import VideoFileClip
+from audio_stream import AudioSource
+from subtitle_segments import segment_words
 from datetime import timedelta
 
 # GUI for File Selection
@@ -27,64 +27,40 @@ VIDEO_PATH = select_file("Select a Video File", [("MP4 files", "*.mp4"), ("All f
 MODEL_PATH = r"C:/Users/dhruv/Downloads/vosk-model-en-us-0.42-gigaspeech"
 
 # Auto-generate paths
-AUDIO_PATH = "temp_audio.wav"
 SRT_PATH = "subtitles.srt"
 ASS_PATH = "subtitles.ass"
 OUTPUT_VIDEO_PATH = VIDEO_PATH.replace(".mp4", "_subtitled.mp4")
 
-# Step 1: Extract Audio from Video
-def extract_audio(video_path, audio_path):
-    video = VideoFileClip(video_path)
-    video.audio.write_audiofile(audio_path, codec='pcm_s16le', fps=16000, nbytes=2, ffmpeg_params=["-ac", "1"])
+# Step 1: Decode the audio track straight into memory (16kHz, Mono), no temp WAV
+def extract_audio(video_path):
+    audio = AudioSource.decode(video_path)
     print("✅ Audio extracted successfully.")
+    return audio
 
 # Step 2: Transcribe Audio using Vosk
-def transcribe_audio(audio_path, model_path):
+def transcribe_audio(audio, model_path):
     model = Model(model_path)
-    
-    with wave.open(audio_path, "rb") as wf:
-        rec = KaldiRecognizer(model, wf.getframerate())
-        rec.SetWords(True)
+    rec = KaldiRecognizer(model, audio.sample_rate)
+    rec.SetWords(True)
 
-        while True:
-            data = wf.readframes(4000)
-            if not data:
-                break
-            rec.AcceptWaveform(data)
+    for data in audio.pcm16_chunks(4000):
+        rec.AcceptWaveform(data)
 
-        result = json.loads(rec.FinalResult())
-        return result.get("result", [])
+    result = json.loads(rec.FinalResult())
+    return result.get("result", [])
 
 # Step 3: Convert Vosk Output to SRT
 def create_highlighted_srt(transcriptions, srt_file, group_size=2):
     subtitles = []
-    index = 1
-    temp_group = []
-    start_time = None
-    end_time = None
-
-    for i, entry in enumerate(transcriptions):
-        word = entry["word"]
-        word_start = entry["start"]
-        word_end = entry["end"]
-
-        if not temp_group:
-            start_time = word_start
-
-        temp_group.append(word)
-        end_time = word_end
-
-        # Group words (e.g., 2 or 3 per line)
-        if len(temp_group) == group_size or i == len(transcriptions) - 1:
-            subtitle = srt.Subtitle(
-                index=index,
-                start=timedelta(seconds=start_time),
-                end=timedelta(seconds=end_time),
-                content=" ".join(temp_group)
-            )
-            subtitles.append(subtitle)
-            temp_group = []
-            index += 1
+
+    # Group words (e.g., 2 or 3 per line)
+    for index, line in enumerate(segment_words(transcriptions, max_words=group_size), start=1):
+        subtitles.append(srt.Subtitle(
+            index=index,
+            start=timedelta(seconds=line["start"]),
+            end=timedelta(seconds=line["end"]),
+            content=line["text"]
+        ))
 
     # Write SRT file
     with open(srt_file, "w", encoding="utf-8") as f:
@@ -148,8 +124,8 @@ def generate_subtitled_video():
         print("❌ No file selected. Exiting...")
         return
 
-    extract_audio(VIDEO_PATH, AUDIO_PATH)
-    transcriptions = transcribe_audio(AUDIO_PATH, MODEL_PATH)
+    audio = extract_audio(VIDEO_PATH)
+    transcriptions = transcribe_audio(audio, MODEL_PATH)
     create_highlighted_srt(transcriptions, SRT_PATH)
     convert_srt_to_ass(SRT_PATH, ASS_PATH)  # Convert SRT to ASS
     update_ass_style(ASS_PATH, font_color="&H0000FFFF",font_name="Montserrat")  # Yellow
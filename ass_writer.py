@@ -0,0 +1,249 @@
+"""
+Incremental ASS subtitle writer and a compact word store.
+
+StreamingAssWriter writes the header up front and appends Dialogue lines as
+words arrive, so subtitles can be written while Whisper is still producing
+segments instead of after the whole transcript has been collected. Words are
+kept in a WordStore: parallel float32 arrays for start/end/confidence and an
+interned string table, instead of one dict per word.
+
+    with StreamingAssWriter("subs.ass", subtitle_settings) as writer:
+        for segment in whisper_server.transcribe_stream(samples):
+            for w in segment["words"]:
+                writer.add_word(w["word"], w["start"], w["end"])
+"""
+import logging
+from array import array
+
+from subtitle_segments import SegmentRules, Segmenter
+
+
+class WordStore:
+    """Append-only word list stored column-wise. Iterating yields word dicts."""
+    def __init__(self, words=()):
+        self.starts = array("f")
+        self.ends = array("f")
+        self.confidences = array("f")
+        self.text_ids = array("I")
+        self.strings = []
+        self._string_ids = {}
+        for w in words:
+            self.append(w["word"], w["start"], w["end"], w.get("confidence", 0.5))
+
+    def append(self, word, start, end, confidence=0.5):
+        text_id = self._string_ids.get(word)
+        if text_id is None:
+            text_id = self._string_ids[word] = len(self.strings)
+            self.strings.append(word)
+        self.text_ids.append(text_id)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.confidences.append(confidence)
+
+    def __len__(self):
+        return len(self.text_ids)
+
+    def _item(self, i):
+        return {"word": self.strings[self.text_ids[i]], "start": self.starts[i],
+                "end": self.ends[i], "confidence": self.confidences[i]}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self._item(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._item(i)
+
+    def to_list(self):
+        return list(self)
+
+
+def ass_color(hex_color):
+    try:
+        hex_color = hex_color.lstrip('#')
+        r = int(hex_color[0:2], 16)
+        g = int(hex_color[2:4], 16)
+        b = int(hex_color[4:6], 16)
+        return f"&H00{b:02X}{g:02X}{r:02X}"
+    except Exception:
+        return "&H00FFFFFF"
+
+
+def format_ass_time(seconds):
+    # Round to whole centiseconds first: float32 times like 1.2299999 must still print as 0:00:01.23.
+    total_cs = int(round(seconds * 100))
+    h, rest = divmod(total_cs, 360000)
+    m, rest = divmod(rest, 6000)
+    s, cs = divmod(rest, 100)
+    return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def karaoke_text(words, tag="kf"):
+    """
+    One line with a \\k/\\kf tag per word. Each word's duration runs to the next
+    word's start, so pauses stay on the word before them, and the tags are
+    rounded on the same centisecond grid as the event times so they add up
+    to exactly the event's length.
+    """
+    parts = []
+    for i, w in enumerate(words):
+        until = words[i + 1]["start"] if i + 1 < len(words) else w["end"]
+        duration = int(round(until * 100)) - int(round(w["start"] * 100))
+        parts.append(f"{{\\{tag}{max(0, duration)}}}{w['word'].strip().upper()}")
+    return " ".join(parts)
+
+
+def karaoke_base_color(color_hex):
+    """
+    The colour karaoke words show before they are sung when none is chosen:
+    the subtitle colour dimmed, or lightened if it is already dark, so the
+    sweep is visible with the default white.
+    """
+    try:
+        hex_color = color_hex.lstrip('#')
+        rgb = [int(hex_color[i:i + 2], 16) for i in (0, 2, 4)]
+    except Exception:
+        rgb = [255, 255, 255]
+    luma = (0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2]) / 255
+    if luma >= 0.35:
+        rgb = [int(c * 0.45) for c in rgb]
+    else:
+        rgb = [int(c + (255 - c) * 0.55) for c in rgb]
+    return "#{:02X}{:02X}{:02X}".format(*rgb)
+
+
+def describe_mode(settings):
+    return {
+        "single": "single word",
+        "multiple": f"{settings['words_count']} words per subtitle",
+        "karaoke": f"karaoke lines of up to {settings['words_count']} words"
+    }[settings['mode']]
+
+
+def ass_header(settings):
+    """Returns (header text, style name for Dialogue lines) for the GUI's subtitle settings."""
+    subtitle_size = settings['size']
+    primary = ass_color(settings['color'])
+    font_name = settings['font_family']
+    bold = "-1" if settings['bold'] else "0"
+    italic = "1" if settings['italic'] else "0"
+    underline = "0"
+    strikeout = "0"
+    secondary = "&H000000FF"
+    if settings['mode'] == "karaoke":
+        # Karaoke words show SecondaryColour until sung, then switch to the chosen colour.
+        secondary = ass_color(settings.get('karaoke_base_color') or karaoke_base_color(settings['color']))
+    back = "&H00000000"
+    scale_x = "100"
+    scale_y = "100"
+    spacing = "0"
+    angle = "0"
+    border_style = "1"
+    shadow = "0"
+    alignment_map = {"Bottom": 2, "Top": 8, "Center": 5}
+    alignment = alignment_map[settings['position']]
+    margin_l = "10"
+    margin_r = "10"
+    margin_v = "90" if settings['position'] == "Bottom" else "10" if settings['position'] == "Top" else "0"
+    encoding = "1"
+
+    if settings['enable_borders']:
+        outline_color = ass_color(settings['border_color'])
+        outline = str(settings['border_thickness'])
+    else:
+        outline_color = "&H00000000"
+        outline = "0"
+
+    format_str = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
+    style_line = f"Style: Default,{font_name},{subtitle_size},{primary},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
+
+    style_border = ""
+    if settings['enable_borders']:
+        size_border = str(subtitle_size + 2)
+        outline_border = str(int(outline) + 1) if outline != "0" else "1"
+        style_border = f"\nStyle: SpeechBorder,{font_name},{size_border},{primary},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline_border},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
+
+    header = f"""[Script Info]
+Title: Enhanced Subtitles with Speech Recognition
+ScriptType: v4.00+
+
+[V4+ Styles]
+{format_str}
+{style_line}{style_border}
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+    return header, ("SpeechBorder" if settings['enable_borders'] else "Default")
+
+
+class StreamingAssWriter:
+    """
+    Writes Dialogue lines as words are added: one per word in "single" mode,
+    one per line of subtitle_segments rules (at most words_count words) in
+    "multiple" mode, and in "karaoke" mode one per line as well, with a \\kf
+    tag timing each word inside it. The words are also kept in self.words
+    (a WordStore).
+    """
+    def __init__(self, ass_path, settings, flush_every=50):
+        self.ass_path = str(ass_path)
+        self.mode = settings['mode']
+        self.words = WordStore()
+        self.segmenter = Segmenter(SegmentRules.from_settings(settings)) if self.mode != "single" else None
+        self.karaoke_tag = settings.get('karaoke_tag', "kf")
+        self.lines_written = 0
+        self._flush_every = flush_every
+        header, self.style_name = ass_header(settings)
+        self._file = open(self.ass_path, "w", encoding="utf-8")
+        self._file.write(header)
+
+    def _dialogue(self, start, end, text):
+        self._file.write(f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},{self.style_name},,0,0,0,,{text}\n")
+        self.lines_written += 1
+        # Flush regularly so the file on disk keeps up with transcription.
+        if self.lines_written % self._flush_every == 0:
+            self._file.flush()
+
+    def add_word(self, word, start, end, confidence=0.5):
+        self.words.append(word, start, end, confidence)
+        if self.mode == "single":
+            text = word.strip().upper()
+            if text and end > start:
+                self._dialogue(start, end, text)
+        else:
+            self._write_line(self.segmenter.add(word, start, end, confidence))
+
+    def _write_line(self, line):
+        if line is None:
+            return
+        try:
+            if self.mode == "karaoke":
+                text = karaoke_text(line["words"], self.karaoke_tag)
+            else:
+                text = line["text"].upper()
+            if text and line["end"] > line["start"]:
+                self._dialogue(line["start"], line["end"], text)
+        except Exception as e:
+            logging.warning(f"⚠️ Error writing grouped subtitle: {e}")
+
+    def add_words(self, words):
+        for w in words:
+            self.add_word(w["word"], w["start"], w["end"], w.get("confidence", 0.5))
+
+    def close(self):
+        if self._file is None:
+            return
+        if self.segmenter is not None:
+            self._write_line(self.segmenter.flush())
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,204 @@
+"""
+Cache of reusable clips (subscribe/outro/overlay videos) pre-normalized to
+a target encode profile.
+
+The same outro used to be re-encoded once for every main video it was
+merged onto. AssetStore encodes it once per profile into a concat-ready
+MP4 or MPEG-TS and keeps the result on disk, keyed by a hash of the source
+content and the profile, so every later merge can be a plain `-c copy`
+concat and renaming or touching the source does not invalidate it.
+
+Overlay clips with an alpha channel (e.g. a .mov subscribe button) are
+kept transparent: their profile encodes to QuickTime Animation (qtrle,
+argb) in a .mov instead of yuv420p H.264, which has no alpha.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+import media_info
+
+DEFAULT_STORE_DIR = Path(os.environ.get(
+    "ASSET_STORE_DIR", Path.home() / ".cache" / "video_processor" / "assets"
+))
+# Codecs whose quality is not set with -crf/-preset (lossless or intra-only).
+INTRA_CODECS = ("qtrle", "prores_ks", "png")
+
+
+def has_alpha(pix_fmt):
+    """True for pixel formats with an alpha plane (yuva420p, rgba, argb, gbrap, ya8, ...)."""
+    return bool(pix_fmt) and re.match(r"(yuva|gbrap|rgba|bgra|argb|abgr|ya\d)", pix_fmt) is not None
+
+
+class EncodeProfile:
+    """Output stream parameters a clip is normalized to."""
+    def __init__(self, width, height, fps=30, sample_rate=44100, channels=2,
+                 video_codec="libx264", pix_fmt="yuv420p", timescale=None, crf=23, preset="fast",
+                 duration=None, container="mp4"):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = round(float(fps), 3)
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.video_codec = video_codec
+        self.pix_fmt = pix_fmt
+        self.timescale = int(timescale) if timescale else None
+        self.crf = crf
+        self.preset = preset
+        self.duration = float(duration) if duration else None
+        self.container = container
+
+    @classmethod
+    def from_media(cls, info, **overrides):
+        """Profile matching an existing video, so clips normalized to it can be concatenated onto it."""
+        timescale = None
+        if info.time_base and "/" in info.time_base:
+            timescale = int(info.time_base.split("/")[1])
+        values = {
+            "width": info.width,
+            "height": info.height,
+            "fps": info.fps or 30,
+            "sample_rate": info.sample_rate or 44100,
+            "channels": info.channels or 2,
+            "timescale": timescale,
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def key(self):
+        return json.dumps(self.__dict__, sort_keys=True)
+
+    def video_filter(self):
+        w, h = self.width, self.height
+        # Padding stays see-through when the output keeps alpha.
+        color = ":color=black@0" if has_alpha(self.pix_fmt) else ""
+        return (f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+                f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2{color},setsar=1,fps={self.fps},format={self.pix_fmt}")
+
+    @property
+    def extension(self):
+        return {"mpegts": ".ts", "mov": ".mov"}.get(self.container, ".mp4")
+
+    def video_args(self):
+        args = ["-c:v", self.video_codec]
+        if self.video_codec not in INTRA_CODECS:
+            args += ["-preset", self.preset, "-crf", str(self.crf)]
+        args += ["-pix_fmt", self.pix_fmt, "-r", str(self.fps)]
+        # MPEG-TS always uses a 90 kHz clock, only MP4 carries a track timescale.
+        if self.timescale and self.container != "mpegts":
+            args += ["-video_track_timescale", str(self.timescale)]
+        return args
+
+    def audio_args(self):
+        return ["-c:a", "aac", "-b:a", "192k", "-ar", str(self.sample_rate), "-ac", str(self.channels)]
+
+    def encode_command(self, src, dst, has_audio=True):
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(src)]
+        if not has_audio:
+            # Concat needs an audio track in every part; give silent clips one.
+            layout = "stereo" if self.channels == 2 else "mono"
+            cmd += ["-f", "lavfi", "-i", f"anullsrc=channel_layout={layout}:sample_rate={self.sample_rate}",
+                    "-map", "0:v:0", "-map", "1:a:0", "-shortest"]
+        else:
+            cmd += ["-map", "0:v:0", "-map", "0:a:0"]
+        cmd += ["-vf", self.video_filter()] + self.video_args() + self.audio_args()
+        if self.duration:
+            cmd += ["-t", str(self.duration)]
+        if self.container == "mpegts":
+            cmd += ["-f", "mpegts", str(dst)]
+        else:
+            cmd += ["-movflags", "+faststart", str(dst)]
+        return cmd
+
+
+class AssetStore:
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._hashes = None
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _index_path(self):
+        return self.store_dir / "source_hashes.json"
+
+    def source_hash(self, src):
+        """SHA-256 of the file contents, remembered per (path, size, mtime) so it is computed once."""
+        stat = os.stat(src)
+        ident = f"{os.path.abspath(src)}|{stat.st_size}|{stat.st_mtime_ns}"
+        with self._locks_guard:
+            if self._hashes is None:
+                try:
+                    with open(self._index_path(), "r", encoding="utf-8") as f:
+                        self._hashes = json.load(f)
+                except (OSError, ValueError):
+                    self._hashes = {}
+            if ident in self._hashes:
+                return self._hashes[ident]
+        digest = hashlib.sha256()
+        with open(src, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self._locks_guard:
+            self._hashes[ident] = digest.hexdigest()
+            try:
+                self.store_dir.mkdir(parents=True, exist_ok=True)
+                with open(self._index_path(), "w", encoding="utf-8") as f:
+                    json.dump(self._hashes, f)
+            except OSError as e:
+                logging.warning(f"⚠️ Could not save asset hash index: {e}")
+            return self._hashes[ident]
+
+    def _asset_key(self, src, profile):
+        ident = f"{self.source_hash(src)}|{profile.key()}"
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()[:32]
+
+    def normalized(self, src, profile, run=None):
+        """
+        Returns the path of src encoded to profile, encoding it on first use.
+        run(cmd) executes the ffmpeg command (defaults to subprocess.run) and
+        may return None to signal that it was cancelled.
+        """
+        key = self._asset_key(src, profile)
+        dst = self.store_dir / f"{Path(src).stem[:40]}_{key}{profile.extension}"
+        with self._lock_for(key):
+            if dst.exists():
+                return dst
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            logging.info(f"📦 Normalizing {os.path.basename(src)} to {profile.width}x{profile.height}@{profile.fps} (cached for reuse)...")
+            has_audio = media_info.probe(src).has_audio
+            fd, tmp = tempfile.mkstemp(dir=self.store_dir, suffix=profile.extension)
+            os.close(fd)
+            try:
+                cmd = profile.encode_command(src, tmp, has_audio=has_audio)
+                if run is None:
+                    subprocess.run(cmd, capture_output=True, check=True)
+                elif run(cmd) is None:
+                    return None
+                os.replace(tmp, dst)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            return dst
+
+
+def overlay_profile(src, scale_divisor=1, duration=None, **overrides):
+    """
+    Profile for an overlay clip: its own size divided by scale_divisor (kept
+    even), optionally trimmed, and with its alpha channel kept if it has one.
+    """
+    info = media_info.probe(src)
+    width = max(2, int(info.width / scale_divisor) // 2 * 2)
+    height = max(2, int(info.height / scale_divisor) // 2 * 2)
+    if has_alpha(info.pix_fmt):
+        overrides = {"video_codec": "qtrle", "pix_fmt": "argb", "container": "mov", **overrides}
+    return EncodeProfile.from_media(info, width=width, height=height, duration=duration, **overrides)
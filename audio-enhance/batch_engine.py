@@ -0,0 +1,188 @@
+"""
+Runs one enhancement task per file in a process pool, for the Tk batch GUIs.
+
+pydub and noisereduce hold the GIL for most of their work, so a thread pool
+runs a folder of takes about one core at a time. Each file goes to a
+ProcessPoolExecutor worker instead. The pool is as large as the cores allow,
+but no larger than what fits in the free RAM, given the caller's estimate of
+one file's peak memory: ten workers each loading an hour-long take would
+swap.
+
+Workers never touch Tk. They report progress with report(fraction), which
+goes over a multiprocessing queue; the GUI calls poll() from root.after()
+on the Tk thread, which drains it and collects finished files with their
+wall-clock timings:
+
+    batch = BatchRunner(process_file, files, args=(output_dir,), memory_per_file=estimate)
+    batch.start()
+    def check():
+        for path, outcome in batch.poll():
+            ...
+        progress_bar["value"] = batch.progress() * 100
+        if not batch.finished():
+            root.after(100, check)
+"""
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encode_scheduler
+
+# Share of the free RAM the pool may plan to use.
+MEMORY_HEADROOM = 0.8
+
+_progress = None
+
+
+def available_memory():
+    """Bytes of RAM free for new work, or None where it cannot be read."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if os.name == "nt":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def pool_size(files, memory_per_file=None, cores=None):
+    """Workers for files: one per core, fewer if the largest file's estimate times the workers exceeds free RAM."""
+    workers = encode_scheduler.cpu_workers(len(files), cores=cores)
+    free = available_memory()
+    if memory_per_file is None or free is None or not files:
+        return workers
+    largest = max(memory_per_file(path) for path in files)
+    if largest <= 0:
+        return workers
+    return max(1, min(workers, int(free * MEMORY_HEADROOM // largest)))
+
+
+def _init_worker(progress, initializer, initargs):
+    global _progress
+    _progress = progress
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _report(path, fraction):
+    try:
+        _progress.put((path, max(0.0, min(1.0, float(fraction)))))
+    except Exception:
+        pass
+
+
+def _run(task, path, args):
+    """Runs task(path, *args, report) in a worker; returns its wall seconds."""
+    started = time.time()
+    task(path, *args, lambda fraction: _report(path, fraction))
+    return time.time() - started
+
+
+class BatchRunner:
+    def __init__(self, task, files, args=(), memory_per_file=None, initializer=None, initargs=(), workers=None):
+        """
+        task(path, *args, report) runs in a worker process and must be a
+        module-level function; initializer(*initargs) runs once per worker,
+        e.g. to set the settings a GUI keeps in globals.
+        """
+        self.task = task
+        self.files = list(files)
+        self.args = tuple(args)
+        self.workers = workers or pool_size(self.files, memory_per_file)
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.fractions = {path: 0.0 for path in self.files}
+        self.timings = {}
+        self.errors = {}
+        self.started = None
+        self.elapsed = None
+        self._futures = {}
+        self._reported = set()
+        self._executor = None
+        self._progress = None
+
+    def start(self):
+        # Spawned, not forked: the Tk GUI process runs threads and holds Tcl state a forked child must not inherit.
+        context = multiprocessing.get_context("spawn")
+        self._progress = context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context, initializer=_init_worker,
+            initargs=(self._progress, self.initializer, self.initargs)
+        )
+        self.started = time.time()
+        self._futures = {path: self._executor.submit(_run, self.task, path, self.args) for path in self.files}
+        return self
+
+    def poll(self):
+        """
+        Drains progress reports and collects finished files without blocking.
+        Returns [(path, seconds or exception)] for files finished since the
+        last call. Call it from the Tk thread.
+        """
+        while True:
+            try:
+                path, fraction = self._progress.get_nowait()
+            except queue.Empty:
+                break
+            if path not in self.timings and path not in self.errors:
+                self.fractions[path] = fraction
+        finished = []
+        for path, future in self._futures.items():
+            if path in self._reported or not future.done():
+                continue
+            self._reported.add(path)
+            self.fractions[path] = 1.0
+            error = future.exception()
+            if error is None:
+                self.timings[path] = future.result()
+                finished.append((path, self.timings[path]))
+            else:
+                self.errors[path] = error
+                finished.append((path, error))
+        if self.finished() and self._executor is not None:
+            self.elapsed = time.time() - self.started
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return finished
+
+    def progress(self):
+        """Overall completion in [0, 1]."""
+        return sum(self.fractions.values()) / len(self.files) if self.files else 1.0
+
+    def finished(self):
+        return len(self._reported) == len(self.files)
+
+    def summary(self):
+        """Per-file timings, slowest first, and the batch's wall time."""
+        lines = [f"{os.path.basename(path)}: {seconds:.1f}s"
+                 for path, seconds in sorted(self.timings.items(), key=lambda item: -item[1])]
+        lines += [f"{os.path.basename(path)}: failed ({error})" for path, error in self.errors.items()]
+        if self.elapsed is not None:
+            busy = sum(self.timings.values())
+            lines.append(f"{len(self.files)} files in {self.elapsed:.1f}s on {self.workers} workers "
+                         f"({busy / max(self.elapsed, 1e-9):.1f}x parallel)")
+        return lines
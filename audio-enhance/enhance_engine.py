@@ -0,0 +1,735 @@
+"""
+The enhance_audio chains of v6-v10 as one float32 NumPy pass.
+
+The pydub versions copy the whole AudioSegment for every low_pass_filter,
+high_pass_filter, overlay, invert_phase and apply_gain, run pydub's one-pole
+filters in pure Python, and compress_dynamic_range loops over every sample
+in Python, which alone takes longer than the recording. Here the audio
+stays float32 (full scale = 1.0) and every step works in place:
+
+- Filters are second-order sections run with scipy.signal.sosfilt in
+  blocks, carrying the filter state between blocks so nothing is upcast to
+  float64 beyond one block. The one-pole filters use pydub's exact
+  coefficients, so "low_pass 350" means what it did in the scripts.
+- The "overlay an inverted low-passed copy" idiom becomes x -= g * LP(x),
+  and "overlay a high-passed copy" becomes x += g * HP(x).
+- The compressor computes its gain once per millisecond from a sliding RMS
+  (scipy.ndimage filters), holds attenuation with a running maximum for a
+  constant-rate release, and applies it to the samples as a reshaped view.
+- The scripts' "reverb" overlays a level-faded copy with no delay, which is
+  a gain curve, and is applied as one.
+
+Every step keeps its state (filter zi, compressor history, position)
+between calls, so a chain gives the same result over one buffer or over
+consecutive blocks. process_file() streams a file through the chain with
+soundfile.blocks, so an hour-long take needs a few blocks of memory instead
+of several full copies. Steps that need the whole signal first (peak
+normalize, LUFS loudness) measure the previous part of the chain's output
+on the way past; the part after them reads that output back from a
+temporary float32 WAV.
+
+A chain is a list of (step, params) pairs, so each script keeps its own
+constants:
+
+    chain = EnhanceChain([("high_pass", {"cutoff": 90}), ("normalize", {}),
+                          ("compress", {"threshold_db": -20.0, "ratio": 2.0}), ...])
+    samples = chain.process(samples, sample_rate)
+    chain.process_file("take.wav", "take_enhanced.wav", gate=spectral_gate.SpectralGate(profile))
+
+Compare against the pydub chain of v10 on a 30-minute recording:
+
+    python audio-enhance/enhance_engine.py --benchmark --minutes 30
+"""
+import argparse
+import functools
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.ndimage import uniform_filter1d
+from scipy.signal import butter, sosfilt, sosfilt_zi, tf2sos
+
+BLOCK_SIZE = 1 << 18
+BLOCK_SECONDS = 10
+
+
+def db_to_gain(db):
+    return 10.0 ** (db / 20.0)
+
+
+@functools.lru_cache(maxsize=None)
+def one_pole(kind, cutoff, sample_rate):
+    """pydub's RC low/high-pass (AudioSegment.low_pass_filter/high_pass_filter) as one section."""
+    rc = 1.0 / (cutoff * 2 * math.pi)
+    dt = 1.0 / sample_rate
+    if kind == "low":
+        alpha = dt / (rc + dt)
+        return tf2sos([alpha, 0.0], [1.0, alpha - 1.0])
+    alpha = rc / (rc + dt)
+    return tf2sos([alpha, -alpha], [1.0, -alpha])
+
+
+@functools.lru_cache(maxsize=None)
+def band_pass(low, high, sample_rate, order=2):
+    nyq = 0.5 * sample_rate
+    return butter(order, [low / nyq, high / nyq], btype="band", output="sos")
+
+
+@functools.lru_cache(maxsize=None)
+def butterworth(kind, cutoff, sample_rate, order=5):
+    """Butterworth low/high/band-pass as sections; cutoff is a tuple (low, high) for "band"."""
+    nyq = 0.5 * sample_rate
+    edges = [c / nyq for c in cutoff] if isinstance(cutoff, tuple) else cutoff / nyq
+    return butter(order, edges, btype=kind, output="sos")
+
+
+@functools.lru_cache(maxsize=None)
+def rbj(kind, freq, gain_db, q, sample_rate):
+    """RBJ cookbook peaking / low-shelf / high-shelf biquad (ffmpeg's equalizer, lowshelf, highshelf) as one section."""
+    a = 10.0 ** (gain_db / 40.0)
+    w0 = 2.0 * math.pi * freq / sample_rate
+    alpha = math.sin(w0) / (2.0 * q)
+    cos_w0 = math.cos(w0)
+    if kind == "peaking":
+        b = [1 + alpha * a, -2 * cos_w0, 1 - alpha * a]
+        den = [1 + alpha / a, -2 * cos_w0, 1 - alpha / a]
+    else:
+        root = 2 * math.sqrt(a) * alpha
+        sign = 1 if kind == "high_shelf" else -1
+        b = [a * ((a + 1) + sign * (a - 1) * cos_w0 + root), -2 * sign * a * ((a - 1) + sign * (a + 1) * cos_w0),
+             a * ((a + 1) + sign * (a - 1) * cos_w0 - root)]
+        den = [(a + 1) - sign * (a - 1) * cos_w0 + root, 2 * sign * ((a - 1) - sign * (a + 1) * cos_w0),
+               (a + 1) - sign * (a - 1) * cos_w0 - root]
+    return tf2sos(b, den)
+
+
+class SosFilter:
+    """sosfilt over consecutive blocks of one signal, keeping the state (zi) between calls."""
+    def __init__(self, sos):
+        self.sos = sos
+        self.zi = None
+
+    def __call__(self, block, out=None):
+        if self.zi is None:
+            # Start settled on the first sample, as pydub seeds its filters with it.
+            self.zi = sosfilt_zi(self.sos) * float(block[0]) if len(block) else np.zeros((len(self.sos), 2))
+        filtered = np.empty(len(block), dtype=np.float32) if out is None else out
+        # sosfilt works in float64; run it a slice at a time so the upcast copy stays small.
+        for start in range(0, len(block), BLOCK_SIZE):
+            part, self.zi = sosfilt(self.sos, block[start:start + BLOCK_SIZE], zi=self.zi)
+            filtered[start:start + BLOCK_SIZE] = part
+        return filtered
+
+
+def peak(x):
+    return max(float(x.max()), -float(x.min())) if x.size else 0.0
+
+
+# Steps. Each one is built for one signal and called with its consecutive
+# float32 blocks, which it modifies in place and returns.
+#   linear:       the same linear operation on both channels, so the
+#                 "Podcast" stereo split can move past it (see EnhanceChain).
+#   elementwise:  also works on (n, 2) stereo blocks.
+#   whole_signal: needs measure() over the whole signal before the first call.
+
+class Step:
+    linear = False
+    elementwise = False
+    whole_signal = False
+
+    def __call__(self, block):
+        return block
+
+
+class Filter(Step):
+    """Replaces the signal with the filtered signal; passes=2 runs the filter twice (filtfilt's magnitude)."""
+    linear = True
+
+    def __init__(self, sos, passes=1):
+        self.runs = [SosFilter(sos) for _ in range(passes)]
+
+    def __call__(self, block):
+        for run in self.runs:
+            run(block, block)
+        return block
+
+
+class MixFiltered(Step):
+    """x += gain * filter(x)."""
+    linear = True
+
+    def __init__(self, sos, gain):
+        self.run = SosFilter(sos)
+        self.gain = np.float32(gain)
+
+    def __call__(self, block):
+        block += self.gain * self.run(block)
+        return block
+
+
+class Gain(Step):
+    linear = True
+    elementwise = True
+
+    def __init__(self, gain):
+        self.gain = np.float32(gain)
+
+    def __call__(self, block):
+        block *= self.gain
+        return block
+
+
+class Clip(Step):
+    elementwise = True
+
+    def __init__(self, threshold=1.0):
+        self.threshold = threshold
+
+    def __call__(self, block):
+        return np.clip(block, -self.threshold, self.threshold, out=block)
+
+
+class Saturate(Step):
+    """tanh soft clipping of the signal times gain."""
+    elementwise = True
+
+    def __init__(self, gain):
+        self.gain = np.float32(gain)
+
+    def __call__(self, block):
+        block *= self.gain
+        return np.tanh(block, out=block)
+
+
+class StaticCompress(Step):
+    """adobe-enhance's waveshaping compressor: magnitude above threshold is divided by ratio."""
+    elementwise = True
+
+    def __init__(self, threshold, ratio):
+        self.threshold = np.float32(threshold)
+        self.ratio = np.float32(ratio)
+
+    def __call__(self, block):
+        over = np.abs(block) > self.threshold
+        block[over] = np.sign(block[over]) * (self.threshold + (np.abs(block[over]) - self.threshold) / self.ratio)
+        return block
+
+
+class DeEssBand(Step):
+    """adobe-enhance's de-esser: where the band-passed signal exceeds threshold, it replaces the signal, times factor."""
+    def __init__(self, sos, threshold, factor, passes):
+        self.band = Filter(sos, passes)
+        self.threshold = threshold
+        self.factor = np.float32(factor)
+
+    def __call__(self, block):
+        band = self.band(block.copy())
+        loud = np.abs(band) > self.threshold
+        block[loud] = band[loud] * self.factor
+        return block
+
+
+class Compressor(Step):
+    """
+    Downward compressor with pydub's parameters. RMS is measured over the
+    last attack_ms, attenuation above the threshold is (1 - 1/ratio) of the
+    overshoot, reached over attack_ms, and released at the rate that
+    recovers a 10 dB overshoot in release_ms. Blocks other than the last
+    must be whole milliseconds long.
+    """
+    def __init__(self, sample_rate, threshold_db=-20.0, ratio=4.0, attack_ms=5.0, release_ms=50.0):
+        self.hop = max(1, sample_rate // 1000)
+        self.threshold_db = threshold_db
+        self.slope = 1.0 - 1.0 / ratio
+        self.attack = max(1, int(round(attack_ms)))
+        # Attenuation falls by at most `rate` dB per hop.
+        self.rate = self.slope * 10.0 / max(1.0, release_ms)
+        self.history = {}
+        self.envelope = -np.inf
+        self.last_gain = np.float32(1.0)
+
+    def _trailing_mean(self, name, values):
+        """Mean over the last `attack` hops, continuing from the previous block."""
+        if self.attack == 1:
+            return values
+        past = self.history.get(name)
+        if past is None:
+            past = np.full(self.attack - 1, values[0])
+        joined = np.concatenate([past, values])
+        self.history[name] = joined[-(self.attack - 1):]
+        return uniform_filter1d(joined, self.attack, origin=(self.attack - 1) // 2)[-len(values):]
+
+    def __call__(self, block):
+        hops = len(block) // self.hop
+        if hops:
+            frames = block[:hops * self.hop].reshape(hops, self.hop)
+            mean_square = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / self.hop
+            mean_square = self._trailing_mean("mean_square", mean_square)
+            over_db = 10.0 * np.log10(np.maximum(mean_square, 1e-20)) - self.threshold_db
+            target = self._trailing_mean("target", self.slope * np.maximum(over_db, 0.0))
+            # env[t] = max over s <= t of (target[s] - rate * (t - s)), earlier blocks included.
+            ramp = self.rate * np.arange(hops, dtype=np.float64)
+            envelope = np.maximum(np.maximum.accumulate(target + ramp), self.envelope - self.rate) - ramp
+            self.envelope = envelope[-1]
+            gains = np.power(10.0, -envelope / 20.0).astype(np.float32)
+            frames *= gains[:, None]
+            self.last_gain = gains[-1]
+        block[hops * self.hop:] *= self.last_gain
+        return block
+
+
+class Reverb(Step):
+    """
+    The scripts' add_reverb: the signal at overlay_gain_db plus a copy at
+    echo_gain_db faded (linearly in amplitude, per millisecond) to
+    fade_to_db over fade_ms and held there.
+    """
+    linear = True
+    elementwise = True
+
+    def __init__(self, sample_rate, echo_gain_db=-8.0, fade_ms=600, overlay_gain_db=-3.0, fade_to_db=-20.0):
+        self.hop = max(1, sample_rate // 1000)
+        self.base = db_to_gain(overlay_gain_db)
+        self.echo = db_to_gain(echo_gain_db)
+        self.fade_ms = fade_ms
+        self.fade_to = db_to_gain(fade_to_db)
+        self.position = 0
+
+    def __call__(self, block):
+        head = max(0, min(len(block), int(self.fade_ms) * self.hop - self.position))
+        if head:
+            hop_index = (self.position + np.arange(head)) // self.hop
+            steps = 1.0 + (self.fade_to - 1.0) * hop_index / max(1, self.fade_ms)
+            gains = (self.base + self.echo * steps).astype(np.float32)
+            block[:head] *= gains if block.ndim == 1 else gains[:, None]
+        block[head:] *= np.float32(self.base + self.echo * self.fade_to)
+        self.position += len(block)
+        return block
+
+
+class LoudnessMeter:
+    """ITU-R BS.1770 integrated loudness (K-weighted, gated), fed block by block."""
+    def __init__(self, sample_rate):
+        self.step = int(round(0.1 * sample_rate))
+        self.sos = self.k_weighting(sample_rate)
+        self.zi = None
+        self.energies = []
+        self.carry = np.zeros(0)
+
+    @staticmethod
+    def k_weighting(sample_rate):
+        """The high-shelf and high-pass stages as sections, with pyloudnorm's RBJ coefficients."""
+        w0 = 2.0 * math.pi * 1500.0 / sample_rate
+        a = 10.0 ** (4.0 / 40.0)
+        alpha = math.sin(w0) / (2.0 / math.sqrt(2.0))
+        cos_w0 = math.cos(w0)
+        root = 2 * math.sqrt(a) * alpha
+        shelf = [a * ((a + 1) + (a - 1) * cos_w0 + root), -2 * a * ((a - 1) + (a + 1) * cos_w0),
+                 a * ((a + 1) + (a - 1) * cos_w0 - root),
+                 (a + 1) - (a - 1) * cos_w0 + root, 2 * ((a - 1) - (a + 1) * cos_w0),
+                 (a + 1) - (a - 1) * cos_w0 - root]
+        w0 = 2.0 * math.pi * 38.0 / sample_rate
+        alpha = math.sin(w0) / (2.0 * 0.5)
+        cos_w0 = math.cos(w0)
+        high_pass = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2, 1 + alpha, -2 * cos_w0, 1 - alpha]
+        return np.array([np.divide(shelf, shelf[3]), np.divide(high_pass, high_pass[3])])
+
+    def add(self, block):
+        channels = block.reshape(len(block), -1)
+        if self.zi is None:
+            self.zi = np.zeros((len(self.sos), 2, channels.shape[1]))
+        weighted, self.zi = sosfilt(self.sos, channels, axis=0, zi=self.zi)
+        # Channel energies summed (weight 1 for left and right), averaged per 100 ms.
+        energy = np.concatenate([self.carry, np.einsum("ij,ij->i", weighted, weighted)])
+        whole = len(energy) // self.step * self.step
+        self.energies.extend(energy[:whole].reshape(-1, self.step).mean(axis=1))
+        self.carry = energy[whole:]
+
+    def integrated(self):
+        """Integrated loudness in LUFS (-inf for silence)."""
+        if self.energies:
+            z = np.array(self.energies)
+        else:
+            z = np.array([self.carry.mean() if len(self.carry) else 0.0])
+        # 400 ms gating blocks every 100 ms.
+        blocks = np.convolve(z, np.full(4, 0.25), mode="valid") if len(z) >= 4 else np.array([z.mean()])
+        with np.errstate(divide="ignore"):
+            levels = -0.691 + 10.0 * np.log10(blocks)
+        gated = blocks[levels > -70.0]
+        if not len(gated):
+            return -np.inf
+        relative = -0.691 + 10.0 * np.log10(gated.mean()) - 10.0
+        gated = blocks[(levels > -70.0) & (levels > relative)]
+        return -0.691 + 10.0 * np.log10(gated.mean())
+
+
+class PeakNormalize(Step):
+    """pydub effects.normalize: peak to -headroom dBFS."""
+    elementwise = True
+    whole_signal = True
+
+    def __init__(self, headroom_db=0.1):
+        self.headroom_db = headroom_db
+        self.peak = 0.0
+        self.gain = None
+
+    def measure(self, block):
+        self.peak = max(self.peak, peak(block))
+
+    def __call__(self, block):
+        if self.gain is None:
+            self.gain = np.float32(db_to_gain(-self.headroom_db) / self.peak if self.peak > 0 else 1.0)
+        block *= self.gain
+        return block
+
+
+class Loudness(Step):
+    """Gain to target_lufs integrated loudness, lowered where needed to keep the peak at ceiling_db."""
+    elementwise = True
+    whole_signal = True
+
+    def __init__(self, sample_rate, target_lufs=-16.0, ceiling_db=-1.0):
+        self.meter = LoudnessMeter(sample_rate)
+        self.target_lufs = target_lufs
+        self.ceiling_db = ceiling_db
+        self.peak = 0.0
+        self.gain = None
+
+    def measure(self, block):
+        self.meter.add(block)
+        self.peak = max(self.peak, peak(block))
+
+    def __call__(self, block):
+        if self.gain is None:
+            loudness = self.meter.integrated()
+            gain = db_to_gain(self.target_lufs - loudness) if np.isfinite(loudness) else 1.0
+            if self.ceiling_db is not None and self.peak > 0:
+                gain = min(gain, db_to_gain(self.ceiling_db) / self.peak)
+            self.gain = np.float32(gain)
+        block *= self.gain
+        return block
+
+
+class ChannelGains(Step):
+    """The "Podcast" tone's apply_gain_stereo: mono in, stereo out with per-channel gain."""
+    def __init__(self, left_db, right_db):
+        self.gains = np.array([db_to_gain(left_db), db_to_gain(right_db)], dtype=np.float32)
+
+    def __call__(self, block):
+        return np.multiply.outer(block, self.gains)
+
+
+def _limit(sample_rate, gain_db=0.0, ceiling_db=-1.0):
+    """
+    The scripts' final boost and limiter: gain_db of boost, clipped at full
+    scale as pydub's 16-bit apply_gain did, then the peak set to ceiling_db.
+    """
+    if not gain_db:
+        return [PeakNormalize(-ceiling_db)]
+    return [Gain(db_to_gain(gain_db)), Clip(1.0), PeakNormalize(-ceiling_db)]
+
+
+def _butter(sample_rate, kind, cutoff, order=5, passes=1):
+    cutoff = tuple(cutoff) if isinstance(cutoff, (list, tuple)) else cutoff
+    return Filter(butterworth(kind, cutoff, sample_rate, order), passes)
+
+
+def _de_ess_band(sample_rate, low=4500, high=5500, threshold=0.05, factor=0.5, order=4, passes=2):
+    return DeEssBand(butterworth("band", (low, high), sample_rate, order), threshold, factor, passes)
+
+
+# name -> function of (sample_rate, **params) returning a step or a list of steps.
+STEPS = {
+    "high_pass": lambda sr, cutoff: Filter(one_pole("high", cutoff, sr)),
+    "low_pass": lambda sr, cutoff: Filter(one_pole("low", cutoff, sr)),
+    "butter": _butter,
+    "peaking": lambda sr, freq, gain_db, q=1.0: Filter(rbj("peaking", freq, gain_db, q, sr)),
+    "low_shelf": lambda sr, freq, gain_db, q=0.7071: Filter(rbj("low_shelf", freq, gain_db, q, sr)),
+    "high_shelf": lambda sr, freq, gain_db, q=0.7071: Filter(rbj("high_shelf", freq, gain_db, q, sr)),
+    "gain": lambda sr, gain_db: Gain(db_to_gain(gain_db)),
+    # The scripts' overlay(low_pass(cutoff).apply_gain(gain_db).invert_phase()): a low shelf cut.
+    "subtract_low": lambda sr, cutoff, gain_db: MixFiltered(one_pole("low", cutoff, sr), -db_to_gain(gain_db)),
+    # The scripts' overlay(high_pass(cutoff).apply_gain(gain_db)): a high shelf boost.
+    "add_high": lambda sr, cutoff, gain_db: MixFiltered(one_pole("high", cutoff, sr), db_to_gain(gain_db)),
+    "normalize": lambda sr, headroom_db=0.1: PeakNormalize(headroom_db),
+    "loudness": lambda sr, **params: Loudness(sr, **params),
+    "compress": lambda sr, **params: Compressor(sr, **params),
+    # The scripts' de_ess: subtract part of a 2nd-order band-pass of the sibilance band.
+    "de_ess": lambda sr, low=4000, high=8000, amount=0.35: MixFiltered(band_pass(low, high, sr), -amount),
+    "de_ess_band": _de_ess_band,
+    "clip": lambda sr, threshold=1.0: Clip(threshold),
+    "static_compress": lambda sr, threshold, ratio: StaticCompress(threshold, ratio),
+    "saturate": lambda sr, gain: Saturate(gain),
+    "reverb": lambda sr, **params: Reverb(sr, **params),
+    "limit": _limit,
+    "channel_gains": lambda sr, left_db, right_db: ChannelGains(left_db, right_db),
+}
+
+
+def _rechunk(blocks, size):
+    """Regroups an iterable of blocks into blocks of exactly `size` samples (the last may be shorter)."""
+    pending = []
+    count = 0
+    for block in blocks:
+        pending.append(block)
+        count += len(block)
+        if count < size:
+            continue
+        joined = np.concatenate(pending)
+        whole = len(joined) // size * size
+        for start in range(0, whole, size):
+            yield joined[start:start + size]
+        pending = [joined[whole:]]
+        count = len(pending[0])
+    if count:
+        yield np.concatenate(pending)
+
+
+def read_blocks(path, block_size=BLOCK_SIZE):
+    """A sound file as consecutive mono float32 blocks."""
+    import soundfile as sf
+    for block in sf.blocks(path, blocksize=block_size, dtype="float32", always_2d=True):
+        yield block[:, 0].copy() if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+
+
+class EnhanceChain:
+    def __init__(self, steps):
+        for name, _ in steps:
+            if name not in STEPS:
+                raise ValueError(f"Unknown enhancement step: {name}")
+        self.steps = [(name, dict(params)) for name, params in steps]
+        self.build(44100)
+
+    def build(self, sample_rate):
+        """
+        Fresh step objects for one signal. The stereo split of channel_gains
+        moves past the linear steps after it, so they run once on the mono
+        signal, and happens before the first step that is not linear; every
+        step from there on must also work on stereo blocks.
+        """
+        built = []
+        split = None
+        placed = False
+        for name, params in self.steps:
+            made = STEPS[name](sample_rate, **params)
+            for step in made if isinstance(made, list) else [made]:
+                if isinstance(step, ChannelGains):
+                    if split is not None:
+                        raise ValueError("channel_gains can only be used once")
+                    split = step
+                    continue
+                if split is not None and not placed and (not step.linear or step.whole_signal):
+                    built.append(split)
+                    placed = True
+                if placed and not step.elementwise:
+                    raise ValueError(f"{name} cannot follow channel_gains")
+                built.append(step)
+        if split is not None and not placed:
+            built.append(split)
+        return built
+
+    def process(self, samples, sample_rate):
+        """Runs the chain over mono float32 samples (modified in place); returns mono or (n, 2) stereo."""
+        x = np.ascontiguousarray(samples, dtype=np.float32)
+        for step in self.build(sample_rate):
+            if step.whole_signal:
+                step.measure(x)
+            x = step(x)
+        return x
+
+    def process_file(self, input_path, output_path, gate=None, block_seconds=BLOCK_SECONDS, on_progress=None):
+        """
+        Streams a sound file (downmixed to mono) through the chain into a
+        16-bit WAV, block_seconds at a time. gate is an optional
+        spectral_gate.SpectralGate run before the chain. The chain is cut
+        before every whole-signal step and each part is one pass over the
+        audio; on_progress(fraction) is called after every block.
+        """
+        import soundfile as sf
+        info = sf.info(input_path)
+        sample_rate = info.samplerate
+        hop = max(1, sample_rate // 1000)
+        block_size = max(hop, int(block_seconds * sample_rate) // hop * hop)
+        parts = [[]]
+        for step in self.build(sample_rate):
+            if step.whole_signal:
+                parts.append([])
+            parts[-1].append(step)
+        total = max(1, info.frames) * len(parts)
+        done = 0
+
+        with tempfile.TemporaryDirectory(prefix="enhance_") as work_dir:
+            blocks = read_blocks(input_path, block_size)
+            if gate is not None:
+                blocks = gate.stream(blocks)
+            source = None
+            for index, part in enumerate(parts):
+                last = index == len(parts) - 1
+                following = None if last else parts[index + 1][0]
+                target = output_path if last else os.path.join(work_dir, f"part_{index}.wav")
+                writer = None
+                try:
+                    for block in _rechunk(blocks, block_size):
+                        done += len(block)
+                        for step in part:
+                            block = step(block)
+                        if following is not None:
+                            following.measure(block)
+                        if writer is None:
+                            channels = 1 if block.ndim == 1 else block.shape[1]
+                            writer = sf.SoundFile(target, "w", sample_rate, channels,
+                                                  subtype="PCM_16" if last else "FLOAT")
+                        if last:
+                            block = np.clip(block * 32767.0, -32768, 32767).astype(np.int16)
+                        writer.write(block)
+                        if on_progress:
+                            on_progress(done / total)
+                finally:
+                    if writer is not None:
+                        writer.close()
+                    if source is not None:
+                        source.close()
+                if writer is None:
+                    raise ValueError(f"{input_path} has no audio")
+                if not last:
+                    source = sf.SoundFile(target)
+                    blocks = source.blocks(blocksize=block_size, dtype="float32")
+        return output_path
+
+
+def segment_samples(audio_segment):
+    """A pydub AudioSegment as mono float32 samples in [-1, 1]."""
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[audio_segment.sample_width]
+    samples = np.frombuffer(audio_segment.raw_data, dtype=dtype).astype(np.float32)
+    samples *= 1.0 / (1 << (8 * audio_segment.sample_width - 1))
+    if audio_segment.channels > 1:
+        samples = samples.reshape(-1, audio_segment.channels).mean(axis=1, dtype=np.float32)
+    return samples
+
+
+def samples_to_segment(samples, sample_rate):
+    """float32 samples (mono, or (n, channels)) as a 16-bit pydub AudioSegment."""
+    from pydub import AudioSegment
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    pcm = np.clip(samples * 32767.0, -32768, 32767).astype(np.int16)
+    return AudioSegment(pcm.tobytes(), frame_rate=sample_rate, sample_width=2, channels=channels)
+
+
+# v10's chain with the "Podcast" tone.
+V10_CHAIN = [
+    ("high_pass", {"cutoff": 90}),
+    ("subtract_low", {"cutoff": 350, "gain_db": -4.5}),
+    ("normalize", {}),
+    ("compress", {"threshold_db": -20.0, "ratio": 2.0}),
+    ("de_ess", {"low": 4000, "high": 8500, "amount": 0.4}),
+    ("channel_gains", {"left_db": -1.0, "right_db": 2.0}),
+    ("subtract_low", {"cutoff": 180, "gain_db": -3.5}),
+    ("add_high", {"cutoff": 3500, "gain_db": 1.5}),
+    ("reverb", {"echo_gain_db": 8.0}),
+    ("limit", {"gain_db": 6.5, "ceiling_db": -1.0}),
+]
+
+
+def _pydub_v10_chain(audio_segment):
+    """v10's enhance_audio before this module, kept as the benchmark baseline."""
+    from pydub import effects
+    from scipy.signal import lfilter
+    audio_segment = effects.high_pass_filter(audio_segment, cutoff=90)
+    low_mid = audio_segment.low_pass_filter(350).apply_gain(-4.5)
+    audio_segment = audio_segment.overlay(low_mid.invert_phase())
+    audio_segment = effects.normalize(audio_segment)
+    audio_segment = effects.compress_dynamic_range(audio_segment, threshold=-20.0, ratio=2.0)
+    samples = np.array(audio_segment.get_array_of_samples()).astype(np.float32)
+    nyq = 0.5 * audio_segment.frame_rate
+    b, a = butter(2, [4000 / nyq, 8500 / nyq], btype='band')
+    samples = samples - 0.4 * lfilter(b, a, samples)
+    audio_segment = samples_to_segment(samples / 32768.0, audio_segment.frame_rate)
+    audio_segment = audio_segment.apply_gain_stereo(-1.0, 2.0)
+    pop_filtered = audio_segment.low_pass_filter(180).apply_gain(-3.5)
+    audio_segment = audio_segment.overlay(pop_filtered.invert_phase())
+    crisp = audio_segment.high_pass_filter(3500).apply_gain(1.5)
+    audio_segment = audio_segment.overlay(crisp)
+    reverb_echo = (audio_segment + 8).fade(to_gain=-20.0, start=0, duration=600)
+    audio_segment = audio_segment.overlay(reverb_echo, gain_during_overlay=-3)
+    audio_segment = audio_segment.apply_gain(6.5)
+    return audio_segment.apply_gain(-1.0 - audio_segment.max_dBFS)
+
+
+def speech_like(seconds, sample_rate=44100, seed=0):
+    """Noise shaped into syllable-length bursts, as a stand-in for a voice recording."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    x = rng.standard_normal(n, dtype=np.float32) * 0.1
+    x = Filter(butterworth("band", (120, 6000), sample_rate, 2))(x)
+    hop = sample_rate // 1000
+    bursts = np.repeat((rng.random(n // hop + 1) < 0.7).astype(np.float32), hop)[:n]
+    x *= uniform_filter1d(bursts, hop * 40)
+    return x
+
+
+def _timed(run):
+    """(seconds, peak traced bytes) for one call of run."""
+    tracemalloc.start()
+    started = time.time()
+    run()
+    seconds = time.time() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak_bytes
+
+
+def benchmark(path=None, minutes=30, sample_rate=44100):
+    """
+    Times the one-buffer and streaming NumPy chains and (if pydub is
+    installed) v10's pydub chain; returns {name: (seconds, peak bytes)}.
+    """
+    import soundfile as sf
+    timings = {}
+    with tempfile.TemporaryDirectory(prefix="enhance_bench_") as work_dir:
+        if path is None:
+            path = os.path.join(work_dir, "speech.wav")
+            sf.write(path, speech_like(minutes * 60, sample_rate), sample_rate, subtype="PCM_16")
+
+        def one_buffer():
+            samples, rate = sf.read(path, dtype="float32", always_2d=True)
+            samples = samples.mean(axis=1, dtype=np.float32)
+            out = EnhanceChain(V10_CHAIN).process(samples, rate)
+            sf.write(os.path.join(work_dir, "numpy.wav"), out, rate, subtype="PCM_16")
+
+        timings["numpy"] = _timed(one_buffer)
+        timings["stream"] = _timed(lambda: EnhanceChain(V10_CHAIN).process_file(path, os.path.join(work_dir, "stream.wav")))
+        try:
+            from pydub import AudioSegment
+        except ImportError:
+            print("pydub is not installed; timing the NumPy chains only.")
+            return timings
+
+        def pydub_chain():
+            segment = AudioSegment.from_file(path).set_channels(1)
+            _pydub_v10_chain(segment).export(os.path.join(work_dir, "pydub.wav"), format="wav")
+
+        timings["pydub"] = _timed(pydub_chain)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy audio enhancement chain")
+    parser.add_argument("--benchmark", action="store_true", help="Compare with v10's pydub chain")
+    parser.add_argument("--wav", help="Recording to benchmark with (default: a synthetic one)")
+    parser.add_argument("--minutes", type=float, default=30, help="Length of the synthetic recording")
+    args = parser.parse_args()
+    if not args.benchmark:
+        parser.print_help()
+        return
+    timings = benchmark(args.wav, args.minutes)
+    for name, (seconds, peak_bytes) in timings.items():
+        print(f"{name:6s} {seconds:8.1f}s  peak {peak_bytes / 2 ** 20:8.1f} MiB")
+    if "pydub" in timings:
+        print(f"speedup {timings['pydub'][0] / timings['numpy'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Stationary spectral-gate noise reduction that runs block by block.
+
+nr.reduce_noise needs the whole recording in memory and makes several
+float64 copies of it and of its STFT. SpectralGate applies the same idea
+(noisereduce's stationary mode) as a streaming overlap-add STFT:
+- Each bin is compared with a threshold from the noise's per-bin dB mean
+  and standard deviation.
+- The resulting mask is smoothed across frequency and over a window of
+  frames centred on each frame. Output is held back by half that window,
+  so the mask can see a word's onset coming and does not clip it.
+- Everything under the threshold is attenuated by prop_decrease.
+All frames of a block go through at once. Only the last n_fft - hop input
+samples, the overlap tail and a few mask and spectrum rows carry over between blocks,
+so memory depends on the block size, not on the file length.
+
+The noise statistics come from a noise sample (NoiseProfile.from_samples)
+or, without one, from the quietest frames of the recording itself
+(NoiseProfile.estimate, one extra read of the file). A noise file's
+statistics are computed once and kept as a small .npz, keyed by a SHA-256
+of the file and the STFT size, so a batch of takes from the same mic and
+room reuses them (NoiseProfile.for_noise_file). The cache lives in
+~/.cache/video_processor/noise_profiles, or in NOISE_PROFILE_DIR.
+
+    gate = SpectralGate(NoiseProfile.from_samples(noise, sr))
+    for block in gate.stream(blocks):
+        ...
+
+    chain.process_file(path, out_path, gate=spectral_gate.for_file(path, noise))
+"""
+import hashlib
+import heapq
+import logging
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import scipy.fft
+from scipy.ndimage import uniform_filter1d
+from scipy.signal import get_window
+
+EPS = 1e-10
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    "NOISE_PROFILE_DIR", Path.home() / ".cache" / "video_processor" / "noise_profiles"
+))
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _frames(buf, n_fft, hop):
+    count = (len(buf) - n_fft) // hop + 1
+    if count <= 0:
+        return np.empty((0, n_fft), dtype=buf.dtype)
+    return np.lib.stride_tricks.sliding_window_view(buf, n_fft)[::hop][:count]
+
+
+class NoiseProfile:
+    """Per-bin mean and standard deviation of the noise magnitude in dB, for one STFT size."""
+    def __init__(self, mean_db, std_db, sample_rate, n_fft=1024, hop=256):
+        self.mean_db = np.asarray(mean_db, dtype=np.float32)
+        self.std_db = np.asarray(std_db, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop = hop
+
+    @classmethod
+    def from_spectra(cls, magnitudes, sample_rate, n_fft, hop):
+        db = 20.0 * np.log10(np.maximum(magnitudes, EPS))
+        return cls(db.mean(axis=0), db.std(axis=0), sample_rate, n_fft, hop)
+
+    @classmethod
+    def from_blocks(cls, blocks, sample_rate, n_fft=1024, hop=256):
+        """Statistics of a noise-only recording given as float blocks, accumulated block by block."""
+        window = get_window("hann", n_fft).astype(np.float32)
+        total = 0
+        sums = np.zeros(n_fft // 2 + 1)
+        squares = np.zeros(n_fft // 2 + 1)
+        carry = np.zeros(0, dtype=np.float32)
+        for block in blocks:
+            buf = np.concatenate([carry, np.asarray(block, dtype=np.float32)])
+            frames = _frames(buf, n_fft, hop)
+            carry = buf[len(frames) * hop:]
+            if not len(frames):
+                continue
+            db = 20.0 * np.log10(np.maximum(np.abs(scipy.fft.rfft(frames * window, axis=1)), EPS))
+            total += len(frames)
+            sums += db.sum(axis=0, dtype=np.float64)
+            squares += np.einsum("ij,ij->j", db, db, dtype=np.float64)
+        if not total:
+            # Shorter than one frame: zero-pad it to one.
+            return cls.from_spectra(np.abs(scipy.fft.rfft(np.pad(carry, (0, n_fft - len(carry))) * window))[None],
+                                    sample_rate, n_fft, hop)
+        mean = sums / total
+        return cls(mean, np.sqrt(np.maximum(squares / total - mean ** 2, 0.0)), sample_rate, n_fft, hop)
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate, n_fft=1024, hop=256):
+        """Statistics of a noise-only recording (float samples)."""
+        return cls.from_blocks([samples], sample_rate, n_fft, hop)
+
+    @classmethod
+    def for_noise_file(cls, path, n_fft=1024, hop=256, cache_dir=DEFAULT_CACHE_DIR):
+        """Statistics of a noise-only sound file, from the cache when this file was profiled before."""
+        cached = Path(cache_dir) / f"{hash_file(path)[:32]}_{n_fft}_{hop}.npz"
+        try:
+            return cls.load(cached)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+        import soundfile as sf
+        import enhance_engine
+        profile = cls.from_blocks(enhance_engine.read_blocks(path), sf.info(path).samplerate, n_fft, hop)
+        try:
+            profile.save(cached)
+        except OSError as e:
+            logging.warning(f"⚠️ Could not cache the noise profile: {e}")
+        return profile
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["mean_db"], data["std_db"], int(data["sample_rate"]), int(data["n_fft"]), int(data["hop"]))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, mean_db=self.mean_db, std_db=self.std_db, sample_rate=self.sample_rate,
+                         n_fft=self.n_fft, hop=self.hop)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def at_rate(self, sample_rate):
+        """This profile for audio at another sample rate, interpolated over frequency."""
+        if sample_rate == self.sample_rate:
+            return self
+        bins = np.arange(self.n_fft // 2 + 1)
+        source = bins * (self.sample_rate / self.n_fft)
+        target = bins * (sample_rate / self.n_fft)
+        return NoiseProfile(np.interp(target, source, self.mean_db), np.interp(target, source, self.std_db),
+                            sample_rate, self.n_fft, self.hop)
+
+    @classmethod
+    def estimate(cls, blocks, sample_rate, n_fft=1024, hop=256, quietest=0.05, max_frames=4000):
+        """
+        Statistics of the quietest `quietest` share of frames (at most
+        max_frames) of a recording given as float blocks: the noise floor
+        between words, for recordings without a separate noise sample.
+        """
+        window = get_window("hann", n_fft).astype(np.float32)
+        heap = []
+        total = 0
+        carry = np.zeros(0, dtype=np.float32)
+        for block in blocks:
+            buf = np.concatenate([carry, np.asarray(block, dtype=np.float32)])
+            frames = _frames(buf, n_fft, hop)
+            carry = buf[len(frames) * hop:]
+            if not len(frames):
+                continue
+            total += len(frames)
+            spectra = np.abs(scipy.fft.rfft(frames * window, axis=1))
+            energy = np.einsum("ij,ij->i", spectra, spectra)
+            keep = max(1, min(max_frames, int(total * quietest)))
+            for i in np.argsort(energy)[:keep]:
+                item = (-float(energy[i]), total + int(i), spectra[i].copy())
+                if len(heap) < keep:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+            while len(heap) > keep:
+                heapq.heappop(heap)
+        if not heap:
+            raise ValueError("Recording is shorter than one STFT frame")
+        return cls.from_spectra(np.stack([s for _, _, s in heap]), sample_rate, n_fft, hop)
+
+
+class SpectralGate:
+    def __init__(self, profile, prop_decrease=1.0, n_std_thresh=1.5, freq_smooth_hz=500, time_smooth_ms=50):
+        self.n_fft = profile.n_fft
+        self.hop = profile.hop
+        self.prop_decrease = prop_decrease
+        self.window = get_window("hann", self.n_fft).astype(np.float32)
+        # Overlap-add with the window applied twice sums to this constant.
+        self.norm = np.float32(self.hop / np.sum(self.window ** 2))
+        self.threshold = (10.0 ** ((profile.mean_db + n_std_thresh * profile.std_db) / 20.0)).astype(np.float32)
+        bin_hz = profile.sample_rate / self.n_fft
+        self.freq_smooth = max(1, int(round(freq_smooth_hz / bin_hz)))
+        self.time_smooth = max(1, int(round(time_smooth_ms / 1000.0 * profile.sample_rate / self.hop)))
+        # Frames of look-ahead that centre the time-smoothing window.
+        self.lookahead = (self.time_smooth - 1) // 2
+        self.latency = self.n_fft - self.hop + self.lookahead * self.hop
+        self.reset()
+
+    def reset(self):
+        self.pending = np.zeros(self.n_fft - self.hop, dtype=np.float32)
+        self.overlap = np.zeros(self.n_fft - self.hop, dtype=np.float32)
+        self.mask_tail = np.ones((self.time_smooth - 1, self.n_fft // 2 + 1), dtype=np.float32)
+        self.spectra_tail = np.zeros((self.lookahead, self.n_fft // 2 + 1), dtype=np.complex64)
+
+    def process(self, block):
+        """Gates one block; returns the output so far, `latency` samples behind the input."""
+        buf = np.concatenate([self.pending, np.asarray(block, dtype=np.float32)])
+        frames = _frames(buf, self.n_fft, self.hop)
+        count = len(frames)
+        self.pending = buf[count * self.hop:]
+        if not count:
+            return np.zeros(0, dtype=np.float32)
+        spectra = scipy.fft.rfft(frames * self.window, axis=1)
+        mask = (np.abs(spectra) > self.threshold).astype(np.float32)
+        mask = uniform_filter1d(mask, self.freq_smooth, axis=1, mode="nearest")
+        if self.time_smooth > 1:
+            history = np.concatenate([self.mask_tail, mask])
+            self.mask_tail = history[-(self.time_smooth - 1):]
+            # Each value averages the window ending at a new frame; it belongs to
+            # the frame `lookahead` back, so the spectra are delayed to match.
+            mask = uniform_filter1d(history, self.time_smooth, axis=0, origin=(self.time_smooth - 1) // 2)[-count:]
+        if self.lookahead:
+            spectra = np.concatenate([self.spectra_tail, spectra])
+            self.spectra_tail = spectra[count:]
+            spectra = spectra[:count]
+        spectra *= 1.0 - self.prop_decrease * (1.0 - mask)
+        frames_out = scipy.fft.irfft(spectra, n=self.n_fft, axis=1).astype(np.float32)
+        frames_out *= self.window * self.norm
+
+        out = np.zeros((count - 1) * self.hop + self.n_fft, dtype=np.float32)
+        out[:len(self.overlap)] += self.overlap
+        # Overlap-add one hop-wide column of every frame at a time.
+        for k in range(self.n_fft // self.hop):
+            out[k * self.hop:k * self.hop + count * self.hop] += frames_out[:, k * self.hop:(k + 1) * self.hop].reshape(-1)
+        self.overlap = out[count * self.hop:].copy()
+        return out[:count * self.hop]
+
+    def stream(self, blocks):
+        """Gates an iterable of blocks, yielding output aligned with the input and of the same total length."""
+        self.reset()
+        skip = self.latency
+        remaining = 0
+        for block in blocks:
+            remaining += len(block)
+            out = self.process(block)
+            if skip:
+                dropped = min(skip, len(out))
+                out = out[dropped:]
+                skip -= dropped
+            out = out[:remaining]
+            remaining -= len(out)
+            if len(out):
+                yield out
+        # Push the last latency samples (and any partial hop) out with silence.
+        while remaining > 0:
+            out = self.process(np.zeros(self.n_fft, dtype=np.float32))
+            if skip:
+                dropped = min(skip, len(out))
+                out = out[dropped:]
+                skip -= dropped
+            out = out[:remaining]
+            remaining -= len(out)
+            if len(out):
+                yield out
+
+    def apply(self, samples):
+        """Gates a whole signal at once."""
+        return np.concatenate(list(self.stream([samples])) or [np.zeros(0, dtype=np.float32)])
+
+
+def for_file(path, noise=None, **params):
+    """
+    A SpectralGate for one sound file: from `noise` (a NoiseProfile, or
+    float samples at the file's rate) or, without it, profiled from the
+    file's quietest frames.
+    """
+    import soundfile as sf
+    import enhance_engine
+    sample_rate = sf.info(path).samplerate
+    if isinstance(noise, NoiseProfile):
+        profile = noise.at_rate(sample_rate)
+    elif noise is not None:
+        profile = NoiseProfile.from_samples(noise, sample_rate)
+    else:
+        profile = NoiseProfile.estimate(enhance_engine.read_blocks(path), sample_rate)
+    return SpectralGate(profile, **params)
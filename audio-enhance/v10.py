@@ -1,17 +1,27 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from pydub import AudioSegment, effects
-import noisereduce as nr
+from pydub import AudioSegment
 import numpy as np
 import os
-from scipy.signal import butter, lfilter
-from concurrent.futures import ThreadPoolExecutor
+import enhance_engine
+import spectral_gate
+import dsp_preset
+import batch_engine
 import soundfile as sf
 import pyloudnorm as pyln
 
 # Globals
 noise_profile = None
 tone_setting = "Podcast"
+# Takes longer than this are streamed block by block instead of loaded whole.
+STREAM_MINUTES = 20
+# Peak memory per sample of a loaded take, and of a streamed one, for sizing the batch pool.
+# The spectral gate runs all STFT frames of a loaded take at once (n_fft 1024, hop 256):
+# 4x-overlapped float32 frames (16 B), complex64 spectra (16 B), float32 masks (~24 B) and the
+# inverse frames (16 B) peak at ~72 B; pydub's int16 copies add ~8 B.
+BYTES_PER_SAMPLE = 80
+STREAM_MEMORY = 256 * 2 ** 20
+batch = None
 
 # Load and convert to mono
 def load_audio(file_path):
@@ -43,46 +53,9 @@ def set_noise_profile():
     )
     if not file_path:
         return
+    # Per-bin noise statistics, computed once per noise file and cached on disk
+    noise_profile = spectral_gate.NoiseProfile.for_noise_file(file_path)
     print(f"Loaded noise profile: {file_path}")
-    noise_audio = load_audio(file_path)
-    noise_profile = audio_to_numpy(noise_audio)
-
-# De-esser: compress 4–8kHz
-def de_ess(audio_segment):
-    samples = audio_to_numpy(audio_segment)
-    sample_rate = audio_segment.frame_rate
-
-    from scipy.signal import butter, lfilter
-
-    def bandpass_filter(data, low, high, fs, order=2):
-        nyq = 0.5 * fs
-        low /= nyq
-        high /= nyq
-        b, a = butter(order, [low, high], btype='band')
-        return lfilter(b, a, data)
-
-    sibilant = bandpass_filter(samples, 4000, 8500, sample_rate)
-    reduced = samples - 0.4 * sibilant
-    return numpy_to_audio(reduced, audio_segment.sample_width, sample_rate)
-
-
-
-# Add subtle reverb with customizable decay
-def add_reverb(audio_segment, decay=-8, fade_duration=600):
-    reverb_echo = audio_segment - decay
-    reverb_echo = reverb_echo.fade(to_gain=-20.0, start=0, duration=fade_duration)
-    return audio_segment.overlay(reverb_echo, gain_during_overlay=-3)
-
-# Apply tone setting (with additional EQ adjustments)
-def apply_tone(audio_segment):
-    global tone_setting
-    if tone_setting == "Podcast":
-        return audio_segment.apply_gain_stereo(-1.0, 2.0)
-    elif tone_setting == "Warm":
-        return audio_segment.low_pass_filter(3200).apply_gain(-1)
-    elif tone_setting == "Bright":
-        return audio_segment.high_pass_filter(2800).apply_gain(2)
-    return audio_segment
 
 # Apply loudness normalization (LUFS)
 def normalize_loudness(audio_segment, target_lufs=-16):
@@ -104,66 +77,39 @@ def apply_eq(audio_segment, bass=0, mid=0, treble=0):
         audio_segment = audio_segment.high_pass_filter(3000) if treble > 0 else audio_segment.low_pass_filter(3000)
     return audio_segment
 
-# Final limiter to ensure no clipping
-def apply_final_limiter(audio_segment, max_dbfs=-1.0):
-    peak = audio_segment.max_dBFS
-    gain = max_dbfs - peak
-    return audio_segment.apply_gain(gain)
+# The enhancement chain and its voice tones, from presets.json
+PRESET = dsp_preset.load("v10")
 
 # Full enhancement pipeline
-def enhance_audio(audio_segment):
-    # Step 1: Clean up rumble
-    audio_segment = effects.high_pass_filter(audio_segment, cutoff=90)
-
-    # Step 2: Remove "dooo" muffling (low-mid cut at 200–350Hz)
-    low_mid = audio_segment.low_pass_filter(350).apply_gain(-4.5)
-    audio_segment = audio_segment.overlay(low_mid.invert_phase())
-
-    # Step 3: Normalize
-    audio_segment = effects.normalize(audio_segment)
-
-    # Step 4: Gentle dynamic compression
-    audio_segment = effects.compress_dynamic_range(audio_segment, threshold=-20.0, ratio=2.0)
-
-    # Step 5: De-essing (reduce S/SH)
-    audio_segment = de_ess(audio_segment)
-
-    # Step 6: Apply voice tone preference
-    audio_segment = apply_tone(audio_segment)
-
-    # Step 7: Pop filter effect – reduce low shelf slightly
-    pop_filtered = audio_segment.low_pass_filter(180).apply_gain(-3.5)
-    audio_segment = audio_segment.overlay(pop_filtered.invert_phase())
-
-    # Step 8: Add clarity with crisp highs
-    crisp = audio_segment.high_pass_filter(3500).apply_gain(1.5)
-    audio_segment = audio_segment.overlay(crisp)
-
-    # Step 9: Subtle reverb
-    audio_segment = add_reverb(audio_segment)
-
-    # Step 10: Boost loudness post-processing (safe)
-    audio_segment = audio_segment.apply_gain(6.5)
-
-    # Step 11: Final limiter for clipping protection
-    audio_segment = apply_final_limiter(audio_segment, max_dbfs=-1.0)
-
-    return audio_segment
-
-
-
-
+def enhance_steps():
+    return PRESET.steps(tone_setting)
 
+def enhance_audio(audio_segment):
+    # One float32 pass with in-place filters instead of a pydub copy per step.
+    chain = enhance_engine.EnhanceChain(enhance_steps())
+    samples = enhance_engine.segment_samples(audio_segment)
+    samples = chain.process(samples, audio_segment.frame_rate)
+    return enhance_engine.samples_to_segment(samples, audio_segment.frame_rate)
+
+# Long takes: spectral gate and enhancement chain streamed over 10 s blocks,
+# so memory stays the same however long the file is.
+def stream_enhance(input_path, output_path, on_progress=None):
+    if noise_profile is None:
+        # The NumPy chain, like shorter takes: ffmpeg's afftdn and acompressor would sound different.
+        PRESET.process_file(input_path, output_path, variant=tone_setting, backend="numpy", on_progress=on_progress)
+        return
+    gate = spectral_gate.for_file(input_path, noise_profile, prop_decrease=0.95)
+    PRESET.chain(tone_setting).process_file(input_path, output_path, gate=gate, on_progress=on_progress)
 
-# Noise reduction
+# Noise reduction: spectral gate from the cached noise profile, or from the take's own quietest frames
 def reduce_noise(audio_segment):
-    global noise_profile
-    samples = audio_to_numpy(audio_segment)
+    samples = audio_to_numpy(audio_segment) / 32768.0
     sample_rate = audio_segment.frame_rate
     if noise_profile is not None:
-        reduced = nr.reduce_noise(y=samples, y_noise=noise_profile, sr=sample_rate, prop_decrease=0.95)
+        gate = spectral_gate.SpectralGate(noise_profile.at_rate(sample_rate), prop_decrease=0.95)
     else:
-        reduced = nr.reduce_noise(y=samples, sr=sample_rate)
+        gate = spectral_gate.SpectralGate(spectral_gate.NoiseProfile.estimate([samples], sample_rate))
+    reduced = gate.apply(samples) * 32768.0
     return numpy_to_audio(reduced, audio_segment.sample_width, sample_rate)
 
 # File preview function
@@ -171,36 +117,69 @@ def preview_audio(audio_segment):
     audio_segment.export("temp_preview.wav", format="wav")
     os.system("start temp_preview.wav")  # Play the audio on Windows, use "open" for macOS
 
-# Main processing function with progress feedback
-def process_audio(input_file, output_dir, progress_bar, input_files):
-    try:
-        filename = os.path.basename(input_file)
-        name, _ = os.path.splitext(filename)
-        output_path = os.path.join(output_dir, f"{name}_enhanced.wav")
+# Main processing function; runs in a batch worker process and reports progress with report(fraction)
+def process_audio(input_file, output_dir, report):
+    filename = os.path.basename(input_file)
+    name, _ = os.path.splitext(filename)
+    output_path = os.path.join(output_dir, f"{name}_enhanced.wav")
 
-        print(f"Processing: {filename}")
+    print(f"Processing: {filename}")
+    if sf.info(input_file).duration > STREAM_MINUTES * 60:
+        stream_enhance(input_file, output_path, report)
+    else:
         audio = load_audio(input_file)
+        report(0.1)
         reduced_audio = reduce_noise(audio)
+        report(0.6)
         final_audio = enhance_audio(reduced_audio)
+        report(0.9)
         final_audio.export(output_path, format="wav")
-        print(f"Saved: {output_path}")
+    print(f"Saved: {output_path}")
 
-        # Update progress bar
-        progress_bar['value'] += 100 / len(input_files)
-        root.update_idletasks()
+# Batch workers are separate processes: hand them the GUI's settings once at start-up
+def init_worker(tone, noise):
+    global tone_setting, noise_profile
+    tone_setting = tone
+    noise_profile = noise
 
-    except Exception as e:
-        print(f"Error processing {input_file}: {e}")
+def memory_per_file(input_file):
+    info = sf.info(input_file)
+    if info.duration > STREAM_MINUTES * 60:
+        return STREAM_MEMORY
+    return info.frames * info.channels * BYTES_PER_SAMPLE
 
-# Multi-threaded file processing
+# Multi-process file processing: pydub and noisereduce hold the GIL, so threads ran one file at a time
 def process_files_parallel(input_files, output_dir, progress_bar):
-    with ThreadPoolExecutor() as executor:
-        for input_file in input_files:
-            executor.submit(process_audio, input_file, output_dir, progress_bar, input_files)
+    global batch
+    batch = batch_engine.BatchRunner(
+        process_audio, input_files, args=(output_dir,), memory_per_file=memory_per_file,
+        initializer=init_worker, initargs=(tone_setting, noise_profile)
+    ).start()
+    print(f"Enhancing {len(input_files)} files on {batch.workers} workers")
+    poll_batch(progress_bar)
+
+# Runs on the Tk thread: progress and the final message only after every file is done
+def poll_batch(progress_bar):
+    for path, outcome in batch.poll():
+        if isinstance(outcome, BaseException):
+            print(f"Error processing {path}: {outcome}")
+    progress_bar['value'] = batch.progress() * 100
+    if not batch.finished():
+        root.after(100, poll_batch, progress_bar)
+        return
+    summary = batch.summary()
+    print("\n".join(summary))
+    if batch.errors:
+        messagebox.showwarning("Done", f"{len(batch.errors)} of {len(batch.files)} files failed; see the console.\n{summary[-1]}")
+    else:
+        messagebox.showinfo("Done", f"All files processed!\n{summary[-1]}")
 
 # File selector
 def select_files():
     global input_files
+    if batch is not None and not batch.finished():
+        messagebox.showwarning("Busy", "Wait for the current batch to finish.")
+        return
     input_files = filedialog.askopenfilenames(title="Select WAV Files", filetypes=[("WAV Files", "*.wav")])
     if not input_files:
         return
@@ -208,11 +187,10 @@ def select_files():
     if not output_dir:
         return
 
-    progress_bar['maximum'] = len(input_files) * 100
+    progress_bar['maximum'] = 100
+    progress_bar['value'] = 0
     process_files_parallel(input_files, output_dir, progress_bar)
 
-    messagebox.showinfo("Done", "All files processed!")
-
 # GUI app with real-time user feedback
 def main():
     def run_with_tone(tone):
@@ -227,7 +205,7 @@ def main():
     root.title("Audio Enhancer - Voice Tone & Batch Noise Reduction")
 
     ttk.Label(root, text="🎙️ Select Voice Tone:").pack(pady=10)
-    for t in ["Podcast", "Warm", "Bright"]:
+    for t in PRESET.variants:
         ttk.Button(root, text=t, command=lambda tone=t: run_with_tone(tone)).pack(pady=5)
 
     ttk.Button(root, text="📤 Load Noise Sample", command=set_noise_profile).pack(pady=15)
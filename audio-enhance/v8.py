@@ -1,15 +1,25 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from pydub import AudioSegment, effects
+from pydub import AudioSegment
 import noisereduce as nr
 import numpy as np
 import os
-from scipy.signal import butter, lfilter
+import enhance_engine
+import spectral_gate
+import dsp_preset
+import soundfile as sf
 from concurrent.futures import ThreadPoolExecutor
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encode_scheduler
 
 # Globals
 noise_profile = None
 tone_setting = "Podcast"
+# Takes longer than this are streamed block by block instead of loaded whole.
+STREAM_MINUTES = 20
 
 # Load and convert to mono
 def load_audio(file_path):
@@ -45,55 +55,29 @@ def set_noise_profile():
     noise_audio = load_audio(file_path)
     noise_profile = audio_to_numpy(noise_audio)
 
-# De-esser: compress 4–8kHz
-def de_ess(audio_segment):
-    samples = audio_to_numpy(audio_segment)
-    sample_rate = audio_segment.frame_rate
-
-    def bandpass_filter(data, low, high, fs, order=2):
-        nyq = 0.5 * fs
-        low /= nyq
-        high /= nyq
-        b, a = butter(order, [low, high], btype='band')
-        return lfilter(b, a, data)
-
-    sibilant = bandpass_filter(samples, 4000, 8000, sample_rate)
-    reduced = samples - 0.35 * sibilant  # slightly reduced sibilance
-    return numpy_to_audio(reduced, audio_segment.sample_width, sample_rate)
-
-# Add subtle reverb with customizable decay
-def add_reverb(audio_segment, decay=-8, fade_duration=600):
-    reverb_echo = audio_segment - decay
-    reverb_echo = reverb_echo.fade(to_gain=-20.0, start=0, duration=fade_duration)
-    return audio_segment.overlay(reverb_echo, gain_during_overlay=-3)
-
-# Apply tone setting (with additional EQ adjustments)
-def apply_tone(audio_segment):
-    global tone_setting
-    if tone_setting == "Podcast":
-        return audio_segment.apply_gain_stereo(-1.0, 2.0)
-    elif tone_setting == "Warm":
-        return audio_segment.low_pass_filter(3200).apply_gain(-1)
-    elif tone_setting == "Bright":
-        return audio_segment.high_pass_filter(2800).apply_gain(2)
-    return audio_segment
-
-# Final limiter to ensure no clipping
-def apply_final_limiter(audio_segment, max_dbfs=-1.0):
-    peak = audio_segment.max_dBFS
-    gain = max_dbfs - peak
-    return audio_segment.apply_gain(gain)
+# The enhancement chain and its voice tones, from presets.json
+PRESET = dsp_preset.load("v8")
 
 # Full enhancement pipeline
+def enhance_steps():
+    return PRESET.steps(tone_setting)
+
 def enhance_audio(audio_segment):
-    audio_segment = effects.high_pass_filter(audio_segment, cutoff=90)
-    audio_segment = effects.normalize(audio_segment)
-    audio_segment = effects.compress_dynamic_range(audio_segment, threshold=-22.0, ratio=3.0)
-    audio_segment = de_ess(audio_segment)
-    audio_segment = apply_tone(audio_segment)
-    audio_segment = add_reverb(audio_segment)
-    audio_segment = apply_final_limiter(audio_segment)
-    return audio_segment
+    # One float32 pass with in-place filters instead of a pydub copy per step.
+    chain = enhance_engine.EnhanceChain(enhance_steps())
+    samples = enhance_engine.segment_samples(audio_segment)
+    samples = chain.process(samples, audio_segment.frame_rate)
+    return enhance_engine.samples_to_segment(samples, audio_segment.frame_rate)
+
+# Long takes: spectral gate and enhancement chain streamed over 10 s blocks,
+# so memory stays the same however long the file is.
+def stream_enhance(input_path, output_path):
+    if noise_profile is None:
+        # The NumPy chain, like shorter takes: ffmpeg's afftdn and acompressor would sound different.
+        PRESET.process_file(input_path, output_path, variant=tone_setting, backend="numpy")
+        return
+    gate = spectral_gate.for_file(input_path, noise_profile / 32768.0, prop_decrease=0.95)
+    PRESET.chain(tone_setting).process_file(input_path, output_path, gate=gate)
 
 # Noise reduction
 def reduce_noise(audio_segment):
@@ -119,10 +103,13 @@ def process_audio(input_file, output_dir, progress_bar, input_files):
         output_path = os.path.join(output_dir, f"{name}_enhanced.wav")
 
         print(f"Processing: {filename}")
-        audio = load_audio(input_file)
-        reduced_audio = reduce_noise(audio)
-        final_audio = enhance_audio(reduced_audio)
-        final_audio.export(output_path, format="wav")
+        if sf.info(input_file).duration > STREAM_MINUTES * 60:
+            stream_enhance(input_file, output_path)
+        else:
+            audio = load_audio(input_file)
+            reduced_audio = reduce_noise(audio)
+            final_audio = enhance_audio(reduced_audio)
+            final_audio.export(output_path, format="wav")
         print(f"Saved: {output_path}")
 
         # Update progress bar
@@ -134,7 +121,8 @@ def process_audio(input_file, output_dir, progress_bar, input_files):
 
 # Multi-threaded file processing
 def process_files_parallel(input_files, output_dir, progress_bar):
-    with ThreadPoolExecutor() as executor:
+    # One file per core: the default pool (cores + 4) oversubscribes the CPU-bound noise reduction.
+    with ThreadPoolExecutor(max_workers=encode_scheduler.cpu_workers(len(input_files))) as executor:
         for input_file in input_files:
             executor.submit(process_audio, input_file, output_dir, progress_bar, input_files)
 
@@ -167,7 +155,7 @@ def main():
     root.title("Audio Enhancer - Voice Tone & Batch Noise Reduction")
 
     ttk.Label(root, text="🎙️ Select Voice Tone:").pack(pady=10)
-    for t in ["Podcast", "Warm", "Bright"]:
+    for t in PRESET.variants:
         ttk.Button(root, text=t, command=lambda tone=t: run_with_tone(tone)).pack(pady=5)
 
     ttk.Button(root, text="📤 Load Noise Sample", command=set_noise_profile).pack(pady=15)
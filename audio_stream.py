@@ -0,0 +1,135 @@
+"""
+Decodes audio straight from ffmpeg into a NumPy buffer, with no WAV on disk.
+
+ffmpeg writes raw 32-bit float samples (`-f f32le -ar 16000 -ac 1 pipe:1`)
+which are read directly into a preallocated float32 array, sized from the
+cached ffprobe duration so long recordings are not copied while growing.
+faster-whisper accepts the array as is; Vosk gets it back as 16-bit PCM
+chunks. AudioSource keeps the decoded samples so the same decode also
+serves loudness analysis.
+
+    from audio_stream import AudioSource
+    source = AudioSource.decode("talk.mp4")
+    segments, info = model.transcribe(source.samples)
+    print(source.loudness())
+"""
+import os
+import subprocess
+import threading
+
+import numpy as np
+
+import media_info
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def decode_audio(path, sample_rate=WHISPER_SAMPLE_RATE, channels=1, stop_event=None):
+    """
+    Returns the audio of path as a float32 array (interleaved if channels > 1),
+    or None if stop_event was set. Raises CalledProcessError if ffmpeg fails.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", str(path), "-vn",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(sample_rate), "-ac", str(channels), "pipe:1"
+    ]
+    try:
+        expected = int((media_info.get_duration(path) + 1) * sample_rate * channels)
+    except Exception:
+        expected = 0
+    buffer = np.empty(max(expected, sample_rate * channels), dtype=np.float32)
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    )
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    filled = 0  # bytes written into buffer; reads need not end on a sample boundary
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                process.kill()
+                process.wait()
+                return None
+            if filled == buffer.nbytes:
+                grown = np.empty(buffer.size * 2, dtype=np.float32)
+                grown[:buffer.size] = buffer
+                buffer = grown
+            count = process.stdout.readinto(memoryview(buffer.view(np.uint8))[filled:])
+            if not count:
+                break
+            filled += count
+        process.wait()
+    finally:
+        process.stdout.close()
+        stderr_thread.join(timeout=5)
+    if process.returncode != 0:
+        stderr = b"".join(chunk for chunk in stderr_chunks if chunk).decode("utf-8", "replace")
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    return buffer[:filled // 4]
+
+
+def pcm16_chunks(samples, chunk_samples=4000):
+    """Yields the float samples as 16-bit little-endian PCM bytes, e.g. for Vosk's AcceptWaveform."""
+    for start in range(0, len(samples), chunk_samples):
+        chunk = np.clip(samples[start:start + chunk_samples], -1.0, 1.0) * 32767.0
+        yield chunk.astype("<i2").tobytes()
+
+
+def _db(value):
+    return float(20 * np.log10(value)) if value > 0 else float("-inf")
+
+
+class AudioSource:
+    """One decoded mono track shared by transcription and analysis."""
+    def __init__(self, samples, sample_rate=WHISPER_SAMPLE_RATE, path=None):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.path = path
+
+    @classmethod
+    def decode(cls, path, sample_rate=WHISPER_SAMPLE_RATE, stop_event=None):
+        samples = decode_audio(path, sample_rate, 1, stop_event=stop_event)
+        if samples is None:
+            return None
+        return cls(samples, sample_rate, path)
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    def pcm16_chunks(self, chunk_samples=4000):
+        return pcm16_chunks(self.samples, chunk_samples)
+
+    def loudness(self, block_seconds=0.4, gate_db=-70.0):
+        """
+        Peak and RMS levels in dBFS, plus a gated level over 400 ms blocks that
+        ignores silence the way LUFS gating does (no K-weighting, so treat it
+        as an estimate). speech_ratio is the share of blocks above the gate.
+        """
+        samples = self.samples
+        if not len(samples):
+            return {"peak_db": float("-inf"), "rms_db": float("-inf"), "gated_db": float("-inf"), "speech_ratio": 0.0}
+        block = max(1, int(block_seconds * self.sample_rate))
+        usable = len(samples) // block * block
+        if usable:
+            power = np.square(samples[:usable].reshape(-1, block), dtype=np.float64).mean(axis=1)
+        else:
+            power = np.square(samples, dtype=np.float64).mean(keepdims=True)
+        block_db = 10 * np.log10(np.maximum(power, 1e-20))
+        # Absolute gate, then the relative gate 10 dB under the mean of what passed.
+        loud = power[block_db > gate_db]
+        if loud.size:
+            relative = 10 * np.log10(loud.mean()) - 10
+            loud = loud[10 * np.log10(loud) > relative]
+        return {
+            "peak_db": _db(float(np.abs(samples).max())),
+            "rms_db": _db(float(np.sqrt(np.square(samples, dtype=np.float64).mean()))),
+            "gated_db": float(10 * np.log10(loud.mean())) if loud.size else float("-inf"),
+            "speech_ratio": float((block_db > gate_db).mean())
+        }
+
+    def is_silent(self, threshold_db=-60.0):
+        return self.loudness()["peak_db"] < threshold_db
@@ -0,0 +1,127 @@
+"""
+Uses auto-editor's cut decisions without rendering its cut video.
+
+auto-editor can export the timeline it would render (the v3 timeline JSON)
+instead of encoding a new file. TimeRemap reads the kept source ranges from
+that export and maps times between the source and the cut output, so audio
+can be cut by slicing samples and the final render can drop the silent
+parts itself with trim/atrim and concat, in the same encode that burns the
+subtitles. That saves one full encode of the intermediate auto_*.mp4.
+
+The ranges are snapped to the source's video frames first (snapped()), so
+the video, the audio and the sliced samples the subtitles come from are
+all cut at the same instants, and no error builds up over many cuts.
+"""
+import bisect
+import json
+import subprocess
+
+import numpy as np
+
+
+def _parse_timebase(value):
+    num, _, den = str(value).partition("/")
+    return float(num) / float(den or 1)
+
+
+def export_timeline(input_video, output_path, margin="0.2s", run=None, timeout=1800):
+    """
+    Runs auto-editor's analysis only and writes the v3 timeline JSON.
+    run(cmd, timeout=...) executes a command (defaults to subprocess.run)
+    and may return None when cancelled, which is passed through.
+    """
+    last_error = None
+    # Newer auto-editor spells the export "v3", older releases "timeline:api=3".
+    for export in ("v3", "timeline:api=3"):
+        cmd = ["auto-editor", str(input_video), "--export", export, "--margin", margin,
+               "--output", str(output_path), "--progress", "none", "--no-open"]
+        try:
+            if run is None:
+                subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
+            elif run(cmd, timeout=timeout) is None:
+                return None
+            return output_path
+        except subprocess.CalledProcessError as e:
+            last_error = e
+    raise RuntimeError(f"auto-editor could not export a timeline: {last_error}")
+
+
+class TimeRemap:
+    """Kept source ranges, in seconds, and the mapping to and from the cut timeline."""
+    def __init__(self, ranges, fps=None):
+        self.fps = fps
+        merged = []
+        for start, end in sorted(ranges):
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1] + 1e-6:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.ranges = [(float(s), float(e)) for s, e in merged]
+        self.source_starts = [s for s, _ in self.ranges]
+        self.output_starts = []
+        position = 0.0
+        for start, end in self.ranges:
+            self.output_starts.append(position)
+            position += end - start
+        self.duration = position
+
+    @classmethod
+    def from_v3(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        fps = _parse_timebase(data.get("timebase", "30/1"))
+        layers = [layer for layer in data.get("v", []) if layer] or [layer for layer in data.get("a", []) if layer]
+        if not layers:
+            raise ValueError("timeline has no clips")
+        ranges = []
+        for clip in layers[0]:
+            speed = float(clip.get("speed", 1.0))
+            if abs(speed - 1.0) > 1e-6:
+                # Only cut-or-keep edits can be replayed with select; sped-up parts need the real render.
+                raise ValueError(f"timeline uses speed {speed}, which cannot be remapped")
+            start = clip["offset"] / fps
+            ranges.append((start, start + clip["dur"] / fps))
+        return cls(ranges)
+
+    def snapped(self, fps):
+        """The same ranges with both ends rounded to the nearest frame boundary at fps."""
+        if not fps or fps <= 0:
+            return self
+        return TimeRemap([(round(s * fps) / fps, round(e * fps) / fps) for s, e in self.ranges], fps)
+
+    def to_output(self, source_time):
+        """Position of a source time in the cut output, or None if that moment was cut."""
+        i = bisect.bisect_right(self.source_starts, source_time) - 1
+        if i < 0 or source_time >= self.ranges[i][1]:
+            return None
+        return self.output_starts[i] + source_time - self.ranges[i][0]
+
+    def to_source(self, output_time):
+        i = max(0, bisect.bisect_right(self.output_starts, output_time) - 1)
+        return self.ranges[i][0] + output_time - self.output_starts[i]
+
+    def slice_samples(self, samples, sample_rate):
+        """
+        The kept parts of a sample array, joined in order: the cut output's
+        audio. Each part's length comes from its rounded position in the
+        output, so rounding to whole samples never adds up across cuts.
+        """
+        parts = []
+        for (start, end), output_start in zip(self.ranges, self.output_starts):
+            first = int(round(start * sample_rate))
+            length = int(round((output_start + end - start) * sample_rate)) - int(round(output_start * sample_rate))
+            parts.append(samples[first:first + length])
+        return np.concatenate(parts) if parts else samples[:0]
+
+    def trim_filters(self):
+        """
+        (video, audio) filter pairs cutting out each kept range, for concat.
+        On snapped ranges the video bounds sit half a frame early, so a
+        frame stamped on a boundary lands in exactly one range whatever
+        the rounding; the audio is cut at the exact times.
+        """
+        shift = 0.5 / self.fps if self.fps else 0.0
+        return [(f"trim=start={max(0.0, s - shift):.6f}:end={e - shift:.6f},setpts=PTS-STARTPTS",
+                 f"atrim=start={s:.6f}:end={e:.6f},asetpts=PTS-STARTPTS") for s, e in self.ranges]
@@ -0,0 +1,209 @@
+"""
+Chunked, multi-process transcription for long recordings.
+
+One faster-whisper model decodes a long file strictly sequentially and CTranslate2
+stops scaling well past a handful of threads. This splits the audio at
+silences (faster-whisper's Silero VAD, or a NumPy energy VAD if that is not
+available), transcribes the chunks in a pool of worker processes, each with
+its own int8 CPU model and a fixed thread count, and stitches the words back
+with each chunk's time offset. Chunks carry a little padding for context;
+every word belongs to the chunk whose core contains its midpoint, and
+duplicates at the seams are dropped.
+
+    from chunked_transcribe import ChunkedTranscriber
+    with ChunkedTranscriber("large-v3", workers=4) as transcriber:
+        result = transcriber.transcribe(samples, beam_size=1, word_timestamps=True)
+"""
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+import whisper_server
+
+SAMPLE_RATE = 16000
+
+_worker = {}
+
+
+def default_workers(cpu_count=None):
+    """About four cores per model keeps each CTranslate2 instance in its efficient range."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // 4)
+
+
+def energy_speech_spans(samples, sample_rate=SAMPLE_RATE, frame_seconds=0.03, min_silence=0.5):
+    """Speech spans as (start, end) seconds from frame energy relative to the noise floor."""
+    frame = max(1, int(frame_seconds * sample_rate))
+    count = len(samples) // frame
+    if not count:
+        return [(0.0, len(samples) / sample_rate)] if len(samples) else []
+    power = np.square(samples[:count * frame].reshape(count, frame), dtype=np.float64).mean(axis=1)
+    level = 10 * np.log10(np.maximum(power, 1e-12))
+    threshold = max(np.percentile(level, 10) + 10, -55.0)
+    voiced = level > threshold
+    if not voiced.any():
+        return []
+    # Rising and falling edges of the voiced mask give the span boundaries.
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_seconds
+    ends = np.flatnonzero(edges == -1) * frame_seconds
+    spans = [[starts[0], ends[0]]]
+    for start, end in zip(starts[1:], ends[1:]):
+        if start - spans[-1][1] < min_silence:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    return [(float(s), float(e)) for s, e in spans]
+
+
+def speech_spans(samples, sample_rate=SAMPLE_RATE, min_silence=0.5):
+    try:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        stamps = get_speech_timestamps(samples, VadOptions(min_silence_duration_ms=int(min_silence * 1000)))
+        return [(s["start"] / sample_rate, s["end"] / sample_rate) for s in stamps]
+    except Exception as e:
+        logging.info(f"ℹ️ Silero VAD unavailable ({e}), using energy VAD.")
+        return energy_speech_spans(samples, sample_rate, min_silence=min_silence)
+
+
+def plan_chunks(spans, duration, max_chunk=60.0):
+    """
+    Groups speech spans into chunks of at most max_chunk seconds. Returns
+    (core_start, core_end) pairs that tile the whole timeline; boundaries sit
+    in the middle of the silence between spans, or at a hard cut when a
+    single span is longer than max_chunk.
+    """
+    cuts = [0.0]
+    chunk_start = 0.0
+    previous_end = None
+    for start, end in spans:
+        if previous_end is not None and end - chunk_start > max_chunk:
+            cut = (previous_end + start) / 2
+            cuts.append(cut)
+            chunk_start = cut
+        while end - chunk_start > max_chunk:
+            chunk_start += max_chunk
+            cuts.append(chunk_start)
+        previous_end = end
+    cuts.append(duration)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b - a > 0.05]
+
+
+def stitch_segments(chunk_results, dedup_window=0.3):
+    """
+    Shifts chunk-relative segments to absolute time, keeps the words owned by
+    each chunk's core and drops duplicates at the seams.
+    """
+    stitched = []
+    previous = None
+    for (core_start, core_end, offset), segments in chunk_results:
+        for segment in segments:
+            kept = []
+            for w in segment["words"]:
+                start, end = w["start"] + offset, w["end"] + offset
+                if not core_start <= (start + end) / 2 < core_end:
+                    continue
+                if (previous is not None and previous["word"].strip(".,!?").lower() == w["word"].strip(".,!?").lower()
+                        and start - previous["start"] < dedup_window):
+                    continue
+                previous = {**w, "start": max(0.0, start), "end": max(start, end)}
+                kept.append(previous)
+            if kept:
+                stitched.append({
+                    "start": kept[0]["start"], "end": kept[-1]["end"],
+                    "text": " ".join(w["word"] for w in kept), "words": kept
+                })
+    return stitched
+
+
+def _init_worker(model_size, compute_type, cpu_threads, fallbacks):
+    name, model = whisper_server.load_model(model_size, "cpu", compute_type, fallbacks=fallbacks, cpu_threads=cpu_threads)
+    _worker["name"], _worker["model"] = name, model
+
+
+def _transcribe_chunk(samples, options):
+    result = whisper_server._run_transcription(_worker["model"], samples, options)
+    return result["segments"], result["language"], _worker["name"]
+
+
+class ChunkedTranscriber:
+    def __init__(self, model_size="large-v3", compute_type="int8", workers=None, cpu_threads=None,
+                 fallbacks=(), max_chunk=60.0, padding=0.25):
+        self.workers = workers or default_workers()
+        cpu_count = os.cpu_count() or 1
+        self.cpu_threads = cpu_threads or max(1, cpu_count // self.workers)
+        self.max_chunk = max_chunk
+        self.padding = padding
+        self._pool_args = (model_size, compute_type, self.cpu_threads, tuple(fallbacks))
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            logging.info(f"🧠 Starting {self.workers} transcription workers x {self.cpu_threads} threads")
+            # Spawned, not forked: the parent may already hold CTranslate2/OpenMP
+            # threads or a loaded model, and forking those can deadlock the workers.
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=self._pool_args)
+        return self._pool
+
+    def transcribe(self, samples, stop_event=None, on_progress=None, **options):
+        """
+        Transcribes a 16 kHz mono float32 array. Extra options go to
+        WhisperModel.transcribe. Returns the same shape as whisper_server.transcribe,
+        or None if stop_event was set; the chunks not yet started are then cancelled.
+        on_progress(fraction) is called as chunks finish, weighted by their length.
+        """
+        duration = len(samples) / SAMPLE_RATE
+        chunks = plan_chunks(speech_spans(samples), duration, self.max_chunk)
+        started = time.time()
+        futures = {}
+        for index, (core_start, core_end) in enumerate(chunks):
+            offset = max(0.0, core_start - self.padding)
+            end = min(duration, core_end + self.padding)
+            piece = samples[int(offset * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+            future = self._executor().submit(_transcribe_chunk, piece, options)
+            futures[future] = (index, (core_start, core_end, offset))
+        results = [None] * len(chunks)
+        transcribed = 0.0
+        pending = set(futures)
+        while pending:
+            if stop_event is not None and stop_event.is_set():
+                self.cancel()
+                return None
+            # A timeout rather than as_completed, so a stop is noticed while a long chunk runs.
+            finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, key = futures[future]
+                results[index] = (key, future.result())
+                transcribed += key[1] - key[0]
+            if finished and on_progress is not None:
+                on_progress(min(1.0, transcribed / duration) if duration else 1.0)
+        chunk_results = [(key, segments) for key, (segments, _, _) in results]
+        language = next((language for _, (_, language, _) in results if language), None)
+        # Each worker loads its own model; one may have fallen back to a smaller one.
+        model_name = "+".join(sorted({name for _, (_, _, name) in results})) or None
+        segments = stitch_segments(chunk_results)
+        logging.info(f"✅ Transcribed {duration:.0f}s in {len(chunks)} chunks across {self.workers} workers "
+                     f"in {time.time() - started:.1f}s")
+        return {"segments": segments, "language": language, "duration": duration, "model": model_name}
+
+    def cancel(self):
+        """Drops the queued chunks and lets the workers exit after their current one; the pool restarts on next use."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
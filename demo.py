@@ -2,7 +2,7 @@ import moviepy as mp
 from moviepy.video.tools.subtitles import SubtitlesClip
 from tkinter import Tk, Button, Label, filedialog
 from moviepy.video.fx.Resize import Resize  # Import only the 'resize' function
-from faster_whisper import WhisperModel
+import whisper_server
 import os
 
 # Subtitle rendering function
@@ -11,14 +11,14 @@ def subtitle_generator(txt):
 
 # Generate SRT from video using Whisper
 def generate_subtitles(video_path, srt_path):
-    model = WhisperModel("base", compute_type="int8", device="cpu")  # You can change to "medium" or "large"
-    segments, _ = model.transcribe(video_path)
+    # You can change to "medium" or "large"; the shared server keeps it loaded between runs
+    result = whisper_server.transcribe(video_path, model_size="base", compute_type="int8", device="cpu")
 
     with open(srt_path, "w", encoding="utf-8") as f:
-        for i, segment in enumerate(segments):
-            start = segment.start
-            end = segment.end
-            text = segment.text.strip()
+        for i, segment in enumerate(result["segments"]):
+            start = segment["start"]
+            end = segment["end"]
+            text = segment["text"]
             f.write(f"{i+1}\n")
             f.write(f"{format_timestamp(start)} --> {format_timestamp(end)}\n")
             f.write(f"{text}\n\n")
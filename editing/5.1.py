@@ -2,6 +2,13 @@ import os
 import subprocess
 from tkinter import Tk, filedialog
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
+import encoder_registry
+import encode_scheduler
 
 # Hide the Tkinter root window
 root = Tk()
@@ -19,7 +26,6 @@ output_height = 1920
 
 # FFmpeg binary paths
 ffmpeg_path = "ffmpeg"
-ffprobe_path = "ffprobe"
 
 # Centering filter
 filter_complex = (
@@ -29,14 +35,7 @@ filter_complex = (
 def get_video_duration(input_path):
     """Get video duration in seconds using ffprobe."""
     try:
-        result = subprocess.run(
-            [ffprobe_path, "-v", "error", "-show_entries",
-             "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", input_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True
-        )
-        return float(result.stdout.strip())
+        return media_info.get_duration(input_path)
     except Exception as e:
         return None
 
@@ -85,14 +84,16 @@ def process_video(input_path):
     if duration is None:
         return f"❌ Could not get duration for {auto_edited_video}"
 
+    # The batch is planned as parallel x264 jobs sharing the cores; a GPU encoder would not follow that plan.
+    encoder = encoder_registry.choose(allow_hardware=False)
     ffmpeg_center_cmd = [
         ffmpeg_path,
+        *encode_plan.input_args(),
         "-i", auto_edited_video,
         "-t", str(int(duration)),
         "-vf", filter_complex,
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "23",
+        *encoder.args(crf=23, preset="fast"),
+        *encode_plan.output_args(encoder.name),
         "-c:a", "aac",
         "-b:a", "128k",
         "-y",
@@ -119,8 +120,10 @@ def process_video(input_path):
 
 # === Run all processing tasks in parallel ===
 if file_paths:
-    max_threads = min(4, len(file_paths))  # Adjust based on your system
-    print(f"🚀 Starting batch processing with {max_threads} threads...\n")
+    # Jobs in flight and x264 threads per job, split from the cores for 1080x1920 output.
+    encode_plan = encode_scheduler.plan(len(file_paths), output_width, output_height)
+    max_threads = encode_plan.jobs
+    print(f"🚀 Starting batch processing with {max_threads} jobs x {encode_plan.threads} threads...\n")
 
     with ThreadPoolExecutor(max_workers=max_threads) as executor:
         futures = [executor.submit(process_video, path) for path in file_paths]
@@ -1,6 +1,13 @@
 import os
 import subprocess
 from tkinter import Tk, filedialog
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
+import encoder_registry
+import segment_encode
 
 # Hide the Tkinter root window
 root = Tk()
@@ -18,7 +25,6 @@ output_height = 1920
 
 # FFmpeg binary paths
 ffmpeg_path = "ffmpeg"
-ffprobe_path = "ffprobe"  # Use full path if needed
 
 # Filter for centering
 filter_complex = (
@@ -28,14 +34,7 @@ filter_complex = (
 def get_video_duration(input_path):
     """Returns duration in seconds using ffprobe"""
     try:
-        result = subprocess.run(
-            [ffprobe_path, "-v", "error", "-show_entries",
-             "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", input_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True
-        )
-        return float(result.stdout.strip())
+        return media_info.get_duration(input_path)
     except Exception as e:
         print(f"❌ Could not get duration for {input_path}: {e}")
         return None
@@ -95,17 +94,23 @@ for input_path in file_paths:
         "-i", auto_edited_video,
         "-t", str(max_duration),
         "-vf", filter_complex,
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "23",
+        *encoder_registry.video_args(preset="fast", crf=23),
         "-c:a", "aac",
         "-b:a", "128k",
         "-y",
         final_output
     ]
 
-    print(f"🎬 Processing centered video: {final_output}")
-    result = subprocess.run(ffmpeg_center_cmd, capture_output=True, text=True)
+    if segment_encode.worth_splitting(max_duration, encoder_registry.choose().name):
+        # Long videos: encode keyframe-aligned segments in parallel and join them with stream copy.
+        print(f"🎬 Processing centered video in parallel segments: {final_output}")
+        result = segment_encode.encode_segmented(
+            auto_edited_video, final_output, encoder_registry.video_args(preset="fast", crf=23),
+            video_filter=filter_complex, limit=max_duration, size=(output_width, output_height)
+        )
+    else:
+        print(f"🎬 Processing centered video: {final_output}")
+        result = subprocess.run(ffmpeg_center_cmd, capture_output=True, text=True)
 
     if result.returncode == 0:
         print(f"✅ Final video saved: {final_output}")
@@ -1,11 +1,16 @@
 import os
 import subprocess
-import json
 import tkinter as tk
 from tkinter import filedialog
 from pathlib import Path
 import logging
-from faster_whisper import WhisperModel
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from whisper_server import transcribe_words
+import media_info
+from subtitle_segments import segment_words
+import encoder_registry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
@@ -28,12 +33,7 @@ def format_time(seconds):
 
 def get_video_duration(file_path):
     try:
-        result = subprocess.run([
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-            '-of', 'json', file_path
-        ], capture_output=True, text=True, check=True)
-        duration_json = json.loads(result.stdout)
-        return float(duration_json["format"]["duration"])
+        return media_info.get_duration(file_path)
     except Exception as e:
         logging.error(f"Failed to get video duration: {e}")
         raise
@@ -41,14 +41,10 @@ def get_video_duration(file_path):
 
 def transcribe_audio(audio_path):
     logging.info(f"🧠 Transcribing: {audio_path}")
-    model = WhisperModel("medium", device="cpu", compute_type="int8")
-    segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True)
-    words = []
-    for segment in segments:
-        for w in segment.words:
-            if w.word.strip():
-                words.append({"word": w.word.strip(), "start": w.start, "end": w.end})
-    return words
+    # The medium model is loaded once by the shared server, not once per video.
+    words = transcribe_words(audio_path, model_size="medium", device="cpu", compute_type="int8",
+                             beam_size=5, word_timestamps=True)
+    return [{"word": w["word"], "start": w["start"], "end": w["end"]} for w in words]
 
 
 def generate_ass(words, ass_path):
@@ -67,32 +63,15 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
 """)
 
-        line = []
-        max_words_per_line = 3
-        max_duration_per_line = 5.0
-
-        def flush():
-            nonlocal line
-            if not line:
-                return
-            start = line[0].start
-            end = line[-1].end
+        for group in segment_words(words, max_words=3, max_duration=5.0):
+            line = [Word(w["word"], w["start"], w["end"]) for w in group["words"]]
             text = ""
             for i, w in enumerate(line):
                 k_dur = int((w.end - w.start) * 100)
                 # First word = white (FFFFFF), rest = yellow (00FFFF)
                 color = "\\c&HFFFFFF&" if i == 0 else "\\c&H00FFFF&"
                 text += f"{{\\fad(200,200)\\k{k_dur}{color}}}{w.word} "
-            f.write(f"Dialogue: 0,{format_time(start)},{format_time(end)},Default,,0,0,0,,{text.strip()}\n")
-            line = []
-
-        for w in words:
-            if len(line) < max_words_per_line and (not line or w["end"] - line[0].start <= max_duration_per_line):
-                line.append(Word(w["word"], w["start"], w["end"]))
-            else:
-                flush()
-                line.append(Word(w["word"], w["start"], w["end"]))
-        flush()
+            f.write(f"Dialogue: 0,{format_time(group['start'])},{format_time(group['end'])},Default,,0,0,0,,{text.strip()}\n")
 
 
 def process_video(input_video, output_video):
@@ -123,7 +102,7 @@ def process_video(input_video, output_video):
             "-stream_loop", "-1", "-i", "new_subscribe.gif",
             "-filter_complex", f"[0:v][1:v]overlay=10:10:{overlay_enable},ass={ass_path}",
             "-map", "0:a",
-            "-c:v", "libx264", "-crf", "23", "-preset", "fast",
+            *encoder_registry.video_args(preset="fast", crf=23),
             "-c:a", "aac", "-shortest",
             output_video
         ]
@@ -2,6 +2,16 @@ import tkinter as tk
 from tkinter import filedialog
 import ffmpeg
 import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
+from asset_store import AssetStore, EncodeProfile
+
+# Shared cache of the additional video, pre-converted once per target profile
+asset_store = AssetStore()
 
 # Function to select multiple videos
 def select_multiple_videos():
@@ -16,19 +26,21 @@ def select_output_folder():
     return filedialog.askdirectory(title="Select Output Folder")
 
 # Function to convert video to TS format for smooth merging
-def convert_to_ts(video_path, output_ts):
-    ffmpeg.input(video_path).output(output_ts, format="mpegts", vcodec="libx264", acodec="aac", strict="experimental").run(overwrite_output=True)
+def convert_to_ts(video_path, output_ts, profile):
+    has_audio = media_info.probe(video_path).has_audio
+    subprocess.run(profile.encode_command(video_path, output_ts, has_audio=has_audio), check=True)
 
 # Function to merge two videos properly
 def merge_videos(video1, video2, output_path):
     # Extract original filename without extension
     original_filename = os.path.splitext(os.path.basename(video1))[0]
     ts1 = f"temp1.ts"
-    ts2 = f"temp2.ts"
 
-    # Convert videos to TS format
-    convert_to_ts(video1, ts1)
-    convert_to_ts(video2, ts2)
+    # Both parts use the main video's profile so the TS files concat cleanly
+    profile = EncodeProfile.from_media(media_info.probe(video1), container="mpegts")
+    convert_to_ts(video1, ts1, profile)
+    # The additional video is converted only the first time this profile is seen
+    ts2 = asset_store.normalized(video2, profile)
 
     # Define the output filename with "_merged" appended
     output_file = os.path.join(output_path, f"{original_filename}_merged.mp4")
@@ -36,9 +48,8 @@ def merge_videos(video1, video2, output_path):
     # Concatenate the videos
     ffmpeg.input(f"concat:{ts1}|{ts2}", format="mpegts").output(output_file, vcodec="copy", acodec="copy").run(overwrite_output=True)
 
-    # Remove temporary files
+    # Remove temporary files (the cached additional video is kept for the next merge)
     os.remove(ts1)
-    os.remove(ts2)
 
     print(f"✅ Merged video saved: {output_file}")
 
@@ -6,16 +6,15 @@ from tkinter import (
     Frame, W, E, StringVar, OptionMenu
 )
 from PIL import Image
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import media_info
 
 def get_video_duration(video_path):
     try:
-        result = subprocess.run(
-            ["ffprobe", "-v", "error", "-select_streams", "v:0",
-             "-show_entries", "format=duration",
-             "-of", "default=noprint_wrappers=1:nokey=1", video_path],
-            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
-        )
-        return float(result.stdout.strip())
+        return media_info.get_duration(video_path)
     except:
         return 5.0
 
@@ -5,10 +5,15 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import sys
 import math # Needed for int() conversion of half_time for adelay
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import media_info
+from asset_store import AssetStore, overlay_profile
+import encoder_registry
 
 # --- Configuration ---
 FFMPEG_PATH = "ffmpeg"
-FFPROBE_PATH = "ffprobe"
 # --- End Configuration ---
 
 # --- GUI Functions (select_main_videos, select_start_overlay, etc.) ---
@@ -31,16 +36,12 @@ def select_output_folder():
 # --- Utility Functions (has_audio_stream, get_video_duration, check_ffmpeg_availability) ---
 # ... (Keep these exactly as they were in the previous version) ...
 def has_audio_stream(filepath):
-    cmd = [ FFPROBE_PATH, "-v", "error", "-show_streams", "-select_streams", "a", "-of", "default=noprint_wrappers=1:nokey=1", filepath ]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8')
-        return bool(result.stdout.strip())
+        return media_info.has_audio_stream(filepath)
     except Exception: return False # Simplified error handling for brevity
 def get_video_duration(filepath):
-    cmd = [ FFPROBE_PATH, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", filepath ]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8')
-        return float(result.stdout.strip())
+        return media_info.get_duration(filepath)
     except Exception as e:
          print(f"Error getting duration for {os.path.basename(filepath)}: {e}")
          messagebox.showerror("ffprobe Error", f"Failed to get duration for:\n{os.path.basename(filepath)}")
@@ -81,6 +82,17 @@ def process_videos():
     if not has_audio_stream(start_overlay): messagebox.showwarning("Audio Missing", f"Start Overlay:\n{os.path.basename(start_overlay)}\n\nHas no audio track. Continuing without its audio.")
     # --- End File Checks ---
 
+    # Scale and trim both overlays once; every main video reuses the cached clips.
+    start_overlay_duration = 5.0
+    middle_overlay_duration = 5.0
+    try:
+        asset_store = AssetStore()
+        start_overlay = str(asset_store.normalized(start_overlay, overlay_profile(start_overlay, 3, start_overlay_duration)))
+        middle_overlay = str(asset_store.normalized(middle_overlay, overlay_profile(middle_overlay, 3, middle_overlay_duration)))
+    except Exception as e:
+        messagebox.showerror("Overlay Error", f"Failed to prepare overlays:\n{e}")
+        return
+
     processing_successful_count = 0
     processing_failed_count = 0
     total_videos = len(main_videos)
@@ -104,8 +116,6 @@ def process_videos():
         delay_ms = int(half_time_sec * 1000)
         adelay_value = f"{delay_ms}|{delay_ms}" # Format for adelay e.g., "15000|15000"
 
-        start_overlay_duration = 5.0
-        middle_overlay_duration = 5.0
         middle_overlay_end_time = min(half_time_sec + middle_overlay_duration, duration)
 
         base_name = os.path.splitext(os.path.basename(main_video))[0]
@@ -114,14 +124,12 @@ def process_videos():
 
         # --- *** Fixed Filter Complex using adelay *** ---
         filter_complex = f"""
-        [1:v]scale=iw/3:ih/3[start_v];
-        [2:v]scale=iw/3:ih/3[middle_v_scaled];
-        [middle_v_scaled]setpts=PTS-STARTPTS+{half_time_sec}/TB[middle_v];
-        [0:v][start_v]overlay=W-w-20:H-h-20:enable='lt(t,{start_overlay_duration})'[tmp1];
+        [2:v]setpts=PTS-STARTPTS+{half_time_sec}/TB[middle_v];
+        [0:v][1:v]overlay=W-w-20:H-h-20:enable='lt(t,{start_overlay_duration})'[tmp1];
         [tmp1][middle_v]overlay=W-w-20:H-h-20:enable='between(t,{half_time_sec},{middle_overlay_end_time})'[vout];
 
-        [1:a]atrim=0:{start_overlay_duration},asetpts=PTS-STARTPTS,volume=1.5[start_a];
-        [2:a]atrim=0:{middle_overlay_duration},asetpts=PTS-STARTPTS,adelay={adelay_value}|{adelay_value},volume=1.8[middle_a];
+        [1:a]asetpts=PTS-STARTPTS,volume=1.5[start_a];
+        [2:a]asetpts=PTS-STARTPTS,adelay={adelay_value}|{adelay_value},volume=1.8[middle_a];
         [0:a]volume=2.0[main_a];
         [main_a][start_a]amix=inputs=2:duration=first:dropout_transition=2[tmpa];
         [tmpa][middle_a]amix=inputs=2:duration=first:dropout_transition=2[aout]
@@ -139,7 +147,7 @@ def process_videos():
             "-filter_complex", filter_complex,
             "-map", "[vout]",
             "-map", "[aout]",
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            *encoder_registry.video_args(preset="fast", crf=23),
             "-c:a", "aac", "-b:a", "192k",  # Increased audio bitrate for better quality
             "-movflags", "+faststart",
             "-y",
@@ -1,21 +1,28 @@
 import sys
 import json
-from faster_whisper import WhisperModel
+from pathlib import Path
 
-audio_path = sys.argv[1]
-output_path = sys.argv[2]
-# large-v3
-model = WhisperModel("medium", device="cpu", compute_type="int8")
-segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from audio_stream import AudioSource
+from chunked_transcribe import ChunkedTranscriber
 
-words = []
-for segment in segments:
-    for word in segment.words:
-        words.append({
-            "word": word.word.strip(),
-            "start": word.start,
-            "end": word.end
-        })
 
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(words, f, indent=2)
+def main():
+    audio_path = sys.argv[1]
+    output_path = sys.argv[2]
+    # large-v3
+    # Long recordings are split at silences and transcribed by several
+    # int8 worker processes in parallel, then stitched back together.
+    audio = AudioSource.decode(audio_path)
+    with ChunkedTranscriber("medium", compute_type="int8") as transcriber:
+        result = transcriber.transcribe(audio.samples, beam_size=5, word_timestamps=True)
+    words = [{"word": w["word"], "start": w["start"], "end": w["end"]}
+             for segment in result["segments"] for w in segment["words"]]
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(words, f, indent=2)
+
+
+# The guard matters: worker processes re-import this file on Windows.
+if __name__ == "__main__":
+    main()
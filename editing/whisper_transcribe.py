@@ -1,21 +1,17 @@
 import sys
 import json
-from faster_whisper import WhisperModel
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from whisper_server import transcribe_words
 
 audio_path = sys.argv[1]
 output_path = sys.argv[2]
 # large-v3
-model = WhisperModel("medium", compute_type="float16")  # or "int8" for less VRAM
-segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True)
-
-words = []
-for segment in segments:
-    for word in segment.words:
-        words.append({
-            "word": word.word.strip(),
-            "start": word.start,
-            "end": word.end
-        })
+# The model stays loaded in the shared whisper_server process between runs.
+words = transcribe_words(audio_path, model_size="medium", device="auto", compute_type="float16",  # or "int8" for less VRAM
+                         beam_size=5, word_timestamps=True)
+words = [{"word": w["word"], "start": w["start"], "end": w["end"]} for w in words]
 
 with open(output_path, "w", encoding="utf-8") as f:
     json.dump(words, f, indent=2)
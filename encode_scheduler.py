@@ -0,0 +1,176 @@
+"""
+How many encodes to run at once, and how many threads each one gets.
+
+libx264 starts about 1.5 threads per core, and so do the decoder and the
+filter graph, so four parallel ffmpeg runs on an 8-core box fight over 48+
+threads and spend their time switching and missing cache instead of
+encoding. x264 also stops scaling once there are more threads than the
+frame has rows of macroblocks to split, so a 720p encode gains little past
+~10 threads while 4K keeps scaling.
+
+plan() splits the cores between jobs: each job gets about a quarter of the
+threads its resolution can still use well (x264 gets more frames per second
+per core from several narrow encodes than from one wide one), as many jobs
+run as that allows, and the leftover cores go back to the jobs. EncodePlan.input_args() and
+output_args() pin decoder, filter and encoder threads to that share.
+
+    plan = encode_scheduler.plan(len(files), 1080, 1920)
+    with ThreadPoolExecutor(max_workers=plan.jobs) as executor: ...
+    cmd = ["ffmpeg", *plan.input_args(), "-i", src, ..., *video_args, *plan.output_args("libx264"), dst]
+
+A benchmark mode encodes the same batch with several splits and records the
+fastest one per core count and resolution; plan() prefers a recorded split:
+
+    python encode_scheduler.py --benchmark a.mp4 b.mp4 c.mp4 d.mp4
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import media_info
+
+DEFAULT_PLANS_PATH = Path(os.environ.get(
+    "ENCODE_PLANS_PATH", Path.home() / ".cache" / "video_processor" / "encode_plans.json"
+))
+
+
+def useful_threads(width, height):
+    """Threads libx264 still scales with at this resolution: ~16 at 1080x1920, ~11 at 720p, 32 at 4K."""
+    return max(2, min(32, round(math.sqrt(max(1, width * height)) / 90)))
+
+
+def _plan_key(cores, width, height):
+    return f"{cores}:{width}x{height}"
+
+
+def _recorded_plans(path=DEFAULT_PLANS_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class EncodePlan:
+    def __init__(self, jobs, threads, cores):
+        self.jobs = jobs
+        self.threads = threads
+        self.cores = cores
+
+    def input_args(self):
+        """Decoder threads; goes before -i."""
+        return ["-threads", str(max(1, self.threads // 2))]
+
+    def output_args(self, encoder="libx264"):
+        """Encoder and filter-graph threads; goes after the video encoder options."""
+        args = ["-threads", str(self.threads), "-filter_threads", str(max(1, self.threads // 2))]
+        if encoder == "libx264":
+            args += ["-x264-params", f"threads={self.threads}"]
+        elif encoder == "libx265":
+            args += ["-x265-params", f"pools={self.threads}"]
+        return args
+
+    def __repr__(self):
+        return f"EncodePlan(jobs={self.jobs}, threads={self.threads}, cores={self.cores})"
+
+
+def plan(pending, width=1080, height=1920, cores=None, plans_path=DEFAULT_PLANS_PATH):
+    """Split of cores for `pending` encodes of width x height output."""
+    cores = cores or os.cpu_count() or 1
+    pending = max(1, int(pending))
+    recorded = _recorded_plans(plans_path).get(_plan_key(cores, width, height))
+    if recorded:
+        jobs = max(1, min(pending, recorded["jobs"]))
+    else:
+        per_job = max(2, useful_threads(width, height) // 4)
+        jobs = max(1, min(pending, cores // per_job))
+    threads = max(1, min(useful_threads(width, height), cores // jobs))
+    return EncodePlan(jobs, threads, cores)
+
+
+def threads_per_job(jobs, width=1080, height=1920, cores=None):
+    """Threads for each of `jobs` encodes already running side by side."""
+    cores = cores or os.cpu_count() or 1
+    return max(1, min(useful_threads(width, height), cores // max(1, jobs)))
+
+
+def cpu_workers(pending, threads_each=1, cores=None):
+    """Pool size for CPU-bound (non-ffmpeg) jobs that each use threads_each threads."""
+    cores = cores or os.cpu_count() or 1
+    return max(1, min(int(pending), cores // max(1, threads_each)))
+
+
+def _encode(src, dst, width, height, threads, preset):
+    import encoder_registry
+    encoder = encoder_registry.choose(allow_hardware=False)
+    split = EncodePlan(1, threads, 0)
+    cmd = (["ffmpeg", "-y", "-loglevel", "error", *split.input_args(), "-i", str(src),
+            "-vf", f"scale={width}:-2,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"]
+           + encoder.args(23, preset) + split.output_args(encoder.name) + ["-an", str(dst)])
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def benchmark(files, width=1080, height=1920, preset="fast", cores=None, plans_path=DEFAULT_PLANS_PATH):
+    """
+    Encodes all files with 1, 2, 4, ... jobs in flight (threads split evenly)
+    and returns {jobs: wall seconds}. The fastest split is recorded for plan().
+    """
+    cores = cores or os.cpu_count() or 1
+    splits = []
+    jobs = 1
+    while jobs <= min(cores, len(files)):
+        splits.append(jobs)
+        jobs *= 2
+    timings = {}
+    with tempfile.TemporaryDirectory(prefix="encode_bench_") as work_dir:
+        for jobs in splits:
+            threads = max(1, cores // jobs)
+            started = time.time()
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(_encode, f, Path(work_dir) / f"{jobs}_{i}.mp4", width, height, threads, preset)
+                           for i, f in enumerate(files)]
+                for future in futures:
+                    future.result()
+            timings[jobs] = time.time() - started
+            logging.info(f"⏱️ {jobs} jobs x {threads} threads: {timings[jobs]:.1f}s for {len(files)} files")
+    best = min(timings, key=timings.get)
+    recorded = _recorded_plans(plans_path)
+    recorded[_plan_key(cores, width, height)] = {"jobs": best, "seconds": round(timings[best], 2)}
+    try:
+        Path(plans_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(plans_path, "w", encoding="utf-8") as f:
+            json.dump(recorded, f, indent=2)
+    except OSError as e:
+        logging.warning(f"⚠️ Could not record the benchmark result: {e}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan or benchmark concurrent x264 encodes")
+    parser.add_argument("files", nargs="*", help="Sample videos for --benchmark")
+    parser.add_argument("--benchmark", action="store_true", help="Time the batch with several job/thread splits")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--preset", default="fast")
+    parser.add_argument("--jobs", type=int, default=8, help="Pending encodes to plan for")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.benchmark:
+        if not args.files:
+            parser.error("--benchmark needs sample videos")
+        total = sum(media_info.get_duration(f) for f in args.files)
+        timings = benchmark(args.files, args.width, args.height, args.preset)
+        for jobs, seconds in sorted(timings.items()):
+            print(f"{jobs:3d} jobs: {seconds:7.1f}s  ({total / seconds:.2f}x realtime for the batch)")
+    print(plan(args.jobs, args.width, args.height))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Which video encoders work on this machine, and which one to use.
+
+Scripts used to either hardcode h264_nvenc (failing on render nodes without
+an NVIDIA GPU, and passing it x264-only options like -crf) or run a test
+nvenc encode before every video. EncoderRegistry lists the encoders the
+local ffmpeg was built with, test-encodes a short clip with each candidate
+(libx264, libx265, libsvtav1, nvenc, QSV, VAAPI) once, and records whether
+it worked and how many frames per second it managed. The result is cached
+on disk per host and ffmpeg build, so later runs just read it.
+
+choose() returns the fastest working encoder for a codec, and
+Encoder.args() translates an x264-style quality target (CRF and preset) to
+that encoder's own rate control and speed options.
+
+    import encoder_registry
+    cmd += encoder_registry.video_args(preset="slow", crf=18)
+"""
+import json
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(os.environ.get(
+    "ENCODER_CACHE", Path.home() / ".cache" / "video_processor" / "encoders.json"
+))
+
+# x264 preset names, fastest first; the GUI and the scripts speak these.
+X264_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+
+VAAPI_DEVICE = os.environ.get("VAAPI_DEVICE", "/dev/dri/renderD128")
+
+
+def _speed_index(preset):
+    try:
+        return X264_PRESETS.index(preset)
+    except ValueError:
+        return X264_PRESETS.index("fast")
+
+
+class Encoder:
+    """One ffmpeg encoder and how to express a CRF/preset target for it."""
+    def __init__(self, name, codec, family, hardware=False):
+        self.name = name
+        self.codec = codec
+        self.family = family
+        self.hardware = hardware
+
+    @property
+    def input_args(self):
+        """Global options that must come before the first -i."""
+        return ["-vaapi_device", VAAPI_DEVICE] if self.family == "vaapi" else []
+
+    @property
+    def upload_filter(self):
+        """Filter to append to the video chain; VAAPI only takes frames in GPU memory."""
+        return "format=nv12,hwupload" if self.family == "vaapi" else None
+
+    def args(self, crf=23, preset="fast"):
+        speed = _speed_index(preset)
+        crf = int(crf)
+        if self.family == "x264":
+            return ["-c:v", self.name, "-preset", X264_PRESETS[speed], "-crf", str(crf)]
+        if self.family == "x265":
+            # x265 CRF 28 looks about like x264 CRF 23.
+            return ["-c:v", self.name, "-preset", X264_PRESETS[speed], "-crf", str(crf + 5), "-tag:v", "hvc1"]
+        if self.family == "svtav1":
+            # SVT-AV1 presets run 0 (slowest) to 13; map ultrafast..veryslow onto 12..4.
+            return ["-c:v", self.name, "-preset", str(12 - speed), "-crf", str(min(63, crf + 12)), "-pix_fmt", "yuv420p"]
+        if self.family == "nvenc":
+            level = 1 + round(speed * 6 / (len(X264_PRESETS) - 1))
+            return ["-c:v", self.name, "-preset", f"p{level}", "-rc", "vbr", "-cq", str(crf), "-b:v", "0"]
+        if self.family == "qsv":
+            return ["-c:v", self.name, "-preset", X264_PRESETS[max(2, speed)], "-global_quality", str(crf)]
+        if self.family == "vaapi":
+            return ["-c:v", self.name, "-rc_mode", "CQP", "-qp", str(crf)]
+        return ["-c:v", self.name]
+
+
+CANDIDATES = {
+    "h264": [Encoder("h264_nvenc", "h264", "nvenc", True), Encoder("h264_qsv", "h264", "qsv", True),
+             Encoder("h264_vaapi", "h264", "vaapi", True), Encoder("libx264", "h264", "x264")],
+    "hevc": [Encoder("hevc_nvenc", "hevc", "nvenc", True), Encoder("hevc_qsv", "hevc", "qsv", True),
+             Encoder("hevc_vaapi", "hevc", "vaapi", True), Encoder("libx265", "hevc", "x265")],
+    "av1": [Encoder("av1_nvenc", "av1", "nvenc", True), Encoder("av1_qsv", "av1", "qsv", True),
+            Encoder("libsvtav1", "av1", "svtav1")],
+}
+
+
+class EncoderRegistry:
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, ffmpeg="ffmpeg"):
+        self.cache_path = Path(cache_path)
+        self.ffmpeg = ffmpeg
+        self._results = None
+        self._lock = threading.Lock()
+        self._announced = set()
+
+    def _host_key(self):
+        try:
+            version = subprocess.run([self.ffmpeg, "-hide_banner", "-version"], capture_output=True,
+                                     text=True, timeout=10).stdout.splitlines()[0]
+        except Exception:
+            version = "unknown"
+        return f"{platform.node()}|{version}"
+
+    def _available(self):
+        try:
+            listing = subprocess.run([self.ffmpeg, "-hide_banner", "-encoders"], capture_output=True,
+                                     text=True, timeout=10).stdout
+        except Exception:
+            return set()
+        names = set()
+        for line in listing.splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].startswith("V"):
+                names.add(parts[1])
+        return names
+
+    def _test_encode(self, encoder, frames=60):
+        """Encodes a short 720p test pattern; returns (ok, fps, error)."""
+        chain = "format=yuv420p"
+        if encoder.upload_filter:
+            chain += "," + encoder.upload_filter
+        cmd = ([self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin"] + encoder.input_args +
+               ["-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30", "-frames:v", str(frames), "-vf", chain] +
+               encoder.args(23, "fast") + ["-f", "null", "-"])
+        started = time.time()
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60,
+                                    creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        except Exception as e:
+            return False, 0.0, str(e)
+        elapsed = max(time.time() - started, 1e-3)
+        if result.returncode != 0:
+            return False, 0.0, (result.stderr.strip().splitlines() or ["failed"])[-1]
+        return True, round(frames / elapsed, 1), None
+
+    def probe(self):
+        """Test-encodes with every candidate the local ffmpeg lists and writes the cache."""
+        available = self._available()
+        results = {}
+        for encoders in CANDIDATES.values():
+            for encoder in encoders:
+                if encoder.name not in available:
+                    continue
+                ok, fps, error = self._test_encode(encoder)
+                results[encoder.name] = {"ok": ok, "fps": fps, "error": error}
+                if ok:
+                    logging.info(f"✅ Encoder {encoder.name} works ({fps:.0f} fps on the 720p probe)")
+                else:
+                    logging.info(f"ℹ️ Encoder {encoder.name} listed but not usable: {error}")
+        data = {"host": self._host_key(), "probed": time.time(), "encoders": results}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logging.warning(f"⚠️ Could not cache encoder probe: {e}")
+        return results
+
+    def results(self, refresh=False):
+        """{encoder name: {"ok", "fps", "error"}}, probing only if the cache is missing or stale."""
+        with self._lock:
+            if self._results is not None and not refresh:
+                return self._results
+            if not refresh:
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if data.get("host") == self._host_key():
+                        self._results = data["encoders"]
+                        return self._results
+                except (OSError, ValueError, KeyError):
+                    pass
+            logging.info("🔎 Probing video encoders (once per machine)...")
+            self._results = self.probe()
+            return self._results
+
+    def working(self, codec="h264"):
+        results = self.results()
+        return [e for e in CANDIDATES[codec] if results.get(e.name, {}).get("ok")]
+
+    def choose(self, codec="h264", allow_hardware=True, allow_upload=False):
+        """
+        Fastest working encoder for codec. allow_upload admits VAAPI, which
+        needs the caller to add encoder.input_args and encoder.upload_filter.
+        Falls back to the software encoder if nothing passed the probe.
+        """
+        candidates = [e for e in self.working(codec)
+                      if (allow_hardware or not e.hardware) and (allow_upload or not e.upload_filter)]
+        if candidates:
+            probed = self.results()
+            encoder = max(candidates, key=lambda e: probed[e.name]["fps"])
+        else:
+            encoder = next(e for e in CANDIDATES[codec] if not e.hardware)
+        key = (codec, allow_hardware, allow_upload, encoder.name)
+        if key not in self._announced:
+            self._announced.add(key)
+            kind = "GPU" if encoder.hardware else "CPU"
+            logging.info(f"🚀 Using {encoder.name} ({kind}) for {codec} encodes.")
+        return encoder
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = EncoderRegistry()
+        return _default
+
+
+def choose(codec="h264", allow_hardware=True, allow_upload=False):
+    return default_registry().choose(codec, allow_hardware, allow_upload)
+
+
+def video_args(preset="fast", crf=23, codec="h264", allow_hardware=True):
+    """Output options for the fastest working encoder that takes ordinary (system memory) frames."""
+    return choose(codec, allow_hardware).args(crf, preset)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    registry = default_registry()
+    for name, result in registry.results(refresh=True).items():
+        status = f"{result['fps']:.0f} fps" if result["ok"] else f"unusable ({result['error']})"
+        print(f"{name:12s} {status}")
+    for codec in CANDIDATES:
+        print(f"{codec}: {' '.join(registry.choose(codec).args())}")
+
+
+if __name__ == "__main__":
+    main()
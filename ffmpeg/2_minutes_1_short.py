@@ -3,6 +3,11 @@ import ffmpeg
 import tkinter as tk
 from tkinter import filedialog
 import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
 
 def choose_file(title="Select a video file", file_types=(("MP4 files", "*.mp4"), ("All files", "*.*"))):
     """Open file dialog to choose a file."""
@@ -22,11 +27,7 @@ def choose_output_file(default_name="output.mp4"):
 def get_video_duration(input_file):
     """Get the duration of the video using FFmpeg."""
     try:
-        result = subprocess.run(
-            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", input_file],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
-        return float(result.stdout.strip()) if result.stdout else None
+        return media_info.get_duration(input_file)
     except Exception as e:
         print("⚠️ Error getting video duration:", e)
         return None
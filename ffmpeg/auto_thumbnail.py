@@ -1,8 +1,13 @@
 import os
 import subprocess
+import sys
+from pathlib import Path
 from tkinter import Tk, filedialog, Label
 from PIL import Image, ImageTk
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
+
 def select_video_file():
     """Open dialog to select a single video file"""
     root = Tk()
@@ -19,14 +24,8 @@ def show_youtube_thumbnail(video_path):
     thumbnail_path = "youtube_thumbnail.jpg"
 
     try:
-        # Get video duration using ffprobe
-        result = subprocess.run(
-            ["ffprobe", "-v", "error", "-select_streams", "v:0",
-             "-show_entries", "format=duration",
-             "-of", "default=noprint_wrappers=1:nokey=1", video_path],
-            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
-        )
-        duration = float(result.stdout.strip())
+        # Get video duration from the shared probe cache
+        duration = media_info.get_duration(video_path)
         timestamp = duration * 0.2  # 20% into the video
     except Exception as e:
         print("Failed to get duration, defaulting to 5s:", e)
@@ -1,11 +1,19 @@
 import os
 import subprocess
+import sys
 import tkinter as tk
+from pathlib import Path
 from tkinter import filedialog, messagebox
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "audio-enhance"))
+import dsp_preset
+
+# High-pass, low-pass, afftdn noise suppression, -16 LUFS loudness and a volume boost, from presets.json
+PRESET = dsp_preset.load("background noise")
+
 def remove_background_noise(video_path, output_video_path):
-    audio_path = "temp_audio.aac"
-    clean_audio_path = "clean_audio.aac"
+    audio_path = "temp_audio.wav"
+    clean_audio_path = "clean_audio.wav"
 
     if not os.path.exists(video_path):
         messagebox.showerror("Error", f"File not found: {video_path}")
@@ -13,36 +21,35 @@ def remove_background_noise(video_path, output_video_path):
 
     try:
         print("Extracting audio from video...")
-        subprocess.run(["ffmpeg", "-i", video_path, "-vn", "-acodec", "aac", "-b:a", "128k", audio_path, "-y"], check=True)
+        subprocess.run(["ffmpeg", "-i", video_path, "-vn", "-acodec", "pcm_s16le", audio_path, "-y"], check=True)
 
         if not os.path.exists(audio_path):
             messagebox.showerror("Error", "Failed to extract audio. The input video may not have an audio stream.")
             return
 
         print("Reducing background noise and boosting volume...")
-        noise_filters = (
-            "highpass=f=100, "          # Removes low-frequency hum
-            "lowpass=f=6000, "          # Filters out harsh high frequencies
-            "afftdn=nr=20:nf=-30, "     # Strong noise suppression without distortion
-            "loudnorm=i=-16:lra=8:tp=-1.5, "  # Standard volume normalization
-            "volume=2.0"                # Boosts volume (adjustable)
-        )
-
-        subprocess.run(["ffmpeg", "-i", audio_path, "-af", noise_filters, clean_audio_path, "-y"], check=True)
+        # ffmpeg's filters for long videos, the NumPy chain for short ones
+        backend = PRESET.process_file(audio_path, clean_audio_path)
+        print(f"Cleaned audio with the {backend} backend")
 
         print("Replacing original audio with cleaned audio...")
         subprocess.run(["ffmpeg", "-i", video_path, "-i", clean_audio_path, "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
                         "-map", "0:v:0", "-map", "1:a:0", "-shortest", output_video_path, "-y"], check=True)
 
-        os.remove(audio_path)
-        os.remove(clean_audio_path)
-
         messagebox.showinfo("Success", f"Noise-reduced video saved as:\n{output_video_path}")
         print(f"✅ Noise-reduced video saved as: {output_video_path}")
 
     except subprocess.CalledProcessError as e:
         messagebox.showerror("Error", f"FFmpeg failed:\n{e}")
         print(f"❌ FFmpeg error: {e}")
+    except Exception as e:
+        # The preset's NumPy backend or its loudness pass can fail too (unreadable PCM, out of memory).
+        messagebox.showerror("Error", f"Noise reduction failed:\n{e}")
+        print(f"❌ Noise reduction error: {e}")
+    finally:
+        for path in (audio_path, clean_audio_path):
+            if os.path.exists(path):
+                os.remove(path)
 
 def main():
     root = tk.Tk()
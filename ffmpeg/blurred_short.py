@@ -4,6 +4,10 @@ from tkinter import filedialog
 import sys
 import time
 from colorama import Fore, Style, init
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encoder_registry
 
 init(autoreset=True)
 
@@ -51,9 +55,7 @@ def convert_video():
         "-i", input_file,
         "-t", str(short_duration_seconds),
         "-vf", filter_complex,
-        "-c:v", "h264_nvenc",  # Use "libx264" if NVENC not available
-        "-crf", "18",
-        "-preset", "slow",
+        *encoder_registry.video_args(preset="slow", crf=18),
         "-c:a", "aac",
         "-b:a", "192k",
         "-movflags", "+faststart",
@@ -1,6 +1,11 @@
 import tkinter as tk
 from tkinter import filedialog
 import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
 
 def cut_video_before_time():
     root = tk.Tk()
@@ -22,12 +27,8 @@ def cut_video_before_time():
         return
 
     try:
-        # Get video duration using ffprobe
-        result = subprocess.run([
-            "ffprobe", "-i", input_path, "-show_entries", "format=duration", "-v", "quiet", "-of", "csv=p=0"
-        ], capture_output=True, text=True)
-        
-        total_duration = float(result.stdout.strip())
+        # Get video duration from the shared probe cache
+        total_duration = media_info.get_duration(input_path)
         print(f"✅ Video Loaded Successfully!")
         print(f"📌 Video Duration: {total_duration:.2f} seconds")
         
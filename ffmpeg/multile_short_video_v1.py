@@ -1,6 +1,12 @@
 import os
 import subprocess
 from tkinter import Tk, filedialog
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import media_info
+import encoder_registry
 
 # Hide the Tkinter root window
 root = Tk()
@@ -18,7 +24,6 @@ output_height = 1920
 
 # FFmpeg binary paths
 ffmpeg_path = "ffmpeg"
-ffprobe_path = "ffprobe"  # Use full path if needed
 
 # Simple layout for centering the video
 filter_complex = (
@@ -28,14 +33,7 @@ filter_complex = (
 def get_video_duration(input_path):
     """Returns duration in seconds using ffprobe"""
     try:
-        result = subprocess.run(
-            [ffprobe_path, "-v", "error", "-show_entries",
-             "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", input_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True
-        )
-        return float(result.stdout.strip())
+        return media_info.get_duration(input_path)
     except Exception as e:
         print(f"❌ Could not get duration for {input_path}: {e}")
         return None
@@ -62,9 +60,7 @@ for input_path in file_paths:
         "-i", input_path,
         "-t", str(max_duration),
         "-vf", filter_complex,
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "23",
+        *encoder_registry.video_args(preset="fast", crf=23),
         "-c:a", "aac",
         "-b:a", "128k",
         "-y",  # overwrite without asking
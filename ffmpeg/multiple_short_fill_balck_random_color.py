@@ -3,10 +3,14 @@ import tkinter as tk
 from tkinter import filedialog
 import re
 import sys
-import time
 import random
 from colorama import Fore, Style, init
 import os
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ffmpeg_runner import run_ffmpeg
+import encoder_registry
 
 init(autoreset=True)
 
@@ -78,9 +82,7 @@ def convert_videos():
             "-ss", str(start_time),
             "-t", str(duration),
             "-vf", f"scale={resolution}:force_original_aspect_ratio=decrease,pad={resolution}:(ow-iw)/2:(oh-ih)/2:color={color_code}",
-            "-c:v", "h264_nvenc",
-            "-crf", "18",
-            "-preset", "slow",
+            *encoder_registry.video_args(preset="slow", crf=18),
             "-c:a", "aac",
             "-b:a", "192k",
             "-movflags", "+faststart",
@@ -89,18 +91,12 @@ def convert_videos():
         
         try:
             print(Fore.BLUE + "🚀 Starting video conversion...")
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-            total_steps = 100
-            for i in range(total_steps):
-                time.sleep(0.1)  # Simulated progress
-                print_progress_bar(i + 1, total_steps)
-            stdout, stderr = process.communicate()
-            if process.returncode == 0:
-                print(Fore.GREEN + f"\n✅ Converted video saved as: {output_file}")
-            else:
-                print(Fore.RED + "\n❌ Error during conversion:", stderr)
+            # ffmpeg reports how much of the clip it has written; scale that to the bar.
+            run_ffmpeg(command, duration=duration,
+                       on_progress=lambda p: print_progress_bar(round((p.fraction or 0) * 100), 100))
+            print(Fore.GREEN + f"\n✅ Converted video saved as: {output_file}")
         except subprocess.CalledProcessError as e:
-            print(Fore.RED + "\n❌ FFMPEG Error:", e)
+            print(Fore.RED + "\n❌ Error during conversion:", e.stderr)
         except Exception as e:
             print(Fore.RED + "\n❌ Unexpected Error:", e)
 
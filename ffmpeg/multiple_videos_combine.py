@@ -1,6 +1,11 @@
 import os
 import re
 from tkinter import Tk, filedialog
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encoder_registry
 
 def extract_floating_number(filename):
     """Extract floating number from filename"""
@@ -21,7 +26,7 @@ def choose_output_folder():
     return folder_selected if folder_selected else os.getcwd()
 
 def merge_videos_ffmpeg(video_files):
-    """Merge videos using FFmpeg with h264_nvenc while preserving quality"""
+    """Merge videos using FFmpeg with the fastest available encoder while preserving quality"""
     if not video_files:
         print("No videos selected.")
         return
@@ -37,7 +42,7 @@ def merge_videos_ffmpeg(video_files):
     
     ffmpeg_cmd = (
         f"ffmpeg -f concat -safe 0 -i \"{list_file}\" -vf scale=1920:1080 "
-        f"-c:v h264_nvenc -preset slow -cq 18 -c:a aac -b:a 320k \"{output_filename}\""
+        f"{' '.join(encoder_registry.video_args(preset='slow', crf=18))} -c:a aac -b:a 320k \"{output_filename}\""
     )
     
     os.system(ffmpeg_cmd)
@@ -2,6 +2,11 @@ import subprocess
 import tkinter as tk
 from tkinter import filedialog
 import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encoder_registry
 
 def select_file(title, filetypes):
     """ Open a file selection dialog """
@@ -52,9 +57,7 @@ def convert_video():
         "-ss", str(start_time),  # Start time in seconds
         "-t", str(duration),  # Duration in seconds
         "-vf", f"scale={resolution}:force_original_aspect_ratio=decrease,pad={resolution}:(ow-iw)/2:(oh-ih)/2",
-        "-c:v", "h264_nvenc",
-        "-crf", "18",
-        "-preset", "slow",
+        *encoder_registry.video_args(preset="slow", crf=18),
         "-c:a", "aac",
         "-b:a", "192k",
         "-movflags", "+faststart",
@@ -6,6 +6,10 @@ import sys
 import time
 from colorama import Fore, Style, init
 from PIL import Image
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encoder_registry
 
 init(autoreset=True)  # Initialize colorama for colored output
 
@@ -74,9 +78,7 @@ def convert_video():
         "-ss", str(start_time),
         "-t", str(duration),
         "-vf", f"scale={resolution}:force_original_aspect_ratio=decrease,pad={resolution}:(ow-iw)/2:(oh-ih)/2:color={color_code}",
-        "-c:v", "h264_nvenc",
-        "-crf", "18",
-        "-preset", "slow",
+        *encoder_registry.video_args(preset="slow", crf=18),
         "-c:a", "aac",
         "-b:a", "192k",
         "-movflags", "+faststart",
@@ -5,6 +5,10 @@ import re
 import sys
 import time
 from colorama import Fore, Style, init
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import encoder_registry
 
 init(autoreset=True)  # Initialize colorama for colored output
 
@@ -72,9 +76,7 @@ def convert_video():
         "-ss", str(start_time),
         "-t", str(duration),
         "-filter_complex", f"[0:v]scale={resolution}[bg];[1:v]scale={resolution}:force_original_aspect_ratio=decrease,pad={resolution}:(ow-iw)/2:(oh-ih)/2[fg];[bg][fg]overlay=(W-w)/2:(H-h)/2",
-        "-c:v", "h264_nvenc",
-        "-crf", "18",
-        "-preset", "slow",
+        *encoder_registry.video_args(preset="slow", crf=18),
         "-c:a", "aac",
         "-b:a", "192k",
         "-movflags", "+faststart",
@@ -0,0 +1,170 @@
+"""
+Builds a single ffmpeg invocation for the render stage.
+
+Instead of burning subtitles into one file, re-reading it to mix music and
+re-encoding both clips again for the merge, FilterGraphBuilder compiles the
+enabled steps (cutting to auto-editor's kept ranges, ASS or sprite burn-in, music
+with sidechain ducking, concat with an extra clip) into one -filter_complex, so each video is decoded and encoded
+exactly once.
+"""
+
+
+def escape_filter_path(path):
+    """Escapes a file path for use as a filter option value (ass=, subtitles=, movie=)."""
+    escaped = str(path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+class FilterGraphBuilder:
+    def __init__(self, main_video):
+        self.main_video = str(main_video)
+        self.subtitle_path = None
+        self.sprite_track = None
+        self.music_path = None
+        self.music_volume = 0.15
+        self.ducking = False
+        self.extra_video = None
+        self.target_size = None
+        self.fps = 30
+        self.sample_rate = 44100
+        self.output_profile = None
+        self.keep_remap = None
+        self.cut_frame_rate = None
+
+    def keep_only(self, remap, frame_rate=30):
+        """
+        Keeps only an auto_edit_timeline.TimeRemap's ranges (trim/atrim per
+        range, then concat) before the other steps, and resamples the cut
+        video to frame_rate as auto-editor's own render did.
+        """
+        self.keep_remap = remap
+        self.cut_frame_rate = frame_rate
+        return self
+
+    def burn_subtitles(self, ass_path):
+        self.subtitle_path = str(ass_path)
+        return self
+
+    def overlay_sprites(self, concat_path, x, y):
+        """Composites a sprite_subtitles ffconcat track at (x, y) instead of burning an ASS file."""
+        self.sprite_track = (str(concat_path), int(x), int(y))
+        return self
+
+    def add_music(self, music_path, volume=0.15, ducking=True):
+        self.music_path = str(music_path)
+        self.music_volume = volume
+        self.ducking = ducking
+        return self
+
+    def append_video(self, extra_video, width, height, fps=30, sample_rate=44100):
+        """Concats extra_video after the main one, scaled/padded to width x height."""
+        self.extra_video = str(extra_video)
+        self.target_size = (int(width), int(height))
+        self.fps = fps
+        self.sample_rate = sample_rate
+        return self
+
+    def conform_to(self, profile):
+        """
+        Encodes both streams to an asset_store.EncodeProfile instead of
+        stream-copying untouched ones, so the output can be concatenated
+        with `-c copy` onto clips normalized to the same profile.
+        """
+        self.output_profile = profile
+        return self
+
+    def is_passthrough(self):
+        return not (self.keep_remap or self.subtitle_path or self.sprite_track or self.music_path
+                    or self.extra_video or self.output_profile)
+
+    def _inputs(self):
+        args = ["-i", self.main_video]
+        index = {"main": 0}
+        if self.sprite_track:
+            index["sprites"] = len(index)
+            args += ["-f", "concat", "-safe", "0", "-i", self.sprite_track[0]]
+        if self.music_path:
+            index["music"] = len(index)
+            args += ["-stream_loop", "-1", "-i", self.music_path]
+        if self.extra_video:
+            index["extra"] = len(index)
+            args += ["-i", self.extra_video]
+        return args, index
+
+    def filter_complex(self):
+        _, index = self._inputs()
+        chains = []
+
+        video = "[0:v]"
+        audio = "[0:a]"
+        if self.keep_remap:
+            trims = self.keep_remap.trim_filters()
+            n = len(trims)
+            chains.append(f"[0:v]split={n}" + "".join(f"[vin{i}]" for i in range(n)))
+            chains.append(f"[0:a]asplit={n}" + "".join(f"[ain{i}]" for i in range(n)))
+            for i, (video_trim, audio_trim) in enumerate(trims):
+                chains.append(f"[vin{i}]{video_trim}[vpart{i}]")
+                chains.append(f"[ain{i}]{audio_trim}[apart{i}]")
+            parts = "".join(f"[vpart{i}][apart{i}]" for i in range(n))
+            chains.append(f"{parts}concat=n={n}:v=1:a=1[vjoined][acut]")
+            chains.append(f"[vjoined]fps={self.cut_frame_rate}[vcut]" if self.cut_frame_rate else "[vjoined]null[vcut]")
+            video, audio = "[vcut]", "[acut]"
+        if self.subtitle_path:
+            chains.append(f"{video}ass={escape_filter_path(self.subtitle_path)}[vsub]")
+            video = "[vsub]"
+        elif self.sprite_track:
+            _, x, y = self.sprite_track
+            chains.append(f"[{index['sprites']}:v]format=rgba[sprites]")
+            chains.append(f"{video}[sprites]overlay=x={x}:y={y}:eof_action=pass[vsub]")
+            video = "[vsub]"
+
+        if self.music_path:
+            m = index["music"]
+            chains.append(f"[{m}:a]volume={self.music_volume}[music]")
+            if self.ducking:
+                chains.append(f"{audio}asplit[original][sidechain]")
+                chains.append("[music][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music]")
+                chains.append("[original][ducked_music]amix=inputs=2:duration=first[amixed]")
+            else:
+                chains.append(f"{audio}[music]amix=inputs=2:duration=first:dropout_transition=2[amixed]")
+            audio = "[amixed]"
+
+        if self.extra_video:
+            e = index["extra"]
+            w, h = self.target_size
+            norm_v = f"fps={self.fps},format=yuv420p,setsar=1"
+            norm_a = f"aformat=sample_fmts=fltp:sample_rates={self.sample_rate}:channel_layouts=stereo"
+            chains.append(f"{video}scale={w}:{h},{norm_v}[vmain]")
+            chains.append(f"[{e}:v]scale={w}:{h}:force_original_aspect_ratio=decrease,"
+                          f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,{norm_v}[vextra]")
+            chains.append(f"{audio}{norm_a}[amain]")
+            chains.append(f"[{e}:a]{norm_a}[aextra]")
+            chains.append("[vmain][amain][vextra][aextra]concat=n=2:v=1:a=1[vout][aout]")
+            return ";".join(chains), "[vout]", "[aout]"
+
+        # Nothing consumed the raw streams: map them directly.
+        return ";".join(chains), video if video != "[0:v]" else "0:v", audio if audio != "[0:a]" else "0:a"
+
+    def build(self, output_path, video_args, audio_args=("-c:a", "aac", "-b:a", "192k"), loglevel="error"):
+        """Returns the full ffmpeg command. video_args is the encoder part, e.g. ["-c:v", "libx264", ...]."""
+        inputs, _ = self._inputs()
+        graph, video_map, audio_map = self.filter_complex()
+        cmd = ["ffmpeg", "-y", "-loglevel", loglevel] + inputs
+        if graph:
+            cmd += ["-filter_complex", graph]
+        cmd += ["-map", video_map, "-map", audio_map]
+        if self.output_profile is not None:
+            cmd += self.output_profile.video_args() + self.output_profile.audio_args()
+            cmd += ["-movflags", "+faststart", str(output_path)]
+            return cmd
+        # Untouched streams can be stream-copied; anything filtered has to be encoded.
+        if video_map == "0:v":
+            cmd += ["-c:v", "copy"]
+        else:
+            cmd += list(video_args)
+        if audio_map == "0:a":
+            cmd += ["-c:a", "copy"]
+        else:
+            cmd += list(audio_args)
+        cmd += ["-movflags", "+faststart", str(output_path)]
+        return cmd
@@ -0,0 +1,155 @@
+"""
+Runs ffmpeg with machine-readable progress.
+
+`-progress pipe:1` makes ffmpeg print key=value blocks (out_time_us, fps,
+speed, frame, ...) on stdout about twice a second. run_ffmpeg parses those
+blocks into FfmpegProgress objects for a callback, keeps only the tail of
+stderr for error messages, and kills the process as soon as a stop event is
+set instead of waiting for the next poll tick.
+"""
+import subprocess
+import os
+import threading
+import time
+from collections import deque
+
+
+class FfmpegProgress:
+    def __init__(self, values, duration=None):
+        self.values = values
+        self.duration = duration
+
+    @property
+    def out_time(self):
+        """Seconds of output written so far."""
+        for key in ("out_time_us", "out_time_ms"):
+            value = self.values.get(key)
+            if value and value != "N/A":
+                try:
+                    # Both keys are in microseconds (out_time_ms is misnamed in ffmpeg).
+                    return max(0.0, int(value) / 1_000_000)
+                except ValueError:
+                    pass
+        return 0.0
+
+    @property
+    def fraction(self):
+        if self.finished:
+            return 1.0
+        if not self.duration:
+            return None
+        return min(1.0, self.out_time / self.duration)
+
+    @property
+    def fps(self):
+        try:
+            return float(self.values.get("fps", 0))
+        except ValueError:
+            return 0.0
+
+    @property
+    def frame(self):
+        try:
+            return int(self.values.get("frame", 0))
+        except ValueError:
+            return 0
+
+    @property
+    def speed(self):
+        """Encode speed as a multiple of real time (ffmpeg reports e.g. '2.35x')."""
+        value = self.values.get("speed", "").strip().rstrip("x")
+        try:
+            return float(value)
+        except ValueError:
+            return 0.0
+
+    @property
+    def finished(self):
+        return self.values.get("progress") == "end"
+
+    def describe(self):
+        parts = []
+        if self.fraction is not None:
+            parts.append(f"{self.fraction * 100:.0f}%")
+        if self.speed:
+            parts.append(f"{self.speed:.2f}x")
+        if self.fps:
+            parts.append(f"{self.fps:.0f} fps")
+        return " · ".join(parts)
+
+
+def with_progress_args(cmd):
+    """Inserts -progress pipe:1 -nostats right after the ffmpeg binary."""
+    cmd = list(cmd)
+    if "-progress" in cmd:
+        return cmd
+    return cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+
+
+def run_ffmpeg(cmd, duration=None, on_progress=None, stop_event=None, timeout=None):
+    """
+    Runs an ffmpeg command and reports progress to on_progress(FfmpegProgress).
+    Returns the finished Popen object, or None if stop_event was set.
+    Raises CalledProcessError (with the stderr tail) or TimeoutExpired.
+    """
+    cmd = with_progress_args(cmd)
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    )
+    stderr_tail = deque(maxlen=40)
+    state = {"cancelled": False, "timed_out": False}
+    done = threading.Event()
+
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.rstrip())
+
+    def watch():
+        start = time.time()
+        while not done.is_set():
+            if stop_event is not None and stop_event.is_set():
+                state["cancelled"] = True
+            elif timeout and time.time() - start > timeout:
+                state["timed_out"] = True
+            else:
+                done.wait(0.05)
+                continue
+            process.kill()
+            return
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    watch_thread = threading.Thread(target=watch, daemon=True)
+    stderr_thread.start()
+    watch_thread.start()
+
+    values = {}
+    try:
+        for line in process.stdout:
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+            values[key] = value
+            if key == "progress":
+                if on_progress is not None:
+                    on_progress(FfmpegProgress(dict(values), duration))
+                values = {}
+        process.wait()
+    finally:
+        done.set()
+        watch_thread.join()
+        stderr_thread.join(timeout=5)
+
+    if state["cancelled"]:
+        return None
+    if state["timed_out"]:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr="\n".join(stderr_tail))
+    return process
@@ -1,72 +1,45 @@
 import os
 import ffmpeg
-import wave
 import json
 import srt
 from vosk import Model, KaldiRecognizer
-from moviepy import VideoFileClip
+from audio_stream import AudioSource
+from subtitle_segments import segment_words
 from datetime import timedelta
 
 # Paths
 VIDEO_PATH = r"C:/Users/dhruv/Videos/video_selected/1.1_126.mp4"
-AUDIO_PATH = "temp_audio.wav"
 MODEL_PATH = r"C:/Users/dhruv/Downloads/vosk-model-small-hi-0.22"
 SRT_PATH = "subtitles.srt"
 
-# Extract audio from video and convert to WAV (16kHz, Mono)
-def extract_audio(video_path, audio_path):
-    video = VideoFileClip(video_path)
-    video.audio.write_audiofile(audio_path, codec='pcm_s16le', fps=16000, nbytes=2, ffmpeg_params=["-ac", "1"])
+# Decode the audio track straight into memory (16kHz, Mono), no temp WAV
+def extract_audio(video_path):
+    audio = AudioSource.decode(video_path)
     print("✅ Audio extracted successfully.")
+    return audio
 
 # Transcribe audio using Vosk
-def transcribe_audio(audio_path, model_path):
+def transcribe_audio(audio, model_path):
     model = Model(model_path)
-    
-    with wave.open(audio_path, "rb") as wf:
-        rec = KaldiRecognizer(model, wf.getframerate())
-        rec.SetWords(True)
+    rec = KaldiRecognizer(model, audio.sample_rate)
+    rec.SetWords(True)
 
-        while True:
-            data = wf.readframes(4000)
-            if not data:
-                break
-            rec.AcceptWaveform(data)
+    for data in audio.pcm16_chunks(4000):
+        rec.AcceptWaveform(data)
 
-        result = json.loads(rec.FinalResult())
-        return result.get("result", [])
+    result = json.loads(rec.FinalResult())
+    return result.get("result", [])
 
 # Convert Vosk output to SRT format
 def create_srt(transcriptions, srt_file):
     subtitles = []
-    sentence = []
-    start_time = None
 
-    for entry in transcriptions:
-        word = entry["word"]
-        start_seconds = entry["start"]
-        end_seconds = entry["end"]
-
-        if not start_time:
-            start_time = start_seconds  # Start of sentence
-
-        sentence.append(word)
-
-        # End sentence if duration > 2.5 seconds or if punctuation is detected
-        if end_seconds - start_time > 2.5 or word in ".?!।":
-            # Convert timestamps to timedelta
-            start_delta = timedelta(seconds=start_time)
-            end_delta = timedelta(seconds=end_seconds)
-            
-            # Create subtitle block
-            subtitles.append(srt.Subtitle(index=len(subtitles) + 1,
-                                          start=start_delta,
-                                          end=end_delta,
-                                          content=" ".join(sentence)))
-
-            # Reset sentence
-            sentence = []
-            start_time = None
+    # End a sentence at 2.5 seconds or at sentence punctuation
+    for line in segment_words(transcriptions, max_duration=2.5, break_on_punctuation=True):
+        subtitles.append(srt.Subtitle(index=len(subtitles) + 1,
+                                      start=timedelta(seconds=line["start"]),
+                                      end=timedelta(seconds=line["end"]),
+                                      content=line["text"]))
 
     # Write to SRT file
     with open(srt_file, "w", encoding="utf-8") as f:
@@ -76,8 +49,8 @@ def create_srt(transcriptions, srt_file):
 
 # Main function to generate Hindi subtitles
 def generate_hindi_subtitles():
-    extract_audio(VIDEO_PATH, AUDIO_PATH)
-    transcriptions = transcribe_audio(AUDIO_PATH, MODEL_PATH)
+    audio = extract_audio(VIDEO_PATH)
+    transcriptions = transcribe_audio(audio, MODEL_PATH)
     create_srt(transcriptions, SRT_PATH)
     print(f"✅ Subtitles saved to {SRT_PATH}")
 
@@ -0,0 +1,156 @@
+"""
+Persistent journal of batch jobs so an interrupted batch can be resumed.
+
+Every video gets a key built from a SHA-256 of its content, its output path
+and the processing options. Each stage that finishes records a checkpoint
+holding its artifact (the prepared video or timeline, the transcript,
+the final output) plus the fingerprint of the input it was built from.
+The audio is decoded into memory, not written to disk, so it is not
+journaled and is simply decoded again on resume. A later run of the
+same batch:
+
+  * skips videos whose recorded output is still on disk unchanged, and
+  * restores every stage whose checkpoint is still valid, re-running only
+    from the first stage whose artifact or input changed.
+
+Intermediate files live in a per-job work directory under the journal
+instead of a throwaway temp dir, and are removed once the video is done.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_JOURNAL_DIR = Path(os.environ.get(
+    "JOB_JOURNAL_DIR", Path.home() / ".cache" / "video_processor" / "jobs"
+))
+
+_local = threading.local()
+
+
+def fingerprint(path):
+    """Cheap identity of a file on disk; changes whenever it is rewritten."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class JobJournal:
+    def __init__(self, journal_dir=DEFAULT_JOURNAL_DIR):
+        self.journal_dir = Path(journal_dir)
+        self.db_path = self.journal_dir / "journal.sqlite"
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        conns = getattr(_local, "conns", None)
+        if conns is None:
+            conns = _local.conns = {}
+        conn = conns.get(self.db_path)
+        if conn is None:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " key TEXT PRIMARY KEY, input TEXT, output TEXT, status TEXT, updated REAL);"
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " key TEXT, stage TEXT, artifact TEXT, fingerprint TEXT, input_fingerprint TEXT,"
+                " completed REAL, PRIMARY KEY (key, stage));"
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                " path TEXT PRIMARY KEY, fingerprint TEXT, sha256 TEXT);"
+            )
+            conns[self.db_path] = conn
+        return conn
+
+    def file_hash(self, path):
+        """SHA-256 of a file's content, remembered per (path, size, mtime)."""
+        path = os.path.abspath(str(path))
+        current = fingerprint(path)
+        conn = self._connect()
+        row = conn.execute("SELECT fingerprint, sha256 FROM file_hashes WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == current:
+            return row[1]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO file_hashes (path, fingerprint, sha256) VALUES (?, ?, ?)",
+                         (path, current, digest.hexdigest()))
+        return digest.hexdigest()
+
+    def job_key(self, input_video, output_path, options):
+        ident = json.dumps({
+            "input": self.file_hash(input_video),
+            "output": os.path.abspath(str(output_path)),
+            "options": options
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+    def work_dir(self, key):
+        return self.journal_dir / "work" / key[:24]
+
+    def start(self, key, input_video, output_path):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (key, input, output, status, updated) VALUES (?, ?, ?, 'running', ?) "
+                "ON CONFLICT(key) DO UPDATE SET status = 'running', updated = excluded.updated",
+                (key, str(input_video), str(output_path), time.time())
+            )
+
+    def checkpoint(self, key, stage, artifact, input_fingerprint):
+        """Records that stage finished, producing artifact from an input with input_fingerprint."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(key, stage, artifact, fingerprint, input_fingerprint, completed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, str(artifact), fingerprint(artifact), input_fingerprint, time.time())
+            )
+
+    def restore(self, key, stage, input_fingerprint):
+        """Returns the artifact of a still-valid checkpoint for stage, or None."""
+        row = self._connect().execute(
+            "SELECT artifact, fingerprint, input_fingerprint FROM checkpoints WHERE key = ? AND stage = ?",
+            (key, stage)
+        ).fetchone()
+        if not row or row[2] != input_fingerprint:
+            return None
+        artifact, recorded, _ = row
+        try:
+            if fingerprint(artifact) != recorded:
+                return None
+        except OSError:
+            return None
+        return artifact
+
+    def set_status(self, key, status):
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE jobs SET status = ?, updated = ? WHERE key = ?", (status, time.time(), key))
+
+    def finish(self, key):
+        """Marks the job done and drops its intermediate files; the output checkpoint is kept."""
+        self.set_status(key, "done")
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM checkpoints WHERE key = ? AND stage != 'render'", (key,))
+        shutil.rmtree(self.work_dir(key), ignore_errors=True)
+
+    def is_finished(self, key):
+        row = self._connect().execute("SELECT status FROM jobs WHERE key = ?", (key,)).fetchone()
+        if not row or row[0] != "done":
+            return False
+        row = self._connect().execute(
+            "SELECT artifact, fingerprint FROM checkpoints WHERE key = ? AND stage = 'render'", (key,)
+        ).fetchone()
+        try:
+            return bool(row) and fingerprint(row[0]) == row[1]
+        except OSError:
+            logging.info(f"ℹ️ Output of a finished job is missing, it will be rendered again: {row[0]}")
+            return False
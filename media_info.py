@@ -0,0 +1,260 @@
+"""
+Shared ffprobe metadata with a persistent SQLite cache.
+
+Each file is probed once with `ffprobe -show_streams -show_format -of json`
+and the JSON is stored keyed by (absolute path, size, mtime), so batch runs
+over hundreds of clips, and every later run, never probe the same
+unchanged file again. Use the typed accessors instead of spawning ffprobe:
+
+    from media_info import get_duration, probe
+    duration = get_duration("clip.mp4")
+    info = probe("clip.mp4"); info.width, info.fps, info.has_audio
+"""
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+from pathlib import Path
+
+FFPROBE_PATH = os.environ.get("FFPROBE_PATH", "ffprobe")
+DEFAULT_DB_PATH = Path(os.environ.get(
+    "MEDIA_INFO_CACHE", Path.home() / ".cache" / "video_processor" / "media_info.sqlite"
+))
+
+_local = threading.local()
+# Bumped when the probe arguments change, so older cached results are probed again.
+PROBE_VERSION = 2
+
+
+def _parse_rate(rate):
+    """Parses ffprobe rational strings such as '30000/1001'."""
+    try:
+        num, _, den = str(rate).partition("/")
+        den = float(den) if den else 1.0
+        return float(num) / den if den else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class MediaInfo:
+    """Typed view over one ffprobe JSON result."""
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self.format = data.get("format", {})
+        self.streams = data.get("streams", [])
+
+    def _first(self, codec_type):
+        for stream in self.streams:
+            if stream.get("codec_type") == codec_type:
+                return stream
+        return None
+
+    @property
+    def video_stream(self):
+        return self._first("video")
+
+    @property
+    def audio_stream(self):
+        return self._first("audio")
+
+    @property
+    def has_video(self):
+        return self.video_stream is not None
+
+    @property
+    def has_audio(self):
+        return self.audio_stream is not None
+
+    @property
+    def duration(self):
+        value = self.format.get("duration")
+        if value is None and self.video_stream:
+            value = self.video_stream.get("duration")
+        return float(value) if value not in (None, "N/A") else 0.0
+
+    @property
+    def size(self):
+        return int(self.format.get("size", 0))
+
+    @property
+    def bit_rate(self):
+        return int(self.format.get("bit_rate", 0) or 0)
+
+    @property
+    def video_codec(self):
+        return (self.video_stream or {}).get("codec_name")
+
+    @property
+    def audio_codec(self):
+        return (self.audio_stream or {}).get("codec_name")
+
+    @property
+    def width(self):
+        return int((self.video_stream or {}).get("width", 0))
+
+    @property
+    def height(self):
+        return int((self.video_stream or {}).get("height", 0))
+
+    @property
+    def resolution(self):
+        return self.width, self.height
+
+    @property
+    def fps(self):
+        stream = self.video_stream or {}
+        return _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+
+    @property
+    def pix_fmt(self):
+        return (self.video_stream or {}).get("pix_fmt")
+
+    @property
+    def time_base(self):
+        return (self.video_stream or {}).get("time_base")
+
+    @property
+    def sample_rate(self):
+        return int((self.audio_stream or {}).get("sample_rate", 0))
+
+    @property
+    def channels(self):
+        return int((self.audio_stream or {}).get("channels", 0))
+
+    @property
+    def channel_layout(self):
+        return (self.audio_stream or {}).get("channel_layout")
+
+    @property
+    def video_profile(self):
+        return (self.video_stream or {}).get("profile")
+
+    @property
+    def video_level(self):
+        return (self.video_stream or {}).get("level")
+
+    @property
+    def video_extradata_hash(self):
+        """Hash of the codec extradata (H.264/HEVC SPS/PPS), from -show_data_hash."""
+        return (self.video_stream or {}).get("extradata_hash")
+
+    @property
+    def audio_profile(self):
+        return (self.audio_stream or {}).get("profile")
+
+    @property
+    def audio_extradata_hash(self):
+        return (self.audio_stream or {}).get("extradata_hash")
+
+
+def concat_signature(info):
+    """
+    The stream parameters that must match for a `-c copy` concat to play
+    back cleanly. A stream-copied H.264/HEVC concat keeps the first clip's
+    SPS/PPS, so the profile, level and codec extradata must match as well.
+    """
+    return {
+        "video_codec": info.video_codec,
+        "video_profile": info.video_profile,
+        "video_level": info.video_level,
+        "video_extradata": info.video_extradata_hash,
+        "width": info.width,
+        "height": info.height,
+        "pix_fmt": info.pix_fmt,
+        "fps": round(info.fps, 2),
+        "time_base": info.time_base,
+        "audio_codec": info.audio_codec,
+        "audio_profile": info.audio_profile,
+        "audio_extradata": info.audio_extradata_hash,
+        "sample_rate": info.sample_rate,
+        "channels": info.channels,
+        "channel_layout": info.channel_layout,
+    }
+
+
+def concat_mismatches(first, second):
+    """Returns the names of the parameters that differ between two MediaInfo objects."""
+    a, b = concat_signature(first), concat_signature(second)
+    return [key for key in a if a[key] != b[key]]
+
+
+def is_concat_compatible(first, second):
+    if not (first.has_video and second.has_video):
+        return False
+    return not concat_mismatches(first, second)
+
+
+class MediaInfoCache:
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        conns = getattr(_local, "conns", None)
+        if conns is None:
+            conns = _local.conns = {}
+        conn = conns.get(self.db_path)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, data TEXT)"
+            )
+            conns[self.db_path] = conn
+        return conn
+
+    def probe(self, path):
+        path = os.path.abspath(str(path))
+        stat = os.stat(path)
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT size, mtime_ns, data FROM probes WHERE path = ?", (path,)).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                data = json.loads(row[2])
+                if data.get("probe_version") == PROBE_VERSION:
+                    return MediaInfo(path, data)
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Media info cache unavailable: {e}")
+            conn = None
+
+        result = subprocess.run(
+            [FFPROBE_PATH, "-v", "error", "-show_streams", "-show_format", "-show_data_hash", "sha256",
+             "-of", "json", path],
+            capture_output=True, text=True, check=True
+        )
+        data = json.loads(result.stdout)
+        data["probe_version"] = PROBE_VERSION
+        if conn is not None:
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO probes (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                        (path, stat.st_size, stat.st_mtime_ns, json.dumps(data))
+                    )
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ Could not store media info for {os.path.basename(path)}: {e}")
+        return MediaInfo(path, data)
+
+
+_default_cache = MediaInfoCache()
+
+
+def probe(path):
+    return _default_cache.probe(path)
+
+
+def get_duration(path):
+    return probe(path).duration
+
+
+def get_resolution(path):
+    return probe(path).resolution
+
+
+def has_audio_stream(path):
+    return probe(path).has_audio
@@ -3,13 +3,14 @@ import tkinter as tk
 from tkinter import filedialog, simpledialog
 from moviepy.video.io.VideoFileClip import VideoFileClip
 from moviepy.audio.io.AudioFileClip import AudioFileClip
+import encoder_registry
 
 def replace_audio(video_path, audio_path, output_path):
     try:
         video = VideoFileClip(video_path)
         new_audio = AudioFileClip(audio_path)
         video = video.with_audio(new_audio)
-        video.write_videofile(output_path, codec="h264_nvenc", audio_codec="aac", fps=30)
+        video.write_videofile(output_path, codec=encoder_registry.choose().name, audio_codec="aac", fps=30)
         print(f"Processed: {os.path.basename(video_path)} -> {os.path.basename(audio_path)}")
     except Exception as e:
         print(f"Error processing {video_path}: {e}")
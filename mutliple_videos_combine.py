@@ -2,6 +2,7 @@ import os
 import re
 from tkinter import Tk, filedialog
 from moviepy import VideoFileClip, concatenate_videoclips
+import encoder_registry
 
 def extract_floating_number(filename):
     """Extract floating number from filename"""
@@ -33,7 +34,7 @@ def merge_videos(video_files):
     clips = [VideoFileClip(vid).resized(width=1920, height=1080) for vid in video_files]  # Corrected resizing
     final_video = concatenate_videoclips(clips, method="compose")
 
-    final_video.write_videofile(output_filename, codec="h264_nvenc", fps=30)
+    final_video.write_videofile(output_filename, codec=encoder_registry.choose().name, fps=30)
     print(f"Videos merged successfully into {output_filename}")
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+
+# Sentinel pushed through the queues to tell a stage worker to exit.
+_DONE = object()
+
+
+class Stage:
+    """One step of a pipeline: a callable plus the number of worker threads running it."""
+    def __init__(self, name, func, workers=1):
+        if workers < 1:
+            raise ValueError(f"Stage '{name}' needs at least one worker, got {workers}")
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+
+class StagedPipeline:
+    """
+    Runs items through a list of stages connected by bounded queues.
+
+    Every stage has its own pool of worker threads, so item N+1 can sit in
+    an early stage (e.g. transcription) while item N is in a later one
+    (e.g. the ffmpeg encode). A stage function receives the item and returns
+    the item to hand to the next stage. Returning None stops the item there
+    and reports it to on_item_failed with no exception (a stop request or a
+    skipped item); raising reports it with the exception. The bounded
+    queues keep a fast stage from running far ahead of a slow one and
+    piling up temp files.
+    """
+    def __init__(self, stages, queue_size=2, stop_event=None, on_item_done=None, on_item_failed=None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.stop_event = stop_event or threading.Event()
+        self.on_item_done = on_item_done
+        self.on_item_failed = on_item_failed
+        self.stage_times = {stage.name: 0.0 for stage in stages}
+        self._lock = threading.Lock()
+
+    def _stopped(self):
+        return self.stop_event.is_set()
+
+    def _put(self, q, item):
+        # Poll so a stop request is noticed even while the downstream queue is full.
+        while True:
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                if self._stopped() and item is not _DONE:
+                    return False
+
+    def _fail(self, item, stage_name, exc):
+        if self.on_item_failed:
+            try:
+                self.on_item_failed(item, stage_name, exc)
+            except Exception as callback_error:
+                logging.warning(f"⚠️ Failure callback raised for stage '{stage_name}': {callback_error}")
+
+    def _done(self, item, stage_name):
+        if self.on_item_done:
+            try:
+                self.on_item_done(item)
+            except Exception as callback_error:
+                logging.warning(f"⚠️ Completion callback raised after stage '{stage_name}': {callback_error}")
+
+    def _worker(self, index, in_q, out_q, remaining):
+        stage = self.stages[index]
+        is_last = index == len(self.stages) - 1
+        try:
+            while True:
+                item = in_q.get()
+                if item is _DONE:
+                    break
+                if self._stopped():
+                    self._fail(item, stage.name, None)
+                    continue
+                start = time.time()
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    logging.error(f"❌ Stage '{stage.name}' failed: {e}", exc_info=True)
+                    self._fail(item, stage.name, e)
+                    continue
+                finally:
+                    with self._lock:
+                        self.stage_times[stage.name] += time.time() - start
+                if result is None:
+                    self._fail(item, stage.name, None)
+                    continue
+                if is_last:
+                    self._done(result, stage.name)
+                elif not self._put(out_q, result):
+                    self._fail(result, stage.name, None)
+        finally:
+            # The last worker of a stage to exit closes the next stage's queue.
+            with self._lock:
+                remaining[index] -= 1
+                last_out = remaining[index] == 0
+            if last_out and out_q is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    self._put(out_q, _DONE)
+
+    def run(self, items):
+        """Feeds items into the first stage and blocks until every stage has drained."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        threads = []
+        for index, stage in enumerate(self.stages):
+            out_q = queues[index + 1] if index + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=self._worker, args=(index, queues[index], out_q, remaining),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True
+                )
+                t.start()
+                threads.append(t)
+
+        for item in items:
+            if self._stopped():
+                self._fail(item, "queued", None)
+                continue
+            if not self._put(queues[0], item):
+                self._fail(item, "queued", None)
+        for _ in range(self.stages[0].workers):
+            self._put(queues[0], _DONE)
+
+        for t in threads:
+            t.join()
+        return self.stage_times
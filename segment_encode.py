@@ -0,0 +1,338 @@
+"""
+Split-encode-concat for single long videos.
+
+One ffmpeg process encoding a 60-minute lecture stops getting faster past
+8 or so x264 threads, however many cores the machine has. SegmentedEncoder
+cuts the source at keyframes instead, encodes the pieces side by side with
+the same filter and encoder options, encodes the audio once alongside them,
+and joins everything with a stream-copy concat.
+
+The output has the same frames as the single-process encode:
+- Each segment starts with an input seek to a keyframe's exact timestamp.
+  Nothing before it is decoded into the output, and nothing is skipped.
+- Each segment stops after -frames:v N, where N is the number of source
+  frames up to the next cut, counted from the packet list ffprobe reports.
+- Subtitles are burned with the video's timestamps shifted back to source
+  time, so every caption lands on the same frame as before.
+- The concat list gives each segment its source duration, so timestamps
+  carry on where the previous segment ended.
+
+Only the encoder's own decisions at segment starts differ. Each segment
+opens with an IDR frame, which costs a few extra bits per cut.
+
+Filters must map one input frame to one output frame (scale, pad, crop,
+overlay, blur, ass); frame-rate or time-selecting filters cannot be split.
+
+    encode_segmented(src, dst, video_args, video_filter="scale=1080:-1,pad=1080:1920:(ow-iw)/2:(oh-ih)/2")
+
+Compare against one process (wall time, and that frame counts match):
+
+    python segment_encode.py lecture.mp4 --vf "scale=1080:-1,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
+"""
+import argparse
+import bisect
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import encode_scheduler
+import media_info
+from ffmpeg_graph import escape_filter_path
+from ffmpeg_runner import FfmpegProgress, run_ffmpeg
+
+# Below this a video is encoded in one process: the extra seeks and the
+# concat cost more than the parallelism gains.
+MIN_DURATION = float(os.environ.get("SEGMENT_ENCODE_MIN_DURATION", 600))
+MIN_SEGMENT_SECONDS = 60
+# Audio codecs the MP4 muxer takes as they are; anything else (PCM, Vorbis...) is re-encoded.
+MP4_AUDIO_CODECS = ("aac", "mp3", "ac3", "eac3", "alac")
+
+
+def video_packets(path):
+    """(presentation times, keyframe flags) of the first video stream, sorted by time; discarded packets are left out."""
+    result = subprocess.run(
+        [media_info.FFPROBE_PATH, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path)],
+        capture_output=True, text=True, check=True
+    )
+    packets = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.strip().partition(",")
+        if not pts or pts == "N/A" or "D" in flags:
+            continue
+        packets.append((float(pts), "K" in flags))
+    packets.sort()
+    return [p for p, _ in packets], [k for _, k in packets]
+
+
+class Segment:
+    def __init__(self, index, start, end, frames):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.frames = frames
+
+    def __repr__(self):
+        return f"Segment({self.index}, {self.start:.3f}-{self.end:.3f}, {self.frames} frames)"
+
+
+def plan_segments(times, keyframes, count, stop=None):
+    """
+    Up to count segments cut at the keyframes nearest to equal shares of
+    the timeline. Times are source timestamps; frames at or after stop are
+    left out, like an output -t.
+    """
+    if stop is not None:
+        times = times[:bisect.bisect_left(times, stop)]
+        keyframes = keyframes[:len(times)]
+    if not times:
+        return []
+    end = stop if stop is not None else times[-1] + (times[-1] - times[-2] if len(times) > 1 else 0.0)
+    key_times = [t for t, key in zip(times, keyframes) if key]
+    cuts = [times[0]]
+    for i in range(1, max(1, count)):
+        target = times[0] + (end - times[0]) * i / count
+        j = bisect.bisect_left(key_times, target)
+        candidates = [key_times[k] for k in (j - 1, j) if 0 <= k < len(key_times)]
+        if candidates:
+            cut = min(candidates, key=lambda t: abs(t - target))
+            if cut - cuts[-1] >= MIN_SEGMENT_SECONDS / 2 and end - cut >= MIN_SEGMENT_SECONDS / 2:
+                cuts.append(cut)
+    cuts = sorted(set(cuts))
+    segments = []
+    for i, start in enumerate(cuts):
+        seg_end = cuts[i + 1] if i + 1 < len(cuts) else end
+        first = bisect.bisect_left(times, start)
+        last = bisect.bisect_left(times, seg_end) if i + 1 < len(cuts) else len(times)
+        segments.append(Segment(i, start, seg_end, last - first))
+    return segments
+
+
+def worth_splitting(duration, encoder_name="libx264"):
+    """Segmenting pays off for long software encodes; GPU encoders are not thread-bound."""
+    return (encoder_name in ("libx264", "libx265", "libsvtav1") and duration >= MIN_DURATION
+            and (os.cpu_count() or 1) >= 4)
+
+
+def copy_audio_args(info):
+    """Stream-copies the audio when an MP4 output can hold it, otherwise encodes AAC."""
+    if info.audio_codec in MP4_AUDIO_CODECS:
+        return ("-c:a", "copy")
+    return ("-c:a", "aac", "-b:a", "192k")
+
+
+class SegmentedEncoder:
+    """
+    Encodes source in keyframe-aligned segments in parallel. video_filter is
+    a -vf style chain (it may contain ';' and labels, like a -filter_complex
+    with one input and output); ass_path or sprite_track (concat path, x, y
+    from sprite_subtitles) burn subtitles after it. cores limits the share
+    of the machine to plan with when other encodes run at the same time.
+    """
+    def __init__(self, source, video_args, video_filter=None, ass_path=None, sprite_track=None,
+                 audio_args=("-c:a", "aac", "-b:a", "128k"), limit=None, size=None, jobs=None, cores=None):
+        self.source = str(source)
+        self.video_args = list(video_args)
+        self.video_filter = video_filter
+        self.ass_path = str(ass_path) if ass_path else None
+        self.sprite_track = sprite_track
+        self.audio_args = list(audio_args)
+        self.limit = limit
+        self.info = media_info.probe(source)
+        width, height = size or self.info.resolution
+        self.plan = encode_scheduler.plan(max(1, int(self.duration // MIN_SEGMENT_SECONDS)), width, height, cores)
+        if jobs:
+            self.plan = encode_scheduler.EncodePlan(jobs, encode_scheduler.threads_per_job(jobs, width, height, cores),
+                                                    self.plan.cores)
+        self.start_time = float(self.info.format.get("start_time", 0) or 0)
+
+    @property
+    def duration(self):
+        return min(self.info.duration, self.limit) if self.limit else self.info.duration
+
+    def segments(self):
+        times, keyframes = video_packets(self.source)
+        stop = self.start_time + self.limit if self.limit else None
+        return plan_segments(times, keyframes, self.plan.jobs, stop)
+
+    def _graph(self, offset, sprite_input):
+        chains = []
+        video = "[0:v]"
+        if self.video_filter:
+            chains.append(f"{video}{self.video_filter}[vf]")
+            video = "[vf]"
+        # The segment's frames start at 0; shift them to source time for the subtitle filters.
+        if self.ass_path:
+            chains.append(f"{video}setpts=PTS+{offset:.6f}/TB,ass={escape_filter_path(self.ass_path)},"
+                          f"setpts=PTS-{offset:.6f}/TB[vsub]")
+            video = "[vsub]"
+        elif self.sprite_track:
+            _, x, y = self.sprite_track
+            chains.append(f"[{sprite_input}:v]format=rgba[sprites]")
+            chains.append(f"{video}[sprites]overlay=x={x}:y={y}:eof_action=pass[vsub]")
+            video = "[vsub]"
+        if video == "[0:v]":
+            return None, "0:v"
+        return ";".join(chains), video
+
+    def segment_command(self, segment, path):
+        # Seek a hair before the keyframe so a rounded timestamp never lands just past it;
+        # the accurate seek drops nothing, as the previous frame is a whole frame earlier.
+        offset = max(0.0, segment.start - self.start_time - 0.0005)
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", *self.plan.input_args(), "-ss", f"{offset:.6f}", "-i", self.source]
+        if self.sprite_track:
+            cmd += ["-ss", f"{offset:.6f}", "-f", "concat", "-safe", "0", "-i", str(self.sprite_track[0])]
+        graph, video_map = self._graph(offset, 1)
+        if graph:
+            cmd += ["-filter_complex", graph]
+        cmd += ["-map", video_map, "-an", "-frames:v", str(segment.frames)]
+        cmd += self.video_args + self.plan.output_args(self._encoder_name()) + [str(path)]
+        return cmd
+
+    def _encoder_name(self):
+        if "-c:v" in self.video_args:
+            return self.video_args[self.video_args.index("-c:v") + 1]
+        return None
+
+    def audio_command(self, path):
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", self.source, "-map", "0:a:0", "-vn"]
+        if self.limit:
+            cmd += ["-t", str(self.limit)]
+        return cmd + self.audio_args + [str(path)]
+
+    def encode(self, output_path, stop_event=None, on_progress=None, work_dir=None):
+        """
+        Writes output_path. Returns output_path, or None if stop_event was set.
+        on_progress gets an ffmpeg_runner.FfmpegProgress for the whole video.
+        Raises CalledProcessError if any part fails.
+        """
+        segments = self.segments()
+        if not segments:
+            raise ValueError(f"No video frames found in {self.source}")
+        own_dir = work_dir is None
+        work_dir = Path(work_dir or tempfile.mkdtemp(prefix="segments_"))
+        work_dir.mkdir(parents=True, exist_ok=True)
+        logging.info(f"✂️ Encoding {os.path.basename(self.source)} as {len(segments)} segments "
+                     f"({self.plan.jobs} at a time, {self.plan.threads} threads each)")
+        done = {}
+        lock = threading.Lock()
+        total = self.duration
+
+        def report(segment_index, progress):
+            if on_progress is None:
+                return
+            with lock:
+                done[segment_index] = progress.out_time
+                out_time = sum(done.values())
+            on_progress(FfmpegProgress({"out_time_us": str(int(out_time * 1_000_000)), "progress": "continue",
+                                        "speed": progress.values.get("speed", "")}, total))
+
+        def run_segment(segment):
+            path = work_dir / f"segment_{segment.index:04d}.mp4"
+            process = run_ffmpeg(self.segment_command(segment, path), duration=segment.end - segment.start,
+                                 on_progress=lambda p: report(segment.index, p), stop_event=stop_event)
+            return path if process is not None else None
+
+        # Matroska holds any codec audio_args may copy into it.
+        audio_path = work_dir / "audio.mka" if self.info.has_audio else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.plan.jobs + (1 if audio_path else 0)) as executor:
+                audio_future = executor.submit(run_ffmpeg, self.audio_command(audio_path),
+                                               stop_event=stop_event) if audio_path else None
+                paths = list(executor.map(run_segment, segments))
+                if audio_future is not None and audio_future.result() is None:
+                    return None
+            if any(path is None for path in paths):
+                return None
+
+            concat_path = work_dir / "segments.ffconcat"
+            with open(concat_path, "w", encoding="utf-8") as f:
+                f.write("ffconcat version 1.0\n")
+                for segment, path in zip(segments, paths):
+                    f.write(f"file '{path.resolve().as_posix()}'\nduration {segment.end - segment.start:.6f}\n")
+            cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(concat_path)]
+            if audio_path:
+                cmd += ["-i", str(audio_path), "-map", "0:v", "-map", "1:a", "-c", "copy"]
+            else:
+                cmd += ["-map", "0:v", "-c", "copy"]
+            cmd += ["-movflags", "+faststart", str(output_path)]
+            if run_ffmpeg(cmd, stop_event=stop_event) is None:
+                return None
+        finally:
+            if own_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        logging.info(f"✅ Joined {len(segments)} segments into {os.path.basename(str(output_path))}")
+        return output_path
+
+
+def encode_segmented(source, output_path, video_args, **options):
+    """
+    For scripts that check subprocess.run results: runs a SegmentedEncoder
+    and returns a CompletedProcess with the error (if any) in stderr.
+    """
+    try:
+        SegmentedEncoder(source, video_args, **options).encode(output_path)
+        return subprocess.CompletedProcess([source], 0, "", "")
+    except subprocess.CalledProcessError as e:
+        return subprocess.CompletedProcess(e.cmd, e.returncode, "", e.stderr or str(e))
+    except Exception as e:
+        return subprocess.CompletedProcess([source], 1, "", str(e))
+
+
+def count_frames(path):
+    result = subprocess.run(
+        [media_info.FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-count_packets",
+         "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", str(path)],
+        capture_output=True, text=True, check=True
+    )
+    return int(result.stdout.strip().split(",")[0])
+
+
+def main():
+    import encoder_registry
+    parser = argparse.ArgumentParser(description="Compare one-process and segment-parallel encodes of one video")
+    parser.add_argument("video")
+    parser.add_argument("--vf", help="Video filter chain applied in both encodes")
+    parser.add_argument("--ass", help="ASS subtitles to burn in")
+    parser.add_argument("--preset", default="fast")
+    parser.add_argument("--crf", type=int, default=23)
+    parser.add_argument("--jobs", type=int, help="Segments encoded at once (default: from encode_scheduler)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    video_args = encoder_registry.choose(allow_hardware=False).args(args.crf, args.preset)
+    work_dir = Path(tempfile.mkdtemp(prefix="segment_bench_"))
+    try:
+        single = work_dir / "single.mp4"
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", args.video]
+        chain = ",".join(f for f in (args.vf, f"ass={escape_filter_path(args.ass)}" if args.ass else None) if f)
+        if chain:
+            cmd += ["-vf", chain]
+        cmd += video_args + ["-c:a", "aac", "-b:a", "128k", str(single)]
+        started = time.time()
+        run_ffmpeg(cmd)
+        single_time = time.time() - started
+
+        split = work_dir / "segmented.mp4"
+        encoder = SegmentedEncoder(args.video, video_args, video_filter=args.vf, ass_path=args.ass, jobs=args.jobs)
+        started = time.time()
+        encoder.encode(split)
+        split_time = time.time() - started
+
+        frames = count_frames(single), count_frames(split)
+        durations = media_info.probe(single).duration, media_info.probe(split).duration
+        print(f"one process   {single_time:7.1f}s  {frames[0]} frames  {durations[0]:.3f}s")
+        print(f"{encoder.plan.jobs} segments  {split_time:7.1f}s  {frames[1]} frames  {durations[1]:.3f}s")
+        print(f"speedup {single_time / split_time:.2f}x, frames {'match' if frames[0] == frames[1] else 'DIFFER'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
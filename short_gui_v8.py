@@ -8,11 +8,13 @@ from pathlib import Path
 import logging
 from tkinter import ttk, filedialog, messagebox, colorchooser
 import tkinter as tk
-from faster_whisper import WhisperModel
 import time
 import tempfile
 import traceback
 import random
+from video_processor import DEFAULT_STAGE_WORKERS, OptimizedVideoProcessor
+from job_journal import JobJournal
+from ass_writer import karaoke_base_color
 
 # --- Custom Logging Handler ---
 
@@ -243,6 +245,20 @@ class VideoProcessorGUI:
         self.speech_borders_var = tk.BooleanVar(value=True)
         tk.Checkbutton(options_row2, text="🗣️ Add Border Boxes to Spoken Words",
                       variable=self.speech_borders_var, bg='#f0f0f0', font=("Arial", 10, "bold")).pack(anchor='w', pady=2)
+        options_row3 = tk.Frame(options_frame, bg='#f0f0f0')
+        options_row3.pack(fill='x', padx=10, pady=8)
+        tk.Label(options_row3, text="Pipeline Workers:", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(side='left')
+        tk.Label(options_row3, text="Transcribe", font=("Arial", 9), bg='#f0f0f0').pack(side='left', padx=(15, 5))
+        self.transcribe_workers_var = tk.IntVar(value=DEFAULT_STAGE_WORKERS['transcribe'])
+        tk.Spinbox(options_row3, from_=1, to=8, textvariable=self.transcribe_workers_var, width=4).pack(side='left')
+        tk.Label(options_row3, text="Encode", font=("Arial", 9), bg='#f0f0f0').pack(side='left', padx=(15, 5))
+        self.render_workers_var = tk.IntVar(value=DEFAULT_STAGE_WORKERS['render'])
+        tk.Spinbox(options_row3, from_=1, to=8, textvariable=self.render_workers_var, width=4).pack(side='left')
+        self.resume_var = tk.BooleanVar(value=True)
+        resume_cb = tk.Checkbutton(options_row3, text="⏩ Resume Interrupted Batches", variable=self.resume_var,
+                                   bg='#f0f0f0', font=("Arial", 10))
+        resume_cb.pack(side='left', padx=(25, 0))
+        self.create_tooltip(resume_cb, "Skip videos already processed with the same settings and continue\npartly processed ones from their last finished stage")
 
         subtitle_frame = tk.LabelFrame(self.scrollable_main_frame, text="📝 Advanced Subtitle Customization",
                                       font=("Arial", 12, "bold"), bg='#f0f0f0', padx=15, pady=15)
@@ -259,6 +275,9 @@ class VideoProcessorGUI:
         tk.Radiobutton(mode_options_frame, text="📄 Multiple Words Subtitles", variable=self.subtitle_mode_var,
                       value="multiple", bg='#f0f0f0', font=("Arial", 10),
                       command=self.toggle_word_count).pack(anchor='w', pady=2)
+        tk.Radiobutton(mode_options_frame, text="🎤 Karaoke Highlight Subtitles", variable=self.subtitle_mode_var,
+                      value="karaoke", bg='#f0f0f0', font=("Arial", 10),
+                      command=self.toggle_word_count).pack(anchor='w', pady=2)
         self.words_count_frame = tk.Frame(subtitle_frame, bg='#f0f0f0')
         self.words_count_frame.pack(fill='x', padx=10, pady=8)
         words_count_inner = tk.Frame(self.words_count_frame, bg='#f0f0f0')
@@ -273,6 +292,21 @@ class VideoProcessorGUI:
                                          font=("Arial", 10, "bold"), bg='#f0f0f0', fg='#2c3e50')
         self.words_count_label.pack(side='left', padx=(5, 0))
         words_scale.configure(command=lambda val: self.words_count_label.config(text=f"{int(float(val))} words per group"))
+        self.karaoke_row = tk.Frame(self.words_count_frame, bg='#f0f0f0')
+        tk.Label(self.karaoke_row, text="Karaoke unsung color:",
+                font=("Arial", 10, "bold"), bg='#f0f0f0').pack(side='left')
+        # None follows the subtitle color (dimmed); a picked color is kept as is.
+        self.karaoke_base_color = None
+        self.karaoke_preview = tk.Label(self.karaoke_row, text="  ", relief='solid', borderwidth=1,
+                                        width=3, cursor='hand2')
+        self.karaoke_preview.pack(side='left', padx=(15, 5))
+        self.karaoke_preview.bind("<Button-1>", lambda e: self.pick_karaoke_color())
+        tk.Button(self.karaoke_row, text="🎨", command=self.pick_karaoke_color,
+                 bg='#f39c12', fg='white', font=("Arial", 9), relief='flat').pack(side='left')
+        tk.Button(self.karaoke_row, text="Auto", command=lambda: self.set_karaoke_color(None),
+                 bg='#95a5a6', fg='white', font=("Arial", 8), relief='flat').pack(side='left', padx=(4, 0))
+        self.karaoke_label = tk.Label(self.karaoke_row, font=("Arial", 9), bg='#f0f0f0', fg='#7f8c8d')
+        self.karaoke_label.pack(side='left', padx=(8, 0))
         border_frame = tk.LabelFrame(subtitle_frame, text="📦 Speech Border Box Settings", 
                                     font=("Arial", 11, "bold"), bg='#f0f0f0', padx=10, pady=10)
         border_frame.pack(fill='x', padx=10, pady=8)
@@ -367,6 +401,12 @@ class VideoProcessorGUI:
         position_combo = ttk.Combobox(position_row, textvariable=self.position_var,
                                       values=["Bottom", "Top", "Center"], state="readonly", width=12)
         position_combo.pack(side='left', padx=10)
+        tk.Label(position_row, text="Renderer:", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(side='left', padx=(20, 0))
+        self.renderer_var = tk.StringVar(value="libass")
+        renderer_combo = ttk.Combobox(position_row, textvariable=self.renderer_var,
+                                      values=["libass", "sprites"], state="readonly", width=10)
+        renderer_combo.pack(side='left', padx=10)
+        self.create_tooltip(renderer_combo, "sprites: draw each caption once and overlay it (faster CPU encodes)")
 
         self.toggle_word_count()
         button_frame = tk.Frame(self.scrollable_main_frame, bg='#f0f0f0')
@@ -396,6 +436,9 @@ class VideoProcessorGUI:
         self.status_label = tk.Label(progress_frame, text="Ready to process",
                                     bg='#f0f0f0', font=("Arial", 11, "bold"), fg='#2c3e50')
         self.status_label.pack(pady=8)
+        self.stage_label = tk.Label(progress_frame, text="", bg='#f0f0f0',
+                                    font=("Arial", 9), fg='#7f8c8d')
+        self.stage_label.pack(pady=(0, 4))
         log_frame = tk.Frame(progress_frame, bg='#f0f0f0')
         log_frame.pack(fill='both', expand=True, padx=5, pady=5)
         self.log_text = tk.Text(log_frame, height=10, bg='#2c3e50', fg='#ecf0f1',
@@ -490,10 +533,30 @@ class VideoProcessorGUI:
 
     def toggle_word_count(self):
         mode = self.subtitle_mode_var.get()
-        if mode == "multiple":
+        if mode in ("multiple", "karaoke"):
             self.words_count_frame.pack(fill='x', padx=10, pady=8)
         else:
             self.words_count_frame.pack_forget()
+        if mode == "karaoke":
+            self.update_karaoke_preview()
+            self.karaoke_row.pack(anchor='w', pady=(6, 0))
+        else:
+            self.karaoke_row.pack_forget()
+
+    def pick_karaoke_color(self):
+        color = colorchooser.askcolor(title="Choose Karaoke Unsung Color",
+                                     initialcolor=self.karaoke_base_color or karaoke_base_color(self.subtitle_color))
+        if color[1]:
+            self.set_karaoke_color(color[1])
+
+    def set_karaoke_color(self, color_hex):
+        self.karaoke_base_color = color_hex.upper() if color_hex else None
+        self.update_karaoke_preview()
+
+    def update_karaoke_preview(self):
+        color = self.karaoke_base_color or karaoke_base_color(self.subtitle_color)
+        self.karaoke_preview.config(bg=color)
+        self.karaoke_label.config(text=color if self.karaoke_base_color else f"Auto ({color})")
 
     def pick_subtitle_color(self):
         color = colorchooser.askcolor(title="Choose Subtitle Color",
@@ -512,6 +575,7 @@ class VideoProcessorGUI:
         self.subtitle_color = color_hex.upper()
         self.color_preview.config(bg=self.subtitle_color)
         self.hex_var.set(self.subtitle_color)
+        self.update_karaoke_preview()
 
     def on_hex_change(self, event):
         hex_value = self.hex_var.get().strip()
@@ -655,6 +719,7 @@ class VideoProcessorGUI:
         self.stop_btn.config(state='normal')
         self.progress_var.set(0)
         self.progress_percent_label.config(text="0%")
+        self.stage_label.config(text="")
         self.clear_logs()
         thread = threading.Thread(target=self.process_videos_thread, daemon=True)
         thread.start()
@@ -671,9 +736,11 @@ class VideoProcessorGUI:
 
     def process_videos_thread(self):
         try:
-            processor = OptimizedVideoProcessor(self.progress_queue, self.video_title_map, self.stop_event)
+            journal = JobJournal() if self.resume_var.get() else None
+            processor = OptimizedVideoProcessor(self.progress_queue, self.video_title_map, self.stop_event, journal=journal)
             subtitle_settings = {
                 'color': self.subtitle_color,
+                'karaoke_base_color': self.karaoke_base_color,
                 'mode': self.subtitle_mode_var.get(),
                 'size': self.subtitle_size_var.get(),
                 'words_count': self.words_count_var.get(),
@@ -683,13 +750,14 @@ class VideoProcessorGUI:
                 'font_family': self.font_family_var.get(),
                 'bold': self.bold_var.get(),
                 'italic': self.italic_var.get(),
-                'position': self.position_var.get()
+                'position': self.position_var.get(),
+                'renderer': self.renderer_var.get()
             }
             processor.process_all_videos(
                 self.input_videos, self.extra_video if self.enable_merge_var.get() else None, 
                 self.output_dir, self.background_music, self.quality_var.get(), self.gpu_var.get(), 
                 self.volume_var.get(), self.ducking_var.get(), self.auto_edit_var.get(), 
-                subtitle_settings
+                subtitle_settings, stage_workers=self.get_stage_workers()
             )
             if self.stop_event.is_set():
                 self.progress_queue.put(("STOPPED", "🛑 Processing stopped by user"))
@@ -704,6 +772,14 @@ class VideoProcessorGUI:
         finally:
             self.processing = False
 
+    def get_stage_workers(self):
+        return {
+            'prepare': DEFAULT_STAGE_WORKERS['prepare'],
+            'extract_audio': DEFAULT_STAGE_WORKERS['extract_audio'],
+            'transcribe': self.transcribe_workers_var.get(),
+            'render': self.render_workers_var.get()
+        }
+
     def check_progress(self):
         try:
             while True:
@@ -716,8 +792,11 @@ class VideoProcessorGUI:
                     self.log_message(message)
                 elif msg_type == "LOG":
                     self.log_message(message)
+                elif msg_type == "STAGE":
+                    self.stage_label.config(text=message)
                 elif msg_type in ("COMPLETE", "STOPPED", "ERROR"):
                     self.status_label.config(text=message)
+                    self.stage_label.config(text="")
                     if msg_type != "ERROR":
                        self.log_message(message)
                     self.process_btn.config(state='normal', text="🚀 START PROCESSING")
@@ -772,11 +851,17 @@ class VideoProcessorGUI:
             self.subtitle_color = config.get('subtitle_color', '#FFFFFF')
             self.color_preview.config(bg=self.subtitle_color)
             self.hex_var.set(self.subtitle_color)
+            self.karaoke_base_color = config.get('karaoke_base_color')
             self.enable_merge_var.set(config.get('enable_merge', False))
             self.font_family_var.set(config.get('font_family', 'Impact'))
             self.bold_var.set(config.get('bold', True))
             self.italic_var.set(config.get('italic', False))
             self.position_var.set(config.get('position', 'Bottom'))
+            self.renderer_var.set(config.get('subtitle_renderer', 'libass'))
+            stage_workers = config.get('stage_workers', {})
+            self.transcribe_workers_var.set(stage_workers.get('transcribe', DEFAULT_STAGE_WORKERS['transcribe']))
+            self.render_workers_var.set(stage_workers.get('render', DEFAULT_STAGE_WORKERS['render']))
+            self.resume_var.set(config.get('resume_batches', True))
             
             self.toggle_merge_options()
             self.toggle_word_count()
@@ -803,11 +888,15 @@ class VideoProcessorGUI:
             "border_color": self.border_color,
             "subtitle_size": self.subtitle_size_var.get(),
             "subtitle_color": self.subtitle_color,
+            "karaoke_base_color": self.karaoke_base_color,
             "enable_merge": self.enable_merge_var.get(),
             "font_family": self.font_family_var.get(),
             "bold": self.bold_var.get(),
             "italic": self.italic_var.get(),
-            "position": self.position_var.get()
+            "position": self.position_var.get(),
+            "subtitle_renderer": self.renderer_var.get(),
+            "stage_workers": self.get_stage_workers(),
+            "resume_batches": self.resume_var.get()
         }
         file = filedialog.asksaveasfilename(
             defaultextension=".json",
@@ -819,576 +908,6 @@ class VideoProcessorGUI:
                 json.dump(config, f, indent=4)
             messagebox.showinfo("Success", f"Config saved to: {file}")
 
-# --- Video Processing Class ---
-
-class OptimizedVideoProcessor:
-    def __init__(self, progress_queue, video_title_map, stop_event):
-        self.progress_queue = progress_queue
-        self.video_title_map = video_title_map
-        self.whisper_model = None
-        self.stop_event = stop_event
-
-    def update_progress(self, percentage):
-        try:
-            self.progress_queue.put(("PROGRESS", max(0, min(100, percentage))))
-        except Exception:
-            pass
-
-    def check_stop(self):
-        return self.stop_event.is_set()
-
-    def get_whisper_model(self):
-        if self.whisper_model is None:
-            logging.info("🧠 Loading Whisper model...", extra={'is_status': True})
-            try:
-                self.whisper_model = WhisperModel("large-v3", compute_type="int8")
-                logging.info("✅ Loaded large-v3 Whisper model")
-            except Exception as e:
-                logging.warning(f"⚠️ Could not load 'large-v3' model, trying 'small'. Reason: {e}")
-                try:
-                    self.whisper_model = WhisperModel("small", compute_type="int8")
-                    logging.info("✅ Loaded small Whisper model")
-                except Exception as e2:
-                    logging.warning(f"⚠️ Could not load 'small' model, falling back to 'tiny'. Reason: {e2}")
-                    self.whisper_model = WhisperModel("tiny", device="cpu", compute_type="int8")
-                    logging.info("✅ Loaded tiny Whisper model")
-        return self.whisper_model
-
-    def hex_to_ass_color(self, hex_color):
-        try:
-            hex_color = hex_color.lstrip('#')
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            return f"&H00{b:02X}{g:02X}{r:02X}"
-        except Exception:
-            return "&H00FFFFFF"
-
-    def format_ass_time(self, seconds):
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        cs = int((seconds * 100) % 100)
-        return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
-
-    def generate_ass_subtitles_enhanced(self, content, ass_path, settings):
-        if self.check_stop():
-            return
-        try:
-            mode = settings['mode']
-            subtitle_color = settings['color']
-            subtitle_size = settings['size']
-            words_count = settings['words_count']
-            primary = self.hex_to_ass_color(subtitle_color)
-            font_name = settings['font_family']
-            bold = "-1" if settings['bold'] else "0"
-            italic = "1" if settings['italic'] else "0"
-            underline = "0"
-            strikeout = "0"
-            secondary = "&H000000FF"
-            back = "&H00000000"
-            scale_x = "100"
-            scale_y = "100"
-            spacing = "0"
-            angle = "0"
-            border_style = "1"
-            shadow = "0"
-            alignment_map = {"Bottom": 2, "Top": 8, "Center": 5}
-            alignment = alignment_map[settings['position']]
-            margin_l = "10"
-            margin_r = "10"
-            margin_v = "90" if settings['position'] == "Bottom" else "10" if settings['position'] == "Top" else "0"
-            encoding = "1"
-
-            if settings['enable_borders']:
-                outline_color = self.hex_to_ass_color(settings['border_color'])
-                outline = str(settings['border_thickness'])
-            else:
-                outline_color = "&H00000000"
-                outline = "0"
-
-            format_str = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
-            style_line = f"Style: Default,{font_name},{subtitle_size},{primary},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
-
-            style_border = ""
-            if settings['enable_borders']:
-                size_border = str(subtitle_size + 2)
-                outline_border = str(int(outline) + 1) if outline != "0" else "1"
-                style_border = f"\nStyle: SpeechBorder,{font_name},{size_border},{primary},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline_border},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
-
-            with open(ass_path, "w", encoding="utf-8") as f:
-                f.write(f"""[Script Info]
-Title: Enhanced Subtitles with Speech Recognition
-ScriptType: v4.00+
-
-[V4+ Styles]
-{format_str}
-{style_line}{style_border}
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-""")
-                style_name = "SpeechBorder" if settings['enable_borders'] else "Default"
-                if mode == "single":
-                    for w in content:
-                        if self.check_stop():
-                            break
-                        try:
-                            word = w.get("word", "").strip().upper()
-                            start, end = w.get("start", 0), w.get("end", 0)
-                            if word and end > start:
-                                f.write(f"Dialogue: 0,{self.format_ass_time(start)},{self.format_ass_time(end)},{style_name},,0,0,0,,{word}\n")
-                        except Exception as e:
-                            logging.warning(f"⚠️ Error writing subtitle: {e}")
-                            continue
-                else:
-                    grouped_subs = self.generate_grouped_subtitles(content, words_count)
-                    for sub in grouped_subs:
-                        if self.check_stop():
-                            break
-                        try:
-                            text = sub.get("text", "").strip().upper()
-                            start, end = sub.get("start", 0), sub.get("end", 0)
-                            if text and end > start:
-                                f.write(f"Dialogue: 0,{self.format_ass_time(start)},{self.format_ass_time(end)},{style_name},,0,0,0,,{text}\n")
-                        except Exception as e:
-                            logging.warning(f"⚠️ Error writing grouped subtitle: {e}")
-                            continue
-            mode_text = {"single": "single word", "multiple": f"{words_count} words per subtitle"}[mode]
-            border_text = " with speech border boxes" if settings['enable_borders'] else ""
-            logging.info(f"✅ Generated enhanced ASS subtitles with {mode_text}{border_text}")
-        except Exception as e:
-            logging.error(f"❌ Enhanced ASS subtitle generation failed: {e}", exc_info=True)
-            raise
-
-    def check_ffmpeg_availability(self):
-        missing_tools = []
-        try:
-            result = subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True, timeout=10)
-            logging.info("✅ FFmpeg is available")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            missing_tools.append("FFmpeg")
-        try:
-            result = subprocess.run(["auto-editor", "--version"], capture_output=True, check=True, text=True, timeout=10)
-            logging.info("✅ auto-editor is available")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            missing_tools.append("auto-editor")
-        if missing_tools:
-            raise Exception(f"Required tools not found: {', '.join(missing_tools)}. Please install them and ensure they are in your system's PATH.")
-        return True
-
-    def transcribe_audio_optimized(self, audio_path):
-        try:
-            if self.check_stop():
-                return []
-            if not os.path.exists(audio_path):
-                logging.error(f"Audio file not found: {audio_path}")
-                return []
-            logging.info(f"🧠 Transcribing: {os.path.basename(audio_path)}", extra={'is_status': True})
-            model = self.get_whisper_model()
-            segments, _ = model.transcribe(
-                audio_path, beam_size=1, best_of=1, word_timestamps=True,
-                language="en", condition_on_previous_text=False
-            )
-            words = []
-            for segment in segments:
-                if self.check_stop():
-                    break
-                if hasattr(segment, 'words') and segment.words:
-                    for w in segment.words:
-                        if w.word and w.word.strip():
-                            words.append({
-                                "word": w.word.strip(),
-                                "start": max(0, w.start),
-                                "end": max(w.start, w.end),
-                                "confidence": getattr(w, 'probability', 0.5)
-                            })
-            logging.info(f"✅ Transcribed {len(words)} words with speech recognition confidence")
-            return words
-        except Exception as e:
-            logging.error(f"❌ Transcription failed: {e}", exc_info=True)
-            return []
-
-    def generate_grouped_subtitles(self, words, words_per_group):
-        if not words:
-            return []
-        grouped_subtitles = []
-        for i in range(0, len(words), words_per_group):
-            group = words[i:i + words_per_group]
-            if group:
-                try:
-                    text = " ".join([w["word"] for w in group if w.get("word")])
-                    start_time = group[0]["start"]
-                    end_time = group[-1]["end"]
-                    avg_confidence = sum(w.get("confidence", 0.5) for w in group) / len(group)
-                    if end_time > start_time and text.strip():
-                        grouped_subtitles.append({
-                            "text": text.strip().upper(),
-                            "start": start_time,
-                            "end": end_time,
-                            "confidence": avg_confidence
-                        })
-                except Exception as e:
-                    logging.warning(f"⚠️ Error grouping subtitle segment: {e}")
-                    continue
-        return grouped_subtitles
-
-    def _copy_file_safely(self, src, dst):
-        try:
-            if not os.path.exists(src):
-                raise FileNotFoundError(f"Source file not found: {src}")
-            dst_dir = os.path.dirname(dst)
-            os.makedirs(dst_dir, exist_ok=True)
-            shutil.copy2(src, dst)
-            logging.info(f"📋 Copied original video to output: {os.path.basename(dst)}")
-        except Exception as copy_error:
-            logging.error(f"❌ Failed to copy video: {copy_error}")
-            raise
-
-    def run_subprocess_with_timeout(self, cmd, timeout=None, check_stop_interval=1):
-        try:
-            process = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
-            start_time = time.time()
-            while process.poll() is None:
-                if self.check_stop():
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    return None
-                if timeout and (time.time() - start_time) > timeout:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    raise subprocess.TimeoutExpired(cmd, timeout)
-                time.sleep(check_stop_interval)
-            stdout, stderr = process.communicate()
-            if process.returncode != 0:
-                raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
-            return process
-        except Exception as e:
-            if self.check_stop():
-                return None
-            raise
-
-    def add_background_music_with_ducking(self, video_path, music_path, output_path, words, volume=0.15, enable_ducking=True):
-        if self.check_stop():
-            return False
-        try:
-            logging.info(f"🎵 Adding background music: {os.path.basename(music_path)}", extra={'is_status': True})
-            for file_path, file_type in [(video_path, "Video"), (music_path, "Music")]:
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
-            if not enable_ducking or not words:
-                logging.info("🎵 Adding music without ducking...")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                    "-stream_loop", "-1", "-i", music_path,
-                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a][music]amix=inputs=2:duration=first:dropout_transition=2[audio_out]",
-                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
-                ]
-            else:
-                logging.info("🎵 Adding music with smart ducking based on speech recognition...")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                    "-stream_loop", "-1", "-i", music_path,
-                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a]asplit[original][sidechain];[music][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music];[original][ducked_music]amix=inputs=2:duration=first[audio_out]",
-                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
-                ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-            if process is None:
-                return False
-            if os.path.exists(output_path):
-                size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.info(f"✅ Background music added successfully with speech-aware ducking (Size: {size_mb:.1f}MB)")
-                return True
-            else:
-                raise Exception("Output file was not created")
-        except Exception as e:
-            if self.check_stop():
-                return False
-            logging.warning(f"⚠️ Music processing failed: {e}. Continuing without background music.")
-            try:
-                self._copy_file_safely(video_path, output_path)
-                return False
-            except Exception as copy_error:
-                logging.error(f"❌ Failed to copy video after music failure: {copy_error}")
-                raise
-
-    def merge_videos_fast(self, main_video, extra_video, output_path):
-        if self.check_stop():
-            return
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir = Path(temp_dir)
-            concat_file = temp_dir / "concat_list.txt"
-            temp_main = temp_dir / "temp_main.mp4"
-            temp_extra = temp_dir / "temp_extra.mp4"
-            try:
-                logging.info("🔄 Preparing videos for merge...", extra={'is_status': True})
-                for input_vid, output_vid in [(main_video, temp_main), (extra_video, temp_extra)]:
-                    if self.check_stop():
-                        return
-                    cmd = [
-                        "ffmpeg", "-y", "-loglevel", "error", "-i", str(input_vid),
-                        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                        "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "128k",
-                        "-r", "30", "-vsync", "cfr", str(output_vid)
-                    ]
-                    process = self.run_subprocess_with_timeout(cmd, timeout=1800)
-                    if process is None:
-                        return
-                    if not os.path.exists(output_vid):
-                        raise Exception(f"Failed to normalize video: {input_vid}")
-                if self.check_stop():
-                    return
-                with open(concat_file, "w", encoding="utf-8") as f:
-                    f.write(f"file '{os.path.abspath(temp_main).replace(os.sep, '/')}'\n")
-                    f.write(f"file '{os.path.abspath(temp_extra).replace(os.sep, '/')}'\n")
-                logging.info("🔗 Merging normalized videos...", extra={'is_status': True})
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
-                    "-i", str(concat_file), "-c", "copy", "-avoid_negative_ts", "make_zero", output_path
-                ]
-                try:
-                    process = self.run_subprocess_with_timeout(cmd, timeout=1800)
-                    if process is None:
-                        return
-                    if not os.path.exists(output_path):
-                        raise Exception("Concat method failed")
-                except Exception:
-                    if self.check_stop():
-                        return
-                    logging.warning("⚠️ Fallback merge method used.")
-                    cmd_fallback = [
-                        "ffmpeg", "-y", "-loglevel", "error", "-i", str(temp_main), "-i", str(temp_extra),
-                        "-filter_complex", "[0:v:0][0:a:0][1:v:0][1:a:0]concat=n=2:v=1:a=1[outv][outa]",
-                        "-map", "[outv]", "-map", "[outa]", "-c:v", "libx264", "-preset", "fast",
-                        "-c:a", "aac", "-b:a", "128k", "-avoid_negative_ts", "make_zero", output_path
-                    ]
-                    process = self.run_subprocess_with_timeout(cmd_fallback, timeout=1800)
-                    if process is None:
-                        return
-                    if not os.path.exists(output_path):
-                        raise Exception("Both merge methods failed")
-                logging.info("✅ Videos merged successfully")
-            except Exception as e:
-                if self.check_stop():
-                    return
-                logging.error(f"❌ Video merging failed: {e}", exc_info=True)
-                raise
-
-    def process_single_video(self, input_video, output_path, extra_video, background_music,
-                        quality_preset, use_gpu, music_volume, enable_ducking,
-                        enable_auto_edit, subtitle_settings):
-        if self.check_stop():
-            return
-        base_name = Path(input_video).stem
-        clean_name = "".join(c for c in base_name if c.isalnum() or c in (' ', '-', '_')).rstrip() or f"video_{hash(base_name)}"
-        with tempfile.TemporaryDirectory() as temp_dir_str:
-            temp_dir = Path(temp_dir_str)
-            auto_edited = temp_dir / f"auto_{clean_name}.mp4"
-            audio_path = temp_dir / f"audio_{clean_name}.wav"
-            ass_path = temp_dir / f"subs_{clean_name}.ass"
-            final_with_subs = temp_dir / f"subs_{clean_name}.mp4"
-            final_with_music = temp_dir / f"music_{clean_name}.mp4"
-            merged_output = temp_dir / f"merged_{clean_name}.mp4"
-            try:
-                if self.check_stop():
-                    return
-                self.check_ffmpeg_availability()
-                current_video_path = Path(input_video)
-
-                # --------------------------
-                # AUTO-EDITOR PART UPDATED
-                # --------------------------
-                if enable_auto_edit:
-                    logging.info(f"✂️ Auto-editing: {os.path.basename(input_video)}", extra={'is_status': True})
-                    try:
-                        cmd = [
-                            "auto-editor", str(input_video),
-                            "--output", str(auto_edited),
-                            "--frame-rate", "30",
-                            "--silent-speed", "99999",
-                            "--video-codec", "libx264",
-                            "--margin", "0.2s",
-                            "--progress", "ascii",
-                            "--no-open"  # 🚀 prevent auto-opening
-                        ]
-
-
-                        process = subprocess.Popen(
-                            cmd,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            text=True,
-                            bufsize=1
-                        )
-
-                        start = time.time()
-                        for line in process.stdout:
-                            logging.info(f"[auto-editor] {line.strip()}")
-                            if self.check_stop():
-                                process.kill()
-                                return
-                            if time.time() - start > 1800:  # 30 min timeout
-                                process.kill()
-                                raise TimeoutError("auto-editor took too long")
-
-                        process.wait()
-                        if process.returncode == 0 and os.path.exists(auto_edited):
-                            logging.info("✅ Auto-editing completed successfully.")
-                            current_video_path = auto_edited
-                        else:
-                            raise Exception("Auto-editor failed or did not create output file")
-
-                    except Exception as e:
-                        if self.check_stop():
-                            return
-                        logging.warning(f"⚠️ Auto-editor issue: {e}. Using original video.")
-                        try:
-                            self._copy_file_safely(input_video, auto_edited)
-                            current_video_path = auto_edited
-                        except Exception as copy_error:
-                            logging.error(f"❌ Failed to copy video after auto-editor failure: {copy_error}")
-                            raise
-                else:
-                    logging.info("ℹ️ Auto-editing disabled, using original video.")
-                    try:
-                        self._copy_file_safely(input_video, auto_edited)
-                        current_video_path = auto_edited
-                    except Exception as copy_error:
-                        logging.error(f"❌ Failed to copy original video: {copy_error}")
-                        raise
-
-                # --------------------------
-                # REST OF YOUR PIPELINE
-                # --------------------------
-                if self.check_stop():
-                    return
-                logging.info("🔊 Extracting audio for transcription...", extra={'is_status': True})
-                cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(current_video_path), "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", str(audio_path)]
-                process = self.run_subprocess_with_timeout(cmd, timeout=600)
-                if process is None:
-                    return
-                if not os.path.exists(audio_path):
-                    raise Exception("Failed to extract audio")
-
-                if self.check_stop():
-                    return
-                logging.info("🧠 Performing enhanced speech recognition...", extra={'is_status': True})
-                words = self.transcribe_audio_optimized(str(audio_path))
-
-                if self.check_stop():
-                    return
-                if words:
-                    try:
-                        self.generate_ass_subtitles_enhanced(words, str(ass_path), subtitle_settings)
-                        if self.check_stop():
-                            return
-                        mode_text = {
-                            "single": "single word",
-                            "multiple": f"{subtitle_settings['words_count']} words per subtitle"
-                        }[subtitle_settings['mode']]
-                        border_text = " with speech recognition border boxes" if subtitle_settings['enable_borders'] else ""
-                        logging.info(f"📝 Adding {mode_text} enhanced subtitles{border_text}...", extra={'is_status': True})
-                        subtitle_filter = f"ass='{str(ass_path).replace('\\', '/').replace(':', '\\:')}'"
-                        ffmpeg_cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(current_video_path), "-vf", subtitle_filter]
-                        if use_gpu:
-                            try:
-                                test_cmd = ["ffmpeg", "-f", "lavfi", "-i", "nullsrc", "-c:v", "h264_nvenc", "-t", "1", "-f", "null", "-"]
-                                test_process = subprocess.run(test_cmd, capture_output=True, check=True, timeout=10)
-                                ffmpeg_cmd.extend(["-c:v", "h264_nvenc", "-preset", quality_preset])
-                                logging.info("🚀 Using GPU (h264_nvenc) acceleration.")
-                            except Exception:
-                                logging.warning("⚠️ GPU (h264_nvenc) not available, falling back to CPU (libx264).")
-                                ffmpeg_cmd.extend(["-c:v", "libx264", "-preset", quality_preset, "-crf", "23"])
-                        else:
-                            ffmpeg_cmd.extend(["-c:v", "libx264", "-preset", quality_preset, "-crf", "23"])
-                        ffmpeg_cmd.extend(["-c:a", "copy", str(final_with_subs)])
-                        process = self.run_subprocess_with_timeout(ffmpeg_cmd, timeout=3600)
-                        if process is None:
-                            return
-                        if os.path.exists(final_with_subs):
-                            current_video_path = final_with_subs
-                            logging.info(f"✅ Enhanced {mode_text} subtitles with speech recognition added successfully.")
-                        else:
-                            raise Exception("Failed to add subtitles")
-                    except Exception as e:
-                        if self.check_stop():
-                            return
-                        logging.warning(f"⚠️ Subtitle addition failed: {e}. Continuing without subtitles.")
-                        try:
-                            self._copy_file_safely(current_video_path, final_with_subs)
-                            current_video_path = final_with_subs
-                        except Exception as copy_error:
-                            logging.error(f"❌ Failed to copy video after subtitle failure: {copy_error}")
-                            raise
-                else:
-                    logging.info("ℹ️ No speech words detected, skipping subtitle generation.")
-                    try:
-                        self._copy_file_safely(current_video_path, final_with_subs)
-                        current_video_path = final_with_subs
-                    except Exception as copy_error:
-                        logging.error(f"❌ Failed to copy video without subtitles: {copy_error}")
-                        raise
-
-                if self.check_stop():
-                    return
-                if background_music:
-                    success_music = self.add_background_music_with_ducking(
-                        str(current_video_path), background_music, str(final_with_music),
-                        words, volume=music_volume, enable_ducking=enable_ducking
-                    )
-                    if success_music:
-                        current_video_path = final_with_music
-                    else:
-                        logging.info("ℹ️ Proceeding without background music.")
-                else:
-                    logging.info("ℹ️ No background music selected, skipping music addition.")
-
-                if self.check_stop():
-                    return
-                if extra_video:
-                    self.merge_videos_fast(str(current_video_path), extra_video, output_path)
-                else:
-                    shutil.copy2(current_video_path, output_path)
-                    logging.info(f"📁 Saved processed video: {output_path}")
-            except Exception as e:
-                logging.error(f"❌ Processing failed for {input_video}: {e}", exc_info=True)
-                raise
-
-    def process_all_videos(self, input_videos, extra_video, output_dir, background_music,
-                           quality_preset, use_gpu, music_volume, enable_ducking,
-                           enable_auto_edit, subtitle_settings):
-        total = len(input_videos)
-        for idx, input_video in enumerate(input_videos, start=1):
-            if self.check_stop():
-                break
-            filename = Path(input_video).stem
-            output_path = Path(output_dir) / f"{filename}_processed.mp4"
-            logging.info(f"▶️ Processing [{idx}/{total}]: {input_video}", extra={'is_status': True})
-            try:
-                self.process_single_video(
-                    input_video, str(output_path), extra_video, background_music,
-                    quality_preset, use_gpu, music_volume, enable_ducking,
-                    enable_auto_edit, subtitle_settings
-                )
-                progress_percent = int((idx / total) * 100)
-                self.update_progress(progress_percent)
-            except Exception:
-                logging.error(f"❌ Skipping video due to error: {input_video}")
-                continue
-        self.update_progress(100)
-
 if __name__ == "__main__":
     root = tk.Tk()
     app = VideoProcessorGUI(root)
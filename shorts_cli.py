@@ -0,0 +1,176 @@
+"""
+Headless runner for the short_gui_v8.py pipeline (no tkinter needed).
+
+    python shorts_cli.py config.json
+    python shorts_cli.py --manifest batch_a.json --manifest batch_b.json --workers 4
+
+A config is the JSON written by the GUI's "Save Config" button. A manifest is
+a JSON list of configs (inline objects or paths to config files), or an
+object with a "configs" list. Each manifest runs in its own thread and all of
+them share one --workers budget of stages running at the same time.
+
+Every finished video is printed to stdout as one JSON line, followed by a
+summary line per manifest and one for the whole run; logs go to stderr.
+Finished stages are journaled (see job_journal.py), so re-running the same
+command after a crash or Ctrl+C resumes where it stopped; --no-resume
+processes everything from scratch.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+from video_processor import DEFAULT_STAGE_WORKERS, OptimizedVideoProcessor
+from job_journal import JobJournal
+
+_print_lock = threading.Lock()
+
+
+def emit(record):
+    with _print_lock:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+def subtitle_settings_from_config(config):
+    """Same mapping process_videos_thread builds from the GUI widgets."""
+    return {
+        'color': config.get('subtitle_color', '#FFFFFF'),
+        # None derives the unsung karaoke colour from the subtitle colour.
+        'karaoke_base_color': config.get('karaoke_base_color'),
+        'mode': config.get('subtitle_mode', 'single'),
+        'size': config.get('subtitle_size', 24),
+        'words_count': config.get('words_count', 3),
+        'enable_borders': config.get('enable_speech_borders', True),
+        'border_color': config.get('border_color', '#000000'),
+        'border_thickness': config.get('border_thickness', 3),
+        'font_family': config.get('font_family', 'Impact'),
+        'bold': config.get('bold', True),
+        'italic': config.get('italic', False),
+        'position': config.get('position', 'Bottom'),
+        'renderer': config.get('subtitle_renderer', 'libass')
+    }
+
+
+def load_manifest(path):
+    """Returns a list of (name, config) pairs; relative config paths resolve against the manifest."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'configs' not in data:
+        # A single saved config is a manifest of one.
+        return [(path.name, data)]
+    entries = data['configs'] if isinstance(data, dict) else data
+    configs = []
+    for idx, entry in enumerate(entries, start=1):
+        if isinstance(entry, str):
+            config_path = Path(entry)
+            if not config_path.is_absolute():
+                config_path = path.parent / config_path
+            with open(config_path, 'r', encoding='utf-8') as f:
+                configs.append((config_path.name, json.load(f)))
+        else:
+            configs.append((entry.get('name', f"{path.name}#{idx}"), entry))
+    return configs
+
+
+def run_config(name, config, stop_event, worker_slots, manifest_name, resume=True):
+    input_videos = config.get('input_videos', [])
+    output_dir = config.get('output_dir')
+    if not input_videos or not output_dir:
+        logging.error(f"❌ {name}: config needs input_videos and output_dir")
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    extra_video = config.get('extra_video') if config.get('enable_merge', False) else None
+    stage_workers = dict(DEFAULT_STAGE_WORKERS)
+    stage_workers.update(config.get('stage_workers', {}))
+
+    def on_result(result):
+        emit({'event': 'video', 'manifest': manifest_name, 'config': name, **result})
+
+    journal = JobJournal() if resume and config.get('resume_batches', True) else None
+    processor = OptimizedVideoProcessor(None, [], stop_event, worker_slots=worker_slots, journal=journal)
+    return processor.process_all_videos(
+        input_videos, extra_video, output_dir, config.get('background_music'),
+        config.get('quality_preset', 'fast'), config.get('enable_gpu', True),
+        config.get('music_volume', 0.30), config.get('enable_ducking', True),
+        config.get('enable_auto_edit', False), subtitle_settings_from_config(config),
+        stage_workers=stage_workers, on_result=on_result
+    )
+
+
+def run_manifest(manifest_name, configs, stop_event, worker_slots, results, resume=True):
+    start = time.time()
+    manifest_results = []
+    for name, config in configs:
+        if stop_event.is_set():
+            break
+        try:
+            manifest_results += run_config(name, config, stop_event, worker_slots, manifest_name, resume)
+        except Exception as e:
+            logging.error(f"❌ {name} failed: {e}", exc_info=True)
+            emit({'event': 'error', 'manifest': manifest_name, 'config': name, 'error': str(e)})
+    emit(summary('manifest', manifest_results, time.time() - start, manifest=manifest_name))
+    results.extend(manifest_results)
+
+
+def summary(event, results, seconds, **extra):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return {'event': event, **extra, 'videos': len(results), 'counts': counts, 'seconds': round(seconds, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run short_gui_v8 batches without the GUI")
+    parser.add_argument("configs", nargs="*", help="Config JSON files saved from the GUI")
+    parser.add_argument("--manifest", action="append", default=[],
+                        help="Manifest of configs to run in its own lane (repeatable)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Stages allowed to run at once across all manifests (default: 4)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignore the job journal and process every video from scratch")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+
+    lanes = [(Path(path).name, load_manifest(path)) for path in args.manifest]
+    # Positional configs run one after another in a single lane.
+    configs = [pair for path in args.configs for pair in load_manifest(path)]
+    if configs:
+        lanes.insert(0, ("configs", configs))
+    if not lanes:
+        parser.error("give at least one config or --manifest")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    worker_slots = threading.BoundedSemaphore(max(1, args.workers))
+
+    start = time.time()
+    results = []
+    threads = [
+        threading.Thread(target=run_manifest, args=(name, lane, stop_event, worker_slots, results, not args.no_resume), daemon=True)
+        for name, lane in lanes
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # join() with a timeout keeps the main thread responsive to Ctrl+C.
+        while thread.is_alive():
+            thread.join(0.5)
+    emit(summary('run', results, time.time() - start))
+
+    if stop_event.is_set():
+        return 130
+    return 0 if all(result['status'] == 'done' for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
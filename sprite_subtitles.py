@@ -0,0 +1,295 @@
+"""
+Burns subtitles from pre-rendered sprites instead of libass.
+
+The `ass=` filter lays the glyphs out again on every frame, which at
+1080x1920 and 30 fps is a large part of a CPU encode. Captions only change a
+few times per second, so this renders every unique subtitle text once to an
+RGBA PNG with Pillow, using the same font, colour, border and position as
+the ASS style, and writes an ffconcat list that shows each sprite for its
+event's time range (a blank sprite fills the gaps). ffmpeg reads that list
+as one extra input and a single `overlay` composites it: the PNGs are
+decoded once per event and overlay just repeats the last frame in between.
+
+Sizes follow libass: the generated ASS has no PlayResX/Y, so libass lays it
+out on a 384x288 script canvas scaled to the video, and font size, outline
+and margins are scaled the same way here.
+
+    track = SpriteTrack.render("subs.ass", subtitle_settings, 1080, 1920, "sprites/")
+    builder.overlay_sprites(track.concat_path, track.x, track.y)
+
+Benchmark against libass:
+
+    python sprite_subtitles.py clip.mp4 subs.ass --config gui_config.json
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import media_info
+from ffmpeg_graph import FilterGraphBuilder
+from ffmpeg_runner import run_ffmpeg
+
+# libass default script resolution when the ASS header sets none.
+SCRIPT_WIDTH = 384
+SCRIPT_HEIGHT = 288
+
+FONT_DIRS = [
+    Path(os.environ.get("WINDIR", "C:/Windows")) / "Fonts",
+    Path.home() / "AppData" / "Local" / "Microsoft" / "Windows" / "Fonts",
+    Path("/usr/share/fonts"), Path("/usr/local/share/fonts"), Path.home() / ".fonts",
+    Path.home() / ".local" / "share" / "fonts", Path("/Library/Fonts"), Path("/System/Library/Fonts"),
+    Path.home() / "Library" / "Fonts",
+]
+
+
+def parse_ass_time(value):
+    h, m, s = value.strip().split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def dialogue_events(ass_path):
+    """(start, end, text) for every Dialogue line of an ASS file, in file order."""
+    events = []
+    with open(ass_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.startswith("Dialogue:"):
+                continue
+            fields = line[len("Dialogue:"):].rstrip("\r\n").split(",", 9)
+            if len(fields) < 10:
+                continue
+            text = re.sub(r"\{[^}]*\}", "", fields[9]).replace("\\N", "\n")
+            start, end = parse_ass_time(fields[1]), parse_ass_time(fields[2])
+            if text.strip() and end > start:
+                events.append((start, end, text))
+    return events
+
+
+@functools.lru_cache(maxsize=1)
+def _font_index():
+    """{(family, style): path} for the installed TrueType/OpenType fonts, lower-cased."""
+    from PIL import ImageFont
+    index = {}
+    for folder in FONT_DIRS:
+        if not folder.is_dir():
+            continue
+        for path in folder.rglob("*"):
+            if path.suffix.lower() not in (".ttf", ".otf", ".ttc"):
+                continue
+            try:
+                family, style = ImageFont.truetype(str(path), 12).getname()
+            except Exception:
+                continue
+            index.setdefault(((family or "").lower(), (style or "").lower()), str(path))
+    return index
+
+
+def find_font(family, bold=False, italic=False):
+    """Path of the closest installed face of family, or None."""
+    index = _font_index()
+    family = family.lower()
+    wanted = {(True, True): "bold italic", (True, False): "bold", (False, True): "italic"}.get((bold, italic), "regular")
+    for style in (wanted, "regular", "normal", "book", "roman"):
+        if (family, style) in index:
+            return index[(family, style)]
+    for (name, _), path in sorted(index.items()):
+        if name == family:
+            return path
+    return None
+
+
+def _hex_rgba(hex_color, default=(255, 255, 255, 255)):
+    try:
+        hex_color = hex_color.lstrip('#')
+        return (int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16), 255)
+    except Exception:
+        return default
+
+
+class SpriteStyle:
+    """The ASS style written by ass_writer.ass_header, in output pixels for one video size."""
+    def __init__(self, settings, width, height):
+        from PIL import ImageFont
+        self.width = width
+        self.height = height
+        scale = height / SCRIPT_HEIGHT
+        size = settings['size']
+        outline = int(settings['border_thickness']) if settings['enable_borders'] else 0
+        if settings['enable_borders']:
+            # Dialogue lines use the SpeechBorder style: 2 points larger, 1 thicker outline.
+            size += 2
+            outline = outline + 1 if outline else 1
+        self.font_size = max(1, round(size * scale))
+        self.outline = round(outline * scale)
+        self.fill = _hex_rgba(settings['color'])
+        self.outline_fill = _hex_rgba(settings['border_color'], (0, 0, 0, 255)) if settings['enable_borders'] else None
+        self.position = settings['position']
+        margin_v = {"Bottom": 90, "Top": 10}.get(self.position, 0)
+        self.margin_v = round(margin_v * scale)
+        self.max_text_width = width - 2 * round(10 * width / SCRIPT_WIDTH)
+        font_path = find_font(settings['font_family'], settings['bold'], settings['italic'])
+        if font_path:
+            self.font = ImageFont.truetype(font_path, self.font_size)
+        else:
+            logging.warning(f"⚠️ Font '{settings['font_family']}' not found, sprites use Pillow's default font.")
+            self.font = ImageFont.load_default(self.font_size)
+        self.line_spacing = max(0, self.font_size // 10)
+
+    def wrap(self, text, draw):
+        """Breaks text into lines no wider than the frame, the way libass wraps long events."""
+        lines = []
+        for paragraph in text.split("\n"):
+            line = ""
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if line and draw.textlength(candidate, font=self.font) + 2 * self.outline > self.max_text_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class SpriteTrack:
+    """Sprites for every unique event text, plus the ffconcat list that times them."""
+    def __init__(self, concat_path, x, y, sprite_count, event_count):
+        self.concat_path = concat_path
+        self.x = x
+        self.y = y
+        self.sprite_count = sprite_count
+        self.event_count = event_count
+
+    @classmethod
+    def render(cls, ass_path, settings, width, height, out_dir, events=None):
+        from PIL import Image, ImageDraw
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        events = dialogue_events(ass_path) if events is None else events
+        style = SpriteStyle(settings, width, height)
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+        # Lay out each unique text once; all sprites share one canvas size so
+        # the concat demuxer sees a single stream format.
+        layouts = {}
+        for _, _, text in events:
+            if text not in layouts:
+                wrapped = style.wrap(text, measure)
+                box = measure.multiline_textbbox((0, 0), wrapped, font=style.font, align="center",
+                                                 spacing=style.line_spacing, stroke_width=style.outline)
+                box = [int(round(v)) for v in box]
+                layouts[text] = (wrapped, box)
+        box_w = max([b[2] - b[0] for _, b in layouts.values()] or [2])
+        box_h = max([b[3] - b[1] for _, b in layouts.values()] or [2])
+        box_w, box_h = min(width, box_w + box_w % 2), min(height, box_h + box_h % 2)
+
+        files = {}
+        for i, (text, (wrapped, box)) in enumerate(layouts.items()):
+            sprite = Image.new("RGBA", (box_w, box_h), (0, 0, 0, 0))
+            text_w, text_h = box[2] - box[0], box[3] - box[1]
+            top = {"Bottom": box_h - text_h, "Top": 0}.get(style.position, (box_h - text_h) // 2)
+            ImageDraw.Draw(sprite).multiline_text(
+                ((box_w - text_w) // 2 - box[0], top - box[1]), wrapped, font=style.font, fill=style.fill,
+                align="center", spacing=style.line_spacing,
+                stroke_width=style.outline, stroke_fill=style.outline_fill
+            )
+            files[text] = out_dir / f"sprite_{i:05d}.png"
+            sprite.save(files[text], optimize=False, compress_level=1)
+        blank = out_dir / "blank.png"
+        Image.new("RGBA", (box_w, box_h), (0, 0, 0, 0)).save(blank)
+
+        concat_path = out_dir / "sprites.ffconcat"
+        cls.write_concat(concat_path, events, files, blank)
+        x = (width - box_w) // 2
+        if style.position == "Bottom":
+            y = height - style.margin_v - box_h
+        elif style.position == "Top":
+            y = style.margin_v
+        else:
+            y = (height - box_h) // 2
+        return cls(concat_path, x, max(0, y), len(files), len(events))
+
+    @staticmethod
+    def write_concat(concat_path, events, files, blank):
+        """
+        One entry per event, blank entries for the gaps. An event that runs
+        into the next one is cut where the next starts, as a new caption
+        replaces the previous one on screen.
+        """
+        def entry(path, duration):
+            return f"file '{Path(path).resolve().as_posix()}'\nduration {duration:.3f}\n"
+
+        ordered = sorted(events, key=lambda e: e[0])
+        lines = ["ffconcat version 1.0\n"]
+        clock = 0.0
+        for i, (start, end, text) in enumerate(ordered):
+            if i + 1 < len(ordered):
+                end = min(end, ordered[i + 1][0])
+            if end <= clock:
+                continue
+            if start > clock:
+                lines.append(entry(blank, start - clock))
+                clock = start
+            lines.append(entry(files[text], end - clock))
+            clock = end
+        # The concat demuxer ignores the last entry's duration, so end on a blank.
+        lines.append(entry(blank, 0.04))
+        lines.append(f"file '{Path(blank).resolve().as_posix()}'\n")
+        with open(concat_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+def benchmark(video, ass_path, settings, preset="veryfast", work_dir=None):
+    """Encodes video with each subtitle renderer and returns {renderer: seconds}."""
+    info = media_info.probe(video)
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix="sprite_bench_"))
+    encoder = ["-c:v", "libx264", "-preset", preset, "-crf", "23"]
+    timings = {}
+
+    started = time.time()
+    track = SpriteTrack.render(ass_path, settings, info.width, info.height, work_dir / "sprites")
+    timings["sprite_prerender"] = time.time() - started
+
+    for renderer in ("libass", "sprites"):
+        builder = FilterGraphBuilder(video)
+        if renderer == "libass":
+            builder.burn_subtitles(ass_path)
+        else:
+            builder.overlay_sprites(track.concat_path, track.x, track.y)
+        cmd = builder.build(work_dir / f"{renderer}.mp4", encoder)
+        started = time.time()
+        run_ffmpeg(cmd, duration=info.duration)
+        timings[renderer] = time.time() - started
+    timings["sprites_total"] = timings["sprites"] + timings["sprite_prerender"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare libass burn-in with pre-rendered subtitle sprites")
+    parser.add_argument("video")
+    parser.add_argument("ass", help="ASS file written by the shorts pipeline")
+    parser.add_argument("--config", help="GUI config JSON for font/colour/position (defaults otherwise)")
+    parser.add_argument("--preset", default="veryfast", help="libx264 preset for both encodes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    from shorts_cli import subtitle_settings_from_config
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    timings = benchmark(args.video, args.ass, subtitle_settings_from_config(config), args.preset)
+    duration = media_info.get_duration(args.video)
+    for renderer in ("libass", "sprites"):
+        print(f"{renderer:8s} {timings[renderer]:7.1f}s  ({duration / timings[renderer]:.2f}x realtime)")
+    print(f"sprite pre-render {timings['sprite_prerender']:.2f}s, "
+          f"speedup {timings['libass'] / timings['sprites_total']:.2f}x including it")
+
+
+if __name__ == "__main__":
+    main()
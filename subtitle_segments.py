@@ -0,0 +1,158 @@
+"""
+One set of rules for splitting timed words into subtitle lines.
+
+Every script used to group words its own way: fixed strides of N words in
+the GUI, N words or 5 s in editing/6.3.py, 2.5 s or punctuation in the
+Hindi SRT script. SegmentRules holds all of those limits (words, characters,
+duration, pause length, sentence punctuation) and a new line starts at the
+first one that is hit. segment_words applies them to a whole transcript in
+one pass, with the pauses and sentence ends computed as NumPy arrays;
+Segmenter applies the same rules one word at a time while words stream in.
+
+    from subtitle_segments import segment_words
+    for line in segment_words(words, max_words=3, max_duration=5.0):
+        print(line["start"], line["end"], line["text"])
+"""
+import numpy as np
+
+SENTENCE_END = ".?!।"
+
+
+class SegmentRules:
+    """Limits for one subtitle line; None disables a limit."""
+    def __init__(self, max_words=None, max_chars=None, max_duration=None, max_gap=None, break_on_punctuation=False):
+        self.max_words = max_words
+        self.max_chars = max_chars
+        self.max_duration = max_duration
+        self.max_gap = max_gap
+        self.break_on_punctuation = break_on_punctuation
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Rules for the GUI's "multiple words" mode; optional keys tighten them further."""
+        return cls(
+            max_words=max(1, int(settings.get('words_count', 3))),
+            max_chars=settings.get('max_chars'),
+            max_duration=settings.get('max_duration', 5.0),
+            max_gap=settings.get('max_gap', 1.0),
+            break_on_punctuation=settings.get('break_on_punctuation', True)
+        )
+
+    def starts_new_line(self, count, chars, line_start, gap, after_sentence_end, length, end):
+        """
+        Whether a word of `length` characters ending at `end` goes on a new line,
+        given the current line's word count, character count and start time,
+        the pause before the word and whether the previous word ended a sentence.
+        """
+        return bool(
+            (self.max_words and count >= self.max_words)
+            or (self.max_gap is not None and gap > self.max_gap)
+            or (self.break_on_punctuation and after_sentence_end)
+            or (self.max_chars and chars + 1 + length > self.max_chars)
+            or (self.max_duration and end - line_start > self.max_duration)
+        )
+
+
+def ends_sentence(text):
+    return text.rstrip()[-1:] in SENTENCE_END if text else False
+
+
+def _columns(words):
+    """(starts, ends, texts) as float64 arrays plus a text list, for dict lists or an ass_writer.WordStore."""
+    if hasattr(words, "text_ids"):
+        starts = np.frombuffer(words.starts, dtype=np.float32).astype(np.float64)
+        ends = np.frombuffer(words.ends, dtype=np.float32).astype(np.float64)
+        texts = [words.strings[i] for i in words.text_ids]
+        return starts, ends, texts
+    count = len(words)
+    starts = np.fromiter((w["start"] for w in words), dtype=np.float64, count=count)
+    ends = np.fromiter((w["end"] for w in words), dtype=np.float64, count=count)
+    return starts, ends, [w["word"] for w in words]
+
+
+def line_bounds(words, rules):
+    """(first, stop) index pairs of the lines, in order."""
+    if not len(words):
+        return []
+    starts, ends, texts = _columns(words)
+    # Pause before each word and whether each word ends a sentence, computed up front.
+    gaps = np.empty(len(starts))
+    gaps[0] = 0.0
+    np.subtract(starts[1:], ends[:-1], out=gaps[1:])
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    if rules.break_on_punctuation:
+        sentence_ends = np.fromiter((ends_sentence(t) for t in texts), dtype=bool, count=len(texts))
+    else:
+        sentence_ends = np.zeros(len(texts), dtype=bool)
+
+    # The pauses and sentence ends alone already force some breaks; only the
+    # words between those need the per-line limits checked.
+    forced = np.zeros(len(texts), dtype=bool)
+    if rules.max_gap is not None:
+        forced |= gaps > rules.max_gap
+    forced[1:] |= sentence_ends[:-1]
+    forced = forced.tolist()
+    starts, ends, lengths = starts.tolist(), ends.tolist(), lengths.tolist()
+    limited = rules.max_words or rules.max_chars or rules.max_duration
+
+    bounds = []
+    first = 0
+    chars = lengths[0]
+    for i in range(1, len(texts)):
+        if forced[i] or (limited and rules.starts_new_line(i - first, chars, starts[first], 0.0, False,
+                                                           lengths[i], ends[i])):
+            bounds.append((first, i))
+            first = i
+            chars = lengths[i]
+        else:
+            chars += 1 + lengths[i]
+    bounds.append((first, len(texts)))
+    return bounds
+
+
+def _line(words):
+    return {
+        "text": " ".join(w["word"] for w in words if w.get("word")).strip(),
+        "start": words[0]["start"],
+        "end": words[-1]["end"],
+        "confidence": sum(w.get("confidence", 0.5) for w in words) / len(words),
+        "words": words
+    }
+
+
+def segment_words(words, rules=None, **limits):
+    """
+    Splits words (dicts with word/start/end, or a WordStore) into lines.
+    Pass SegmentRules or the limits as keywords (max_words=3, max_duration=5.0, ...).
+    Each line is {"text", "start", "end", "confidence", "words"}.
+    """
+    rules = rules or SegmentRules(**limits)
+    return [_line(words[first:stop]) for first, stop in line_bounds(words, rules)]
+
+
+class Segmenter:
+    """The same rules applied incrementally: add() returns a line once the next word closes it."""
+    def __init__(self, rules):
+        self.rules = rules
+        self.words = []
+        self.chars = 0
+
+    def add(self, word, start, end, confidence=0.5):
+        entry = {"word": word, "start": start, "end": end, "confidence": confidence}
+        finished = None
+        if self.words:
+            previous = self.words[-1]
+            if self.rules.starts_new_line(len(self.words), self.chars, self.words[0]["start"], start - previous["end"],
+                                          ends_sentence(previous["word"]), len(word), end):
+                finished = self.flush()
+        self.chars = self.chars + 1 + len(word) if self.words else len(word)
+        self.words.append(entry)
+        return finished
+
+    def flush(self):
+        if not self.words:
+            return None
+        line = _line(self.words)
+        self.words = []
+        self.chars = 0
+        return line
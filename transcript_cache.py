@@ -0,0 +1,153 @@
+"""
+On-disk cache of word-level transcripts.
+
+Entries are keyed by a SHA-256 of the extracted 16 kHz samples plus the
+transcription settings (model, language, beam size, word_timestamps), so
+re-running a video with different subtitle styling never hits Whisper again
+while any change to the audio or the settings does.
+
+Each entry is a small binary file: a header, three float32 columns
+(start, end, confidence) and the words as newline-joined UTF-8. Least
+recently used entries are evicted once the cache grows past max_bytes.
+"""
+import hashlib
+import logging
+import os
+import struct
+import sys
+import tempfile
+import threading
+import wave
+from array import array
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    "TRANSCRIPT_CACHE_DIR", Path.home() / ".cache" / "video_processor" / "transcripts"
+))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_MAGIC = b"TXC1"
+_HEADER = struct.Struct("<4sII")
+
+
+def hash_pcm(audio_path, chunk_frames=1 << 16):
+    """Hashes the sample data of a WAV file, ignoring header metadata."""
+    digest = hashlib.sha256()
+    with wave.open(str(audio_path), "rb") as wav:
+        digest.update(struct.pack("<III", wav.getframerate(), wav.getnchannels(), wav.getsampwidth()))
+        while True:
+            frames = wav.readframes(chunk_frames)
+            if not frames:
+                break
+            digest.update(frames)
+    return digest.hexdigest()
+
+
+def hash_samples(samples, sample_rate=16000):
+    """Hashes an in-memory float32 sample array (see audio_stream.py)."""
+    digest = hashlib.sha256()
+    digest.update(struct.pack("<I4s", sample_rate, b"f32"))
+    digest.update(memoryview(samples).cast("B"))
+    return digest.hexdigest()
+
+
+def _float_column(values):
+    column = array("f", values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+class TranscriptCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def make_key(self, audio, model, language, beam_size, word_timestamps=True):
+        """audio is a WAV path or a 16 kHz float32 sample array."""
+        settings = f"{model}|{language}|{beam_size}|{int(bool(word_timestamps))}"
+        audio_hash = hash_pcm(audio) if isinstance(audio, (str, os.PathLike)) else hash_samples(audio)
+        return hashlib.sha256(f"{audio_hash}|{settings}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.txc"
+
+    def get(self, key):
+        """Returns the cached word list, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, count, text_len = _HEADER.unpack_from(data)
+            if magic != _MAGIC:
+                raise ValueError("bad magic")
+            offset = _HEADER.size
+            columns = []
+            for _ in range(3):
+                column = array("f")
+                column.frombytes(data[offset:offset + 4 * count])
+                if sys.byteorder != "little":
+                    column.byteswap()
+                columns.append(column)
+                offset += 4 * count
+            texts = data[offset:offset + text_len].decode("utf-8").split("\n") if count else []
+            if len(texts) != count:
+                raise ValueError("word count mismatch")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"⚠️ Dropping unreadable transcript cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        # Touch the entry so eviction sees it as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        starts, ends, confidences = columns
+        return [
+            {"word": texts[i], "start": float(starts[i]), "end": float(ends[i]), "confidence": float(confidences[i])}
+            for i in range(count)
+        ]
+
+    def put(self, key, words):
+        # Newlines separate words in the text block, so they cannot appear inside one.
+        texts = [w["word"].replace("\n", " ") for w in words]
+        text_blob = "\n".join(texts).encode("utf-8")
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, len(words), len(text_blob)))
+                f.write(_float_column(w["start"] for w in words).tobytes())
+                f.write(_float_column(w["end"] for w in words).tobytes())
+                f.write(_float_column(w.get("confidence", 0.5) for w in words).tobytes())
+                f.write(text_blob)
+            os.replace(tmp, path)
+        except Exception:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob("*/*.txc"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import filedialog
 import subprocess
 import os
+from media_info import probe
 
 # Function to choose a single file
 def choose_file(prompt):
@@ -20,15 +21,13 @@ def choose_save_location():
 
 # Function to get video resolution using FFmpeg
 def get_video_resolution(video_path):
-    cmd = [
-        "ffprobe", "-v", "error", "-select_streams", "v:0", 
-        "-show_entries", "stream=width,height", "-of", "csv=p=0", video_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        width, height = map(int, result.stdout.strip().split(','))
-        return width, height
-    return None, None
+    try:
+        info = probe(video_path)
+    except (subprocess.CalledProcessError, OSError, ValueError):
+        return None, None
+    if not info.has_video:
+        return None, None
+    return info.width, info.height
 
 # Ask for the first video
 video1_path = choose_file("Select the first video file")
@@ -0,0 +1,1188 @@
+"""
+Video processing pipeline behind short_gui_v8.py, kept free of tkinter so
+it can also run headless (see shorts_cli.py). Progress and status messages
+go to an optional queue as (type, value) tuples; the GUI drains it on the
+Tk thread.
+"""
+import os
+import json
+import subprocess
+import threading
+import shutil
+from pathlib import Path
+import logging
+import time
+import tempfile
+from pipeline_scheduler import Stage, StagedPipeline
+import whisper_server
+from transcript_cache import TranscriptCache
+from ffmpeg_graph import FilterGraphBuilder, escape_filter_path
+import media_info
+from asset_store import AssetStore, EncodeProfile
+from ffmpeg_runner import run_ffmpeg
+from job_journal import fingerprint
+from audio_stream import AudioSource
+from chunked_transcribe import ChunkedTranscriber
+from auto_edit_timeline import TimeRemap, export_timeline
+import ass_writer
+from ass_writer import StreamingAssWriter, WordStore
+from sprite_subtitles import SpriteTrack
+from subtitle_segments import SegmentRules, segment_words
+import encoder_registry
+import encode_scheduler
+import segment_encode
+
+# Worker threads per pipeline stage. Transcription is CPU-bound inside
+# CTranslate2 and the other stages mostly wait on ffmpeg/auto-editor, so
+# the defaults keep one video in each stage at a time.
+DEFAULT_STAGE_WORKERS = {
+    'prepare': 1,
+    'extract_audio': 1,
+    'transcribe': 1,
+    'render': 1,
+    'queue_size': 2,
+    # Worker processes for chunked transcription of long videos (0 = cores / 4).
+    'transcribe_processes': 0
+}
+
+# Videos with at least this much audio are split at silences and
+# transcribed in parallel worker processes instead of one Whisper pass.
+CHUNKED_TRANSCRIBE_MIN_SECONDS = 300
+
+# Share of one video's progress bar given to each stage, roughly in
+# proportion to how long the stage takes on a typical short.
+STAGE_WEIGHTS = {
+    'prepare': 0.2,
+    'extract_audio': 0.05,
+    'transcribe': 0.35,
+    'render': 0.4
+}
+
+# Job attribute holding the artifact each stage produces, as recorded in
+# the job journal so an interrupted batch can resume after that stage.
+# extract_audio only decodes into memory, so it simply runs again on resume.
+STAGE_ARTIFACTS = {
+    'prepare': 'prepared_path',
+    'transcribe': 'words_path',
+    'render': 'output_path'
+}
+
+class VideoJob:
+    """State of one video as it moves through the processing stages."""
+    def __init__(self, input_video, output_path, clean_name, options):
+        self.input_video = input_video
+        self.output_path = output_path
+        self.clean_name = clean_name
+        self.options = options
+        self.index = 0
+        self.temp_dir = None
+        self.work_dir = None
+        self.key = None
+        self.last_fingerprint = None
+        self.resumed_from = None
+        self.words_path = None
+        self.current_video_path = Path(input_video)
+        self.audio = None
+        # Set when auto-editor's cuts are applied at render time instead of
+        # rendering auto_{name}.mp4; current_video_path is then the source.
+        self.remap = None
+        self.timeline_path = None
+        self.words = []
+        # Written while transcribing; None means the render builds it from words.
+        self.ass_path = None
+        self.progress = 0.0
+        self.started_at = None
+        self.stage_times = {}
+
+    def result(self, status, stage=None, error=None):
+        """Machine-readable summary of how this video went."""
+        return {
+            'input': str(self.input_video),
+            'output': str(self.output_path),
+            'status': status,
+            'stage': stage,
+            'error': str(error) if error is not None else None,
+            'seconds': round(time.time() - self.started_at, 2) if self.started_at else 0.0,
+            'stage_seconds': dict(self.stage_times),
+            'resumed_from': self.resumed_from
+        }
+
+    @property
+    def prepared_path(self):
+        """What the prepare stage produced: the auto-editor timeline, or the video to work on."""
+        return self.timeline_path if self.remap is not None else self.current_video_path
+
+    def open_temp_dir(self):
+        if self.temp_dir is None:
+            if self.work_dir is not None:
+                # Journaled jobs keep their files in a fixed place so a rerun can pick them up.
+                self.work_dir.mkdir(parents=True, exist_ok=True)
+                self.temp_dir = self.work_dir
+            else:
+                self.temp_dir = Path(tempfile.mkdtemp(prefix=f"vp_{self.clean_name[:20]}_"))
+        return self.temp_dir
+
+    def path(self, name):
+        return self.open_temp_dir() / name
+
+    def cleanup(self):
+        if self.temp_dir is not None:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+
+class OptimizedVideoProcessor:
+    def __init__(self, progress_queue, video_title_map, stop_event, worker_slots=None, journal=None):
+        """
+        progress_queue may be None when nothing displays progress. worker_slots
+        is an optional semaphore shared between processors that caps how many
+        stages run at once across all of them. With a JobJournal, finished
+        stages are checkpointed and a rerun of the batch resumes from them.
+        """
+        self.progress_queue = progress_queue
+        self.video_title_map = video_title_map
+        self.stop_event = stop_event
+        self.transcribe_workers = 1
+        self.render_workers = 1
+        self.transcribe_processes = 0
+        self._chunked_transcriber = None
+        self._chunked_lock = threading.Lock()
+        self.transcript_cache = TranscriptCache()
+        self.asset_store = AssetStore()
+        self.worker_slots = worker_slots
+        self.journal = journal
+        self.jobs = []
+        self._progress_lock = threading.Lock()
+        # Which job/stage the current worker thread is running, so ffmpeg
+        # progress can be attributed without threading it through every call.
+        self._context = threading.local()
+
+    def post(self, msg_type, value):
+        if self.progress_queue is None:
+            return
+        try:
+            self.progress_queue.put((msg_type, value))
+        except Exception:
+            pass
+
+    def update_progress(self, percentage):
+        self.post("PROGRESS", max(0, min(100, percentage)))
+
+    def check_stop(self):
+        return self.stop_event.is_set()
+
+    def set_job_progress(self, job, stage_name, fraction):
+        """Records how far job is through stage_name and updates the overall bar."""
+        offset = 0.0
+        for name, weight in STAGE_WEIGHTS.items():
+            if name == stage_name:
+                break
+            offset += weight
+        with self._progress_lock:
+            job.progress = max(job.progress, min(1.0, offset + STAGE_WEIGHTS.get(stage_name, 0) * fraction))
+            if self.jobs:
+                self.update_progress(100 * sum(j.progress for j in self.jobs) / len(self.jobs))
+
+    def report_ffmpeg_progress(self, progress):
+        job = getattr(self._context, 'job', None)
+        stage_name = getattr(self._context, 'stage', None)
+        if job is None:
+            return
+        self.report_job_progress(job, stage_name, progress)
+
+    def report_job_progress(self, job, stage_name, progress):
+        """report_ffmpeg_progress for ffmpeg runs on helper threads, which have no stage context."""
+        if progress.fraction is not None:
+            self.set_job_progress(job, stage_name, progress.fraction)
+        self.post("STAGE", f"[{job.index}/{len(self.jobs)}] {job.clean_name[:40]} · {stage_name} {progress.describe()}")
+
+    def track_stage(self, stage_name, func):
+        """Wraps a stage function so ffmpeg runs inside it report against that job and stage."""
+        def run(job):
+            if job.started_at is None:
+                job.started_at = time.time()
+            if self.worker_slots is not None:
+                self.worker_slots.acquire()
+            self._context.job = job
+            self._context.stage = stage_name
+            started = time.time()
+            try:
+                if self.restore_stage(job, stage_name):
+                    return job
+                result = func(job)
+            finally:
+                job.stage_times[stage_name] = round(time.time() - started, 2)
+                self._context.job = None
+                if self.worker_slots is not None:
+                    self.worker_slots.release()
+            if result is not None:
+                self.record_stage(job, stage_name)
+                self.set_job_progress(job, stage_name, 1.0)
+            return result
+        return run
+
+    def restore_stage(self, job, stage_name):
+        """Loads a stage's artifact from the journal instead of running it. Returns True if restored."""
+        if self.journal is None or job.key is None or stage_name not in STAGE_ARTIFACTS:
+            return False
+        try:
+            artifact = self.journal.restore(job.key, stage_name, job.last_fingerprint)
+            if artifact is None:
+                return False
+            if stage_name == 'transcribe':
+                with open(artifact, 'r', encoding='utf-8') as f:
+                    job.words = json.load(f)
+            attr = STAGE_ARTIFACTS[stage_name]
+            if stage_name == 'prepare':
+                self.apply_prepared(job, artifact)
+            else:
+                setattr(job, attr, artifact if attr == 'output_path' else Path(artifact))
+            job.last_fingerprint = fingerprint(artifact)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not restore '{stage_name}' checkpoint, running it again: {e}")
+            return False
+        job.resumed_from = stage_name
+        logging.info(f"⏩ Resuming {job.clean_name}: '{stage_name}' stage already done")
+        self.set_job_progress(job, stage_name, 1.0)
+        return True
+
+    def record_stage(self, job, stage_name):
+        if self.journal is None or job.key is None or stage_name not in STAGE_ARTIFACTS:
+            return
+        try:
+            if stage_name == 'transcribe':
+                job.words_path = job.path(f"words_{job.clean_name}.json")
+                with open(job.words_path, 'w', encoding='utf-8') as f:
+                    json.dump(list(job.words), f, ensure_ascii=False)
+            artifact = getattr(job, STAGE_ARTIFACTS[stage_name])
+            if not artifact or not os.path.exists(artifact):
+                return
+            self.journal.checkpoint(job.key, stage_name, artifact, job.last_fingerprint)
+            job.last_fingerprint = fingerprint(artifact)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not checkpoint '{stage_name}' for {job.clean_name}: {e}")
+
+    def hex_to_ass_color(self, hex_color):
+        return ass_writer.ass_color(hex_color)
+
+    def format_ass_time(self, seconds):
+        return ass_writer.format_ass_time(seconds)
+
+    def generate_ass_subtitles_enhanced(self, content, ass_path, settings):
+        if self.check_stop():
+            return
+        try:
+            with StreamingAssWriter(ass_path, settings) as writer:
+                for w in content:
+                    if self.check_stop():
+                        break
+                    writer.add_word(w.get("word", ""), w.get("start", 0), w.get("end", 0), w.get("confidence", 0.5))
+            self.log_subtitles_written(settings)
+        except Exception as e:
+            logging.error(f"❌ Enhanced ASS subtitle generation failed: {e}", exc_info=True)
+            raise
+
+    def log_subtitles_written(self, settings):
+        mode_text = ass_writer.describe_mode(settings)
+        border_text = " with speech border boxes" if settings['enable_borders'] else ""
+        logging.info(f"✅ Generated enhanced ASS subtitles with {mode_text}{border_text}")
+
+    def check_ffmpeg_availability(self):
+        missing_tools = []
+        try:
+            result = subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True, timeout=10)
+            logging.info("✅ FFmpeg is available")
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            missing_tools.append("FFmpeg")
+        try:
+            result = subprocess.run(["auto-editor", "--version"], capture_output=True, check=True, text=True, timeout=10)
+            logging.info("✅ auto-editor is available")
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            missing_tools.append("auto-editor")
+        if missing_tools:
+            raise Exception(f"Required tools not found: {', '.join(missing_tools)}. Please install them and ensure they are in your system's PATH.")
+        return True
+
+    def transcribe_audio_optimized(self, audio, label="audio", on_word=None):
+        """
+        audio is a WAV path or a 16 kHz float32 array from audio_stream.
+        Returns the words as a WordStore. on_word(word, start, end, confidence)
+        is called for every word as soon as its segment is decoded.
+        """
+        words = WordStore()
+
+        def add(word, start, end, confidence):
+            words.append(word, start, end, confidence)
+            if on_word is not None:
+                on_word(word, start, end, confidence)
+
+        try:
+            if self.check_stop():
+                return words
+            if isinstance(audio, (str, Path)):
+                if not os.path.exists(audio):
+                    logging.error(f"Audio file not found: {audio}")
+                    return words
+                audio = str(audio)
+                label = os.path.basename(audio)
+            cache_key = None
+            try:
+                cache_key = self.transcript_cache.make_key(audio, "large-v3", "en", beam_size=1, word_timestamps=True)
+                cached_words = self.transcript_cache.get(cache_key)
+                if cached_words is not None:
+                    logging.info(f"♻️ Reusing cached transcript ({len(cached_words)} words) for {label}")
+                    for w in cached_words:
+                        add(w["word"], w["start"], w["end"], w.get("confidence", 0.5))
+                    return words
+            except Exception as e:
+                logging.warning(f"⚠️ Transcript cache lookup failed: {e}")
+            logging.info(f"🧠 Transcribing: {label}", extra={'is_status': True})
+            options = dict(beam_size=1, best_of=1, word_timestamps=True,
+                           language="en", condition_on_previous_text=False)
+            if not isinstance(audio, str) and len(audio) >= CHUNKED_TRANSCRIBE_MIN_SECONDS * 16000:
+                job = getattr(self._context, 'job', None)
+                stage_name = getattr(self._context, 'stage', None)
+
+                def on_progress(fraction):
+                    if job is not None:
+                        self.set_job_progress(job, stage_name, fraction)
+                        self.post("STAGE", f"[{job.index}/{len(self.jobs)}] {job.clean_name[:40]} · "
+                                           f"{stage_name} {fraction:.0%}")
+
+                result = self.chunked_transcriber().transcribe(audio, stop_event=self.stop_event,
+                                                               on_progress=on_progress, **options)
+                segments = result["segments"] if result is not None else []
+                summary = {"model": result["model"]} if result is not None else {}
+            else:
+                # The shared server keeps large-v3 warm between videos and between runs,
+                # and streams each segment back as soon as it is decoded.
+                summary = {}
+                segments = whisper_server.transcribe_stream(
+                    audio, model_size="large-v3", compute_type="int8", fallbacks=("small", "tiny"),
+                    summary=summary, **options
+                )
+            for segment in segments:
+                if self.check_stop():
+                    break
+                for w in segment["words"]:
+                    add(w["word"], max(0, w["start"]), max(w["start"], w["end"]), w.get("probability", 0.5))
+            if hasattr(segments, "close"):
+                segments.close()
+            if self.check_stop():
+                return WordStore()
+            model_name = summary.get("model")
+            if model_name != "large-v3":
+                # The key names large-v3; a fallback model's transcript must not stand in for it.
+                logging.info(f"ℹ️ Transcribed with {model_name or 'an unknown model'}, not caching the transcript")
+            elif cache_key and len(words):
+                try:
+                    self.transcript_cache.put(cache_key, words.to_list())
+                except Exception as e:
+                    logging.warning(f"⚠️ Could not store transcript in cache: {e}")
+            logging.info(f"✅ Transcribed {len(words)} words with speech recognition confidence")
+            return words
+        except Exception as e:
+            logging.error(f"❌ Transcription failed: {e}", exc_info=True)
+            return WordStore()
+
+    def chunked_transcriber(self):
+        """Process pool for long videos, started on first use and shared by the whole batch."""
+        with self._chunked_lock:
+            if self._chunked_transcriber is None:
+                self._chunked_transcriber = ChunkedTranscriber(
+                    "large-v3", compute_type="int8", workers=self.transcribe_processes or None,
+                    fallbacks=("small", "tiny")
+                )
+            return self._chunked_transcriber
+
+    def generate_grouped_subtitles(self, words, words_per_group):
+        """Lines of at most words_per_group words, also split at pauses, sentence ends and 5 s."""
+        rules = SegmentRules.from_settings({'words_count': words_per_group})
+        return [
+            {"text": line["text"].upper(), "start": line["start"], "end": line["end"], "confidence": line["confidence"]}
+            for line in segment_words(words, rules)
+            if line["end"] > line["start"] and line["text"]
+        ]
+
+    def _copy_file_safely(self, src, dst):
+        try:
+            if not os.path.exists(src):
+                raise FileNotFoundError(f"Source file not found: {src}")
+            dst_dir = os.path.dirname(dst)
+            os.makedirs(dst_dir, exist_ok=True)
+            shutil.copy2(src, dst)
+            logging.info(f"📋 Copied original video to output: {os.path.basename(dst)}")
+        except Exception as copy_error:
+            logging.error(f"❌ Failed to copy video: {copy_error}")
+            raise
+
+    def run_subprocess_with_timeout(self, cmd, timeout=None, check_stop_interval=0.1, duration=None):
+        if os.path.basename(str(cmd[0])).lower().startswith("ffmpeg"):
+            if duration is None:
+                duration = self.guess_output_duration(cmd)
+            try:
+                return run_ffmpeg(cmd, duration=duration, on_progress=self.report_ffmpeg_progress,
+                                  stop_event=self.stop_event, timeout=timeout)
+            except Exception:
+                if self.check_stop():
+                    return None
+                raise
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+            # Drained as it runs: a full pipe buffer would block the child forever.
+            output = []
+            reader = threading.Thread(target=self._drain_output, args=(process.stdout, output, cmd[0]), daemon=True)
+            reader.start()
+            start_time = time.time()
+            while process.poll() is None:
+                if self.check_stop():
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                    return None
+                if timeout and (time.time() - start_time) > timeout:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                self.stop_event.wait(check_stop_interval)
+            reader.join()
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, cmd, output="".join(output))
+            return process
+        except Exception as e:
+            if self.check_stop():
+                return None
+            raise
+
+    @staticmethod
+    def _drain_output(stream, lines, name):
+        program = os.path.basename(str(name))
+        for line in stream:
+            lines.append(line)
+            logging.debug(f"[{program}] {line.rstrip()}")
+        stream.close()
+
+    def guess_output_duration(self, cmd):
+        """Output length of an ffmpeg command: its -t value, else the first input's duration."""
+        try:
+            if "-t" in cmd:
+                return float(cmd[cmd.index("-t") + 1])
+            first_input = cmd[cmd.index("-i") + 1]
+            return media_info.get_duration(first_input) or None
+        except Exception:
+            return None
+
+    def add_background_music_with_ducking(self, video_path, music_path, output_path, words, volume=0.15, enable_ducking=True):
+        if self.check_stop():
+            return False
+        try:
+            logging.info(f"🎵 Adding background music: {os.path.basename(music_path)}", extra={'is_status': True})
+            for file_path, file_type in [(video_path, "Video"), (music_path, "Music")]:
+                if not os.path.exists(file_path):
+                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
+            if not enable_ducking or not words:
+                logging.info("🎵 Adding music without ducking...")
+                cmd = [
+                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
+                    "-stream_loop", "-1", "-i", music_path,
+                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a][music]amix=inputs=2:duration=first:dropout_transition=2[audio_out]",
+                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
+                ]
+            else:
+                logging.info("🎵 Adding music with smart ducking based on speech recognition...")
+                cmd = [
+                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
+                    "-stream_loop", "-1", "-i", music_path,
+                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a]asplit[original][sidechain];[music][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music];[original][ducked_music]amix=inputs=2:duration=first[audio_out]",
+                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
+                ]
+            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
+            if process is None:
+                return False
+            if os.path.exists(output_path):
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                logging.info(f"✅ Background music added successfully with speech-aware ducking (Size: {size_mb:.1f}MB)")
+                return True
+            else:
+                raise Exception("Output file was not created")
+        except Exception as e:
+            if self.check_stop():
+                return False
+            logging.warning(f"⚠️ Music processing failed: {e}. Continuing without background music.")
+            try:
+                self._copy_file_safely(video_path, output_path)
+                return False
+            except Exception as copy_error:
+                logging.error(f"❌ Failed to copy video after music failure: {copy_error}")
+                raise
+
+    def run_ffmpeg_step(self, cmd, timeout=1800):
+        return self.run_subprocess_with_timeout(cmd, timeout=timeout)
+
+    def concat_copy(self, parts, output_path, temp_dir):
+        """Joins clips with identical stream parameters using the concat demuxer, without re-encoding."""
+        concat_file = Path(temp_dir) / "concat_copy_list.txt"
+        with open(concat_file, "w", encoding="utf-8") as f:
+            for part in parts:
+                f.write(f"file '{os.path.abspath(part).replace(os.sep, '/')}'\n")
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+            "-i", str(concat_file), "-c", "copy", "-movflags", "+faststart", str(output_path)
+        ]
+        process = self.run_ffmpeg_step(cmd)
+        return process is not None and os.path.exists(output_path)
+
+    def prepare_extra_video(self, main_info, extra_video, quality_preset):
+        """Returns (path, profile) for the extra video normalized to match main_info; path is None if stopped."""
+        profile = EncodeProfile.from_media(main_info, preset=quality_preset)
+        return self.asset_store.normalized(extra_video, profile, run=self.run_ffmpeg_step), profile
+
+    def merge_videos_fast(self, main_video, extra_video, output_path, quality_preset="fast"):
+        if self.check_stop():
+            return
+        try:
+            main_info = media_info.probe(main_video)
+            extra_info = media_info.probe(extra_video)
+            with tempfile.TemporaryDirectory() as temp_dir:
+                if media_info.is_concat_compatible(main_info, extra_info):
+                    logging.info("⚡ Extra video matches the main video, merging with stream copy...", extra={'is_status': True})
+                    if self.concat_copy([main_video, extra_video], output_path, temp_dir):
+                        logging.info("✅ Videos merged successfully")
+                        return
+                elif (main_info.video_codec, main_info.audio_codec, main_info.pix_fmt) == ("h264", "aac", "yuv420p"):
+                    prepared, _ = self.prepare_extra_video(main_info, extra_video, quality_preset)
+                    if prepared is None:
+                        return
+                    mismatches = media_info.concat_mismatches(main_info, media_info.probe(prepared))
+                    if not mismatches:
+                        logging.info("⚡ Merging with cached normalized extra video...", extra={'is_status': True})
+                        if self.concat_copy([main_video, prepared], output_path, temp_dir):
+                            logging.info("✅ Videos merged successfully")
+                            return
+                    else:
+                        logging.info(f"ℹ️ Normalized extra video still differs in: {', '.join(mismatches)}")
+        except Exception as e:
+            if self.check_stop():
+                return
+            logging.warning(f"⚠️ Stream-copy merge not possible: {e}")
+        if self.check_stop():
+            return
+        logging.info("🔄 Re-encoding both videos for merge...")
+        self.merge_videos_reencode(main_video, extra_video, output_path)
+
+    def merge_videos_reencode(self, main_video, extra_video, output_path):
+        if self.check_stop():
+            return
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            concat_file = temp_dir / "concat_list.txt"
+            temp_main = temp_dir / "temp_main.mp4"
+            temp_extra = temp_dir / "temp_extra.mp4"
+            try:
+                logging.info("🔄 Preparing videos for merge...", extra={'is_status': True})
+                for input_vid, output_vid in [(main_video, temp_main), (extra_video, temp_extra)]:
+                    if self.check_stop():
+                        return
+                    cmd = [
+                        "ffmpeg", "-y", "-loglevel", "error", "-i", str(input_vid),
+                        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+                        "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "128k",
+                        "-r", "30", "-vsync", "cfr", str(output_vid)
+                    ]
+                    process = self.run_subprocess_with_timeout(cmd, timeout=1800)
+                    if process is None:
+                        return
+                    if not os.path.exists(output_vid):
+                        raise Exception(f"Failed to normalize video: {input_vid}")
+                if self.check_stop():
+                    return
+                with open(concat_file, "w", encoding="utf-8") as f:
+                    f.write(f"file '{os.path.abspath(temp_main).replace(os.sep, '/')}'\n")
+                    f.write(f"file '{os.path.abspath(temp_extra).replace(os.sep, '/')}'\n")
+                logging.info("🔗 Merging normalized videos...", extra={'is_status': True})
+                cmd = [
+                    "ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                    "-i", str(concat_file), "-c", "copy", "-avoid_negative_ts", "make_zero", output_path
+                ]
+                try:
+                    process = self.run_subprocess_with_timeout(cmd, timeout=1800)
+                    if process is None:
+                        return
+                    if not os.path.exists(output_path):
+                        raise Exception("Concat method failed")
+                except Exception:
+                    if self.check_stop():
+                        return
+                    logging.warning("⚠️ Fallback merge method used.")
+                    cmd_fallback = [
+                        "ffmpeg", "-y", "-loglevel", "error", "-i", str(temp_main), "-i", str(temp_extra),
+                        "-filter_complex", "[0:v:0][0:a:0][1:v:0][1:a:0]concat=n=2:v=1:a=1[outv][outa]",
+                        "-map", "[outv]", "-map", "[outa]", "-c:v", "libx264", "-preset", "fast",
+                        "-c:a", "aac", "-b:a", "128k", "-avoid_negative_ts", "make_zero", output_path
+                    ]
+                    process = self.run_subprocess_with_timeout(cmd_fallback, timeout=1800)
+                    if process is None:
+                        return
+                    if not os.path.exists(output_path):
+                        raise Exception("Both merge methods failed")
+                logging.info("✅ Videos merged successfully")
+            except Exception as e:
+                if self.check_stop():
+                    return
+                logging.error(f"❌ Video merging failed: {e}", exc_info=True)
+                raise
+
+    def new_job(self, input_video, output_path, extra_video, background_music,
+                quality_preset, use_gpu, music_volume, enable_ducking,
+                enable_auto_edit, subtitle_settings):
+        base_name = Path(input_video).stem
+        clean_name = "".join(c for c in base_name if c.isalnum() or c in (' ', '-', '_')).rstrip() or f"video_{hash(base_name)}"
+        return VideoJob(input_video, output_path, clean_name, {
+            'extra_video': extra_video,
+            'background_music': background_music,
+            'quality_preset': quality_preset,
+            'use_gpu': use_gpu,
+            'music_volume': music_volume,
+            'enable_ducking': enable_ducking,
+            'enable_auto_edit': enable_auto_edit,
+            'subtitle_settings': subtitle_settings
+        })
+
+    def open_journal_entry(self, job):
+        """Keys the job in the journal. Returns False if its output is already done and unchanged."""
+        try:
+            job.key = self.journal.job_key(job.input_video, job.output_path, job.options)
+            if self.journal.is_finished(job.key):
+                return False
+            job.work_dir = self.journal.work_dir(job.key)
+            job.last_fingerprint = job.key
+            self.journal.start(job.key, job.input_video, job.output_path)
+        except Exception as e:
+            logging.warning(f"⚠️ Job journal unavailable for {os.path.basename(job.input_video)}, it will not be resumable: {e}")
+            job.key = None
+            job.work_dir = None
+        return True
+
+    def apply_prepared(self, job, artifact):
+        if str(artifact).endswith(".json"):
+            # Snapped to the source's frames so video, audio and subtitles are cut at the same instants.
+            job.remap = TimeRemap.from_v3(artifact).snapped(media_info.probe(job.input_video).fps)
+            job.timeline_path = Path(artifact)
+            job.current_video_path = Path(job.input_video)
+        else:
+            job.remap = None
+            job.current_video_path = Path(artifact)
+
+    def use_auto_edit_timeline(self, job):
+        """
+        Asks auto-editor only for its cut list and keeps the source video, so the
+        cuts happen inside the final render. Returns the job, None if stopped,
+        or False if the timeline cannot be used and the cut video must be rendered.
+        """
+        timeline = job.path(f"timeline_{job.clean_name}.json")
+        try:
+            if export_timeline(job.input_video, timeline, run=self.run_subprocess_with_timeout, timeout=1800) is None:
+                return None
+            self.apply_prepared(job, timeline)
+        except Exception as e:
+            if self.check_stop():
+                return None
+            logging.warning(f"⚠️ Could not use the auto-editor timeline ({e}). Rendering the cut video instead.")
+            job.remap = None
+            return False
+        source_duration = media_info.get_duration(job.input_video)
+        logging.info(f"✅ Auto-edit keeps {len(job.remap.ranges)} ranges: "
+                     f"{job.remap.duration:.1f}s of {source_duration:.1f}s, cut during the final render.")
+        return job
+
+    def stage_prepare(self, job):
+        if self.check_stop():
+            return None
+        job.open_temp_dir()
+        self.check_ffmpeg_availability()
+        input_video = job.input_video
+        auto_edited = job.path(f"auto_{job.clean_name}.mp4")
+        job.current_video_path = Path(input_video)
+
+        # --------------------------
+        # AUTO-EDITOR PART UPDATED
+        # --------------------------
+        if job.options['enable_auto_edit']:
+            logging.info(f"✂️ Auto-editing: {os.path.basename(input_video)}", extra={'is_status': True})
+            result = self.use_auto_edit_timeline(job)
+            if result is not False:
+                return result
+            try:
+                cmd = [
+                    "auto-editor", str(input_video),
+                    "--output", str(auto_edited),
+                    "--frame-rate", "30",
+                    "--silent-speed", "99999",
+                    "--video-codec", "libx264",
+                    "--margin", "0.2s",
+                    "--progress", "ascii",
+                    "--no-open"  # 🚀 prevent auto-opening
+                ]
+
+
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1
+                )
+
+                start = time.time()
+                for line in process.stdout:
+                    logging.info(f"[auto-editor] {line.strip()}")
+                    if self.check_stop():
+                        process.kill()
+                        return None
+                    if time.time() - start > 1800:  # 30 min timeout
+                        process.kill()
+                        raise TimeoutError("auto-editor took too long")
+
+                process.wait()
+                if process.returncode == 0 and os.path.exists(auto_edited):
+                    logging.info("✅ Auto-editing completed successfully.")
+                    job.current_video_path = auto_edited
+                else:
+                    raise Exception("Auto-editor failed or did not create output file")
+
+            except Exception as e:
+                if self.check_stop():
+                    return None
+                logging.warning(f"⚠️ Auto-editor issue: {e}. Using original video.")
+                try:
+                    self._copy_file_safely(input_video, auto_edited)
+                    job.current_video_path = auto_edited
+                except Exception as copy_error:
+                    logging.error(f"❌ Failed to copy video after auto-editor failure: {copy_error}")
+                    raise
+        else:
+            logging.info("ℹ️ Auto-editing disabled, using original video.")
+            try:
+                self._copy_file_safely(input_video, auto_edited)
+                job.current_video_path = auto_edited
+            except Exception as copy_error:
+                logging.error(f"❌ Failed to copy original video: {copy_error}")
+                raise
+        return job
+
+    def stage_extract_audio(self, job):
+        if self.check_stop():
+            return None
+        logging.info("🔊 Extracting audio for transcription...", extra={'is_status': True})
+        # Decoded straight into memory; the same samples feed Whisper and the level check.
+        job.audio = AudioSource.decode(job.current_video_path, stop_event=self.stop_event)
+        if job.audio is None:
+            return None
+        if job.remap is not None:
+            # Keep only what auto-editor keeps, so word times are already on the cut timeline.
+            job.audio = AudioSource(job.remap.slice_samples(job.audio.samples, job.audio.sample_rate),
+                                    job.audio.sample_rate, job.audio.path)
+        levels = job.audio.loudness()
+        logging.info(f"🔊 Audio: {job.audio.duration:.1f}s, peak {levels['peak_db']:.1f} dBFS, "
+                     f"speech level {levels['gated_db']:.1f} dBFS, active {levels['speech_ratio'] * 100:.0f}%")
+        return job
+
+    def stage_transcribe(self, job):
+        if self.check_stop():
+            return None
+        if job.audio.is_silent():
+            logging.info("ℹ️ Audio is silent, skipping speech recognition.")
+            job.words = []
+        else:
+            logging.info("🧠 Performing enhanced speech recognition...", extra={'is_status': True})
+            # Subtitles are written as the words arrive, so the render can start
+            # as soon as the last segment is decoded.
+            settings = job.options['subtitle_settings']
+            ass_path = job.path(f"subs_{job.clean_name}.ass")
+            try:
+                with StreamingAssWriter(ass_path, settings) as writer:
+                    job.words = self.transcribe_audio_optimized(job.audio.samples, label=job.clean_name,
+                                                                on_word=writer.add_word)
+                if len(job.words):
+                    job.ass_path = ass_path
+                    self.log_subtitles_written(settings)
+            except Exception as e:
+                if not self.check_stop():
+                    logging.warning(f"⚠️ Could not write subtitles while transcribing: {e}")
+        # The samples are no longer needed; free them before the job waits for the encoder.
+        job.audio = None
+        if self.check_stop():
+            return None
+        return job
+
+    def get_video_encoder_args(self, use_gpu, quality_preset):
+        # Encoders are probed once per machine (see encoder_registry.py), not per video.
+        encoder = encoder_registry.choose(allow_hardware=use_gpu)
+        args = encoder.args(23, quality_preset)
+        if not encoder.hardware:
+            # Parallel renders share the cores instead of each starting a thread per core.
+            split = encode_scheduler.EncodePlan(self.render_workers,
+                                                encode_scheduler.threads_per_job(self.render_workers), 0)
+            args += split.output_args(encoder.name)
+        return args
+
+    def render_single_pass(self, job):
+        """
+        Burns subtitles, mixes music and appends the extra video in one ffmpeg
+        run. Returns True when the output was written, False if stopped.
+        """
+        options = job.options
+        subtitle_settings = options['subtitle_settings']
+        builder = FilterGraphBuilder(job.current_video_path)
+        if job.remap is not None:
+            builder.keep_only(job.remap)
+        if job.words:
+            ass_path = job.ass_path or job.path(f"subs_{job.clean_name}.ass")
+            try:
+                if job.ass_path is None:
+                    self.generate_ass_subtitles_enhanced(job.words, str(ass_path), subtitle_settings)
+                # Sprites are static, so karaoke highlighting always goes through libass.
+                if subtitle_settings.get('renderer') == "sprites" and subtitle_settings['mode'] != "karaoke":
+                    self.use_subtitle_sprites(job, builder, ass_path)
+                else:
+                    builder.burn_subtitles(ass_path)
+            except Exception as e:
+                if self.check_stop():
+                    return False
+                logging.warning(f"⚠️ Subtitle generation failed: {e}. Continuing without subtitles.")
+        else:
+            logging.info("ℹ️ No speech words detected, skipping subtitle generation.")
+        if options['background_music']:
+            if os.path.exists(options['background_music']):
+                builder.add_music(options['background_music'], options['music_volume'],
+                                  ducking=options['enable_ducking'] and bool(job.words))
+            else:
+                logging.warning(f"⚠️ Music file not found: {options['background_music']}. Continuing without background music.")
+        encoder = encoder_registry.choose(allow_hardware=options['use_gpu'])
+        encoder_args = self.get_video_encoder_args(options['use_gpu'], options['quality_preset'])
+        prepared_extra = None
+        render_duration = job.remap.duration if job.remap is not None else None
+        if options['extra_video']:
+            main_info = media_info.probe(job.current_video_path)
+            # Stream-copy concat needs both parts from the same encoder, so only
+            # take the cached-outro route when we encode with libx264 ourselves.
+            if encoder.name == "libx264":
+                try:
+                    prepared_extra, profile = self.prepare_extra_video(main_info, options['extra_video'], options['quality_preset'])
+                    if prepared_extra is None:
+                        return False
+                    builder.conform_to(profile)
+                except Exception as e:
+                    if self.check_stop():
+                        return False
+                    logging.warning(f"⚠️ Could not prepare cached extra video: {e}. Merging inside the render instead.")
+                    prepared_extra = None
+            if prepared_extra is None:
+                builder.append_video(options['extra_video'], main_info.width, main_info.height)
+                try:
+                    main_duration = job.remap.duration if job.remap is not None else main_info.duration
+                    render_duration = main_duration + media_info.get_duration(options['extra_video'])
+                except Exception:
+                    render_duration = None
+        if self.check_stop():
+            return False
+
+        if builder.is_passthrough():
+            shutil.copy2(job.current_video_path, job.output_path)
+            logging.info(f"📁 Saved processed video: {job.output_path}")
+            return True
+        if prepared_extra is None and self.can_render_in_segments(job, builder):
+            return self.render_in_segments(job, builder)
+        logging.info(f"🎬 Rendering {os.path.basename(job.output_path)} in a single pass...", extra={'is_status': True})
+        render_target = job.path(f"rendered_{job.clean_name}.mp4") if prepared_extra else job.output_path
+        cmd = builder.build(render_target, encoder_args)
+        process = self.run_subprocess_with_timeout(cmd, timeout=3600, duration=render_duration)
+        if process is None:
+            return False
+        if not os.path.exists(render_target):
+            raise Exception("Single-pass render did not create the output file")
+        if prepared_extra:
+            mismatches = media_info.concat_mismatches(media_info.probe(render_target), media_info.probe(prepared_extra))
+            if mismatches:
+                logging.info(f"ℹ️ Cached extra video differs from the render in: {', '.join(mismatches)}. "
+                             f"Appending it with a re-encode instead.")
+                if not self.append_reencoded(render_target, options['extra_video'], job.output_path, encoder_args):
+                    return False
+            elif not self.concat_copy([render_target, prepared_extra], job.output_path, job.temp_dir):
+                return False
+        size_mb = os.path.getsize(job.output_path) / (1024 * 1024)
+        logging.info(f"📁 Saved processed video: {job.output_path} (Size: {size_mb:.1f}MB)")
+        return True
+
+    def append_reencoded(self, main_video, extra_video, output_path, encoder_args):
+        """Appends extra_video to main_video, scaled to fit, in one re-encode. Returns False if stopped."""
+        info = media_info.probe(main_video)
+        builder = FilterGraphBuilder(main_video)
+        builder.append_video(extra_video, info.width, info.height)
+        try:
+            duration = info.duration + media_info.get_duration(extra_video)
+        except Exception:
+            duration = None
+        cmd = builder.build(output_path, encoder_args)
+        return self.run_subprocess_with_timeout(cmd, timeout=3600, duration=duration) is not None
+
+    def can_render_in_segments(self, job, builder):
+        """Long subtitle-only renders with a CPU encoder can be split at keyframes (see segment_encode.py)."""
+        if builder.keep_remap or builder.music_path or builder.extra_video or builder.output_profile:
+            return False
+        encoder = encoder_registry.choose(allow_hardware=job.options['use_gpu'])
+        return segment_encode.worth_splitting(media_info.get_duration(job.current_video_path), encoder.name)
+
+    def render_in_segments(self, job, builder):
+        """Encodes keyframe-aligned segments of the video in parallel and joins them with stream copy."""
+        options = job.options
+        logging.info(f"🎬 Rendering {os.path.basename(job.output_path)} in parallel segments...", extra={'is_status': True})
+        encoder = encoder_registry.choose(allow_hardware=options['use_gpu'])
+        segmenter = segment_encode.SegmentedEncoder(
+            job.current_video_path, encoder.args(23, options['quality_preset']),
+            ass_path=builder.subtitle_path, sprite_track=builder.sprite_track,
+            audio_args=segment_encode.copy_audio_args(media_info.probe(job.current_video_path)),
+            cores=max(1, (os.cpu_count() or 1) // self.render_workers)
+        )
+        stage_name = getattr(self._context, 'stage', None)
+        result = segmenter.encode(job.output_path, stop_event=self.stop_event,
+                                  on_progress=lambda p: self.report_job_progress(job, stage_name, p),
+                                  work_dir=job.path(f"segments_{job.clean_name}"))
+        if result is None:
+            return False
+        size_mb = os.path.getsize(job.output_path) / (1024 * 1024)
+        logging.info(f"📁 Saved processed video: {job.output_path} (Size: {size_mb:.1f}MB)")
+        return True
+
+    def use_subtitle_sprites(self, job, builder, ass_path):
+        """Pre-renders the captions to PNG sprites for the overlay path, falling back to libass."""
+        try:
+            info = media_info.probe(job.current_video_path)
+            track = SpriteTrack.render(ass_path, job.options['subtitle_settings'], info.width, info.height,
+                                       job.path(f"sprites_{job.clean_name}"))
+            builder.overlay_sprites(track.concat_path, track.x, track.y)
+            logging.info(f"🖼️ Pre-rendered {track.sprite_count} subtitle sprites for {track.event_count} captions")
+        except Exception as e:
+            logging.warning(f"⚠️ Sprite subtitles unavailable ({e}), burning them with libass instead.")
+            builder.burn_subtitles(ass_path)
+
+    def stage_render(self, job):
+        if self.check_stop():
+            return None
+        try:
+            if self.render_single_pass(job):
+                return job
+            return None
+        except Exception as e:
+            if self.check_stop():
+                return None
+            logging.warning(f"⚠️ Single-pass render failed: {e}. Falling back to step-by-step rendering.")
+        if job.remap is not None and not self.render_cut_video(job):
+            return None
+        return self.render_multi_pass(job)
+
+    def render_cut_video(self, job):
+        """Renders auto-editor's cuts into auto_{name}.mp4 for the step-by-step fallback."""
+        cut_path = job.path(f"auto_{job.clean_name}.mp4")
+        builder = FilterGraphBuilder(job.current_video_path).keep_only(job.remap)
+        cmd = builder.build(cut_path, self.get_video_encoder_args(job.options['use_gpu'], job.options['quality_preset']))
+        if self.run_subprocess_with_timeout(cmd, timeout=3600, duration=job.remap.duration) is None:
+            return False
+        job.current_video_path = cut_path
+        job.remap = None
+        return True
+
+    def render_multi_pass(self, job):
+        if self.check_stop():
+            return None
+        words = job.words
+        subtitle_settings = job.options['subtitle_settings']
+        quality_preset = job.options['quality_preset']
+        ass_path = job.ass_path or job.path(f"subs_{job.clean_name}.ass")
+        final_with_subs = job.path(f"subs_{job.clean_name}.mp4")
+        final_with_music = job.path(f"music_{job.clean_name}.mp4")
+        current_video_path = job.current_video_path
+        if words:
+            try:
+                if job.ass_path is None:
+                    self.generate_ass_subtitles_enhanced(words, str(ass_path), subtitle_settings)
+                if self.check_stop():
+                    return None
+                mode_text = ass_writer.describe_mode(subtitle_settings)
+                border_text = " with speech recognition border boxes" if subtitle_settings['enable_borders'] else ""
+                logging.info(f"📝 Adding {mode_text} enhanced subtitles{border_text}...", extra={'is_status': True})
+                subtitle_filter = f"ass={escape_filter_path(ass_path)}"
+                ffmpeg_cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(current_video_path), "-vf", subtitle_filter]
+                ffmpeg_cmd.extend(self.get_video_encoder_args(job.options['use_gpu'], quality_preset))
+                ffmpeg_cmd.extend(["-c:a", "copy", str(final_with_subs)])
+                process = self.run_subprocess_with_timeout(ffmpeg_cmd, timeout=3600)
+                if process is None:
+                    return None
+                if os.path.exists(final_with_subs):
+                    current_video_path = final_with_subs
+                    logging.info(f"✅ Enhanced {mode_text} subtitles with speech recognition added successfully.")
+                else:
+                    raise Exception("Failed to add subtitles")
+            except Exception as e:
+                if self.check_stop():
+                    return None
+                logging.warning(f"⚠️ Subtitle addition failed: {e}. Continuing without subtitles.")
+                try:
+                    self._copy_file_safely(current_video_path, final_with_subs)
+                    current_video_path = final_with_subs
+                except Exception as copy_error:
+                    logging.error(f"❌ Failed to copy video after subtitle failure: {copy_error}")
+                    raise
+        else:
+            logging.info("ℹ️ No speech words detected, skipping subtitle generation.")
+            try:
+                self._copy_file_safely(current_video_path, final_with_subs)
+                current_video_path = final_with_subs
+            except Exception as copy_error:
+                logging.error(f"❌ Failed to copy video without subtitles: {copy_error}")
+                raise
+
+        if self.check_stop():
+            return None
+        background_music = job.options['background_music']
+        if background_music:
+            success_music = self.add_background_music_with_ducking(
+                str(current_video_path), background_music, str(final_with_music),
+                words, volume=job.options['music_volume'], enable_ducking=job.options['enable_ducking']
+            )
+            if success_music:
+                current_video_path = final_with_music
+            else:
+                logging.info("ℹ️ Proceeding without background music.")
+        else:
+            logging.info("ℹ️ No background music selected, skipping music addition.")
+
+        if self.check_stop():
+            return None
+        if job.options['extra_video']:
+            self.merge_videos_fast(str(current_video_path), job.options['extra_video'], job.output_path,
+                                   quality_preset=quality_preset)
+        else:
+            shutil.copy2(current_video_path, job.output_path)
+            logging.info(f"📁 Saved processed video: {job.output_path}")
+        job.current_video_path = current_video_path
+        return job
+
+    def process_single_video(self, input_video, output_path, extra_video, background_music,
+                        quality_preset, use_gpu, music_volume, enable_ducking,
+                        enable_auto_edit, subtitle_settings):
+        if self.check_stop():
+            return
+        job = self.new_job(input_video, output_path, extra_video, background_music,
+                           quality_preset, use_gpu, music_volume, enable_ducking,
+                           enable_auto_edit, subtitle_settings)
+        try:
+            for stage in (self.stage_prepare, self.stage_extract_audio, self.stage_transcribe, self.stage_render):
+                if stage(job) is None:
+                    return
+        except Exception as e:
+            logging.error(f"❌ Processing failed for {input_video}: {e}", exc_info=True)
+            raise
+        finally:
+            job.cleanup()
+
+    def process_all_videos(self, input_videos, extra_video, output_dir, background_music,
+                           quality_preset, use_gpu, music_volume, enable_ducking,
+                           enable_auto_edit, subtitle_settings, stage_workers=None, on_result=None):
+        """
+        Runs the batch as a staged pipeline instead of one video at a time, so
+        one video can be transcribed while the previous one is being encoded.
+        stage_workers maps stage name -> worker count (see DEFAULT_STAGE_WORKERS).
+        Returns one VideoJob.result() dict per video; on_result(result) is also
+        called as each video finishes.
+        """
+        total = len(input_videos)
+        results = []
+        if not total:
+            self.update_progress(100)
+            return results
+        workers = dict(DEFAULT_STAGE_WORKERS)
+        workers.update(stage_workers or {})
+        self.transcribe_workers = max(1, int(workers['transcribe']))
+        self.render_workers = max(1, int(workers['render']))
+        self.transcribe_processes = max(0, int(workers.get('transcribe_processes', 0)))
+
+        def mark_finished(job, result):
+            self.set_job_progress(job, 'render', 1.0)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        def on_done(job):
+            job.cleanup()
+            if job.key is not None:
+                self.journal.finish(job.key)
+            logging.info(f"✅ Finished [{job.index}/{total}]: {job.input_video}")
+            mark_finished(job, job.result('done'))
+
+        def on_failed(job, stage_name, error):
+            if error is not None:
+                logging.error(f"❌ Skipping video due to error in '{stage_name}' stage: {job.input_video}")
+                status = 'failed'
+            else:
+                status = 'stopped' if self.check_stop() else 'skipped'
+            if job.key is not None:
+                # Keep the work dir: the next run resumes from its checkpoints.
+                self.journal.set_status(job.key, status)
+            else:
+                job.cleanup()
+            mark_finished(job, job.result(status, stage_name, error))
+
+        jobs = []
+        for idx, input_video in enumerate(input_videos, start=1):
+            filename = Path(input_video).stem
+            output_path = Path(output_dir) / f"{filename}_processed.mp4"
+            job = self.new_job(input_video, str(output_path), extra_video, background_music,
+                               quality_preset, use_gpu, music_volume, enable_ducking,
+                               enable_auto_edit, subtitle_settings)
+            job.index = idx
+            jobs.append(job)
+        self.jobs = jobs
+
+        pending = []
+        for job in jobs:
+            if self.journal is not None and not self.open_journal_entry(job):
+                logging.info(f"⏭️ Already processed, skipping [{job.index}/{total}]: {job.input_video}")
+                job.resumed_from = 'finished'
+                mark_finished(job, job.result('done'))
+                continue
+            pending.append(job)
+
+        def announce(job):
+            logging.info(f"▶️ Processing [{job.index}/{total}]: {job.input_video}", extra={'is_status': True})
+            return self.stage_prepare(job)
+
+        stages = [
+            Stage("prepare", self.track_stage('prepare', announce), int(workers['prepare'])),
+            Stage("extract_audio", self.track_stage('extract_audio', self.stage_extract_audio), int(workers['extract_audio'])),
+            Stage("transcribe", self.track_stage('transcribe', self.stage_transcribe), self.transcribe_workers),
+            Stage("render", self.track_stage('render', self.stage_render), int(workers['render'])),
+        ]
+        pipeline = StagedPipeline(stages, queue_size=int(workers.get('queue_size', 2)),
+                                  stop_event=self.stop_event, on_item_done=on_done, on_item_failed=on_failed)
+        try:
+            stage_times = pipeline.run(pending)
+        finally:
+            if self._chunked_transcriber is not None:
+                self._chunked_transcriber.close()
+                self._chunked_transcriber = None
+        summary = ", ".join(f"{name}: {seconds:.1f}s" for name, seconds in stage_times.items())
+        logging.info(f"⏱️ Busy time per stage: {summary}")
+        self.update_progress(100)
+        return results
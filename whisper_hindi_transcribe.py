@@ -1,27 +1,18 @@
 import sys
 import json
-from faster_whisper import WhisperModel
+from whisper_server import transcribe_words
 
 # Get the input audio path and output JSON file path from command-line arguments
 audio_path = sys.argv[1]
 output_path = sys.argv[2]
 
-# Load the Whisper model (base size) with int8 precision on CPU
-model = WhisperModel("large-v3", device="cpu", compute_type="int8")
-
-# Transcribe the audio in Hindi using beam search and get word timestamps
-segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True, language="hi")
-
+# Transcribe the audio in Hindi using beam search and get word timestamps.
+# The large-v3 int8 model stays loaded in the shared whisper_server process between runs.
+words = transcribe_words(audio_path, model_size="large-v3", device="cpu", compute_type="int8",
+                         beam_size=5, word_timestamps=True, language="hi")
 
 # Extract and structure words with timestamps
-words = []
-for segment in segments:
-    for word in segment.words:
-        words.append({
-            "word": word.word.strip(),
-            "start": word.start,
-            "end": word.end
-        })
+words = [{"word": w["word"], "start": w["start"], "end": w["end"]} for w in words]
 
 # Save the result to a JSON file
 with open(output_path, "w", encoding="utf-8") as f:
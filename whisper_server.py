@@ -0,0 +1,353 @@
+"""
+Long-lived local Whisper transcription service.
+
+Loading a faster-whisper model takes seconds (large-v3 is several GB), and
+every script used to pay that on each run. This module keeps one warm
+WhisperModel per (size, device, compute type) in a background process and
+exposes a tiny client API on top of multiprocessing.connection, so the GUI
+and the command-line scripts all share the loaded weights.
+
+multiprocessing.connection unpickles what it receives, so the authkey is
+all that keeps other local processes from running code in the server. It
+is random, made on first use and kept in a file only the user can read
+(~/.cache/video_processor/whisper_server.key, or WHISPER_SERVER_KEY_PATH);
+WHISPER_SERVER_AUTHKEY overrides it.
+
+A server the clients start on their own exits after 30 minutes without
+requests (WHISPER_SERVER_IDLE_EXIT, in seconds), so large-v3 does not stay
+in RAM for good; one started by hand runs until stopped unless given
+--idle-exit.
+
+Run the server:   python whisper_server.py --preload large-v3
+Use the client:   from whisper_server import transcribe_words
+Stream segments:  for segment in whisper_server.transcribe_stream(samples): ...
+"""
+import argparse
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("WHISPER_SERVER_PORT", "47311"))
+AUTHKEY_PATH = Path(os.environ.get(
+    "WHISPER_SERVER_KEY_PATH", Path.home() / ".cache" / "video_processor" / "whisper_server.key"
+))
+DEFAULT_IDLE_EXIT = float(os.environ.get("WHISPER_SERVER_IDLE_EXIT", 1800))
+
+
+def load_authkey(path=AUTHKEY_PATH):
+    """The shared server key: from WHISPER_SERVER_AUTHKEY, else the key file, created (mode 0600) if missing."""
+    from_env = os.environ.get("WHISPER_SERVER_AUTHKEY")
+    if from_env:
+        return from_env.encode("utf-8")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        if os.name != 'nt' and path.stat().st_mode & 0o077:
+            os.chmod(path, 0o600)
+    else:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(secrets.token_hex(32))
+    key = path.read_text(encoding="utf-8").strip()
+    if not key:
+        raise RuntimeError(f"Whisper server key file {path} is empty; delete it to make a new one")
+    return key.encode("utf-8")
+
+
+# --- Model handling (shared by the server and the in-process fallback) ---
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_size="large-v3", device="cpu", compute_type="int8", num_workers=1, fallbacks=(), cpu_threads=0):
+    """
+    Returns (name, model) for the first size in [model_size, *fallbacks] that
+    loads. cpu_threads=0 lets CTranslate2 pick its own thread count.
+    """
+    from faster_whisper import WhisperModel
+
+    last_error = None
+    for name in (model_size, *fallbacks):
+        key = (name, device, compute_type, cpu_threads)
+        with _models_lock:
+            if key in _models:
+                return name, _models[key]
+            try:
+                logging.info(f"🧠 Loading Whisper model {name} ({device}/{compute_type})...")
+                _models[key] = WhisperModel(name, device=device, compute_type=compute_type,
+                                            num_workers=num_workers, cpu_threads=cpu_threads)
+                logging.info(f"✅ Loaded {name} Whisper model")
+                return name, _models[key]
+            except Exception as e:
+                logging.warning(f"⚠️ Could not load '{name}' model. Reason: {e}")
+                last_error = e
+    raise RuntimeError(f"No Whisper model could be loaded: {last_error}")
+
+
+def _segment_dict(segment):
+    words = []
+    for w in segment.words or []:
+        if w.word and w.word.strip():
+            words.append({
+                "word": w.word.strip(),
+                "start": w.start,
+                "end": w.end,
+                "probability": getattr(w, "probability", 0.5)
+            })
+    return {"start": segment.start, "end": segment.end, "text": segment.text.strip(), "words": words}
+
+
+def _iter_segments(model, audio, options):
+    """
+    Returns (segment dict generator, info). faster-whisper decodes lazily, so
+    each segment is yielded as soon as the model has produced it.
+    """
+    segments, info = model.transcribe(audio, **options)
+    return (_segment_dict(segment) for segment in segments), info
+
+
+def _run_transcription(model, audio, options):
+    segments, info = _iter_segments(model, audio, options)
+    return {"segments": list(segments), "language": info.language, "duration": info.duration}
+
+
+def transcribe_local(audio, model_size="large-v3", device="cpu", compute_type="int8", fallbacks=(), **options):
+    """Transcribes in this process, reusing any model this process already loaded."""
+    name, model = load_model(model_size, device, compute_type, fallbacks=fallbacks)
+    result = _run_transcription(model, audio, options)
+    result["model"] = name
+    return result
+
+
+# --- Server ---
+
+_activity = {"connections": 0, "last": time.time()}
+_activity_lock = threading.Lock()
+
+
+def _track_connection(delta):
+    with _activity_lock:
+        _activity["connections"] += delta
+        _activity["last"] = time.time()
+
+
+def _exit_when_idle(idle_exit):
+    """Ends the server process once no client has been connected for idle_exit seconds."""
+    while True:
+        time.sleep(min(30.0, idle_exit))
+        with _activity_lock:
+            idle = _activity["connections"] == 0 and time.time() - _activity["last"] >= idle_exit
+        if idle:
+            logging.info(f"💤 No requests for {idle_exit:.0f}s, shutting the Whisper server down.")
+            os._exit(0)
+
+
+def _handle_connection(conn, num_workers):
+    _track_connection(1)
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            op = request.get("op")
+            try:
+                if op == "ping":
+                    conn.send({"ok": True, "models": [list(key) for key in _models]})
+                elif op == "transcribe":
+                    name, model = load_model(
+                        request.get("model_size", "large-v3"), request.get("device", "cpu"),
+                        request.get("compute_type", "int8"), num_workers=num_workers,
+                        fallbacks=tuple(request.get("fallbacks", ()))
+                    )
+                    start = time.time()
+                    result = _run_transcription(model, request["audio"], request.get("options", {}))
+                    result["model"] = name
+                    audio = request["audio"]
+                    label = os.path.basename(audio) if isinstance(audio, str) else f"{len(audio) / 16000:.0f}s of audio"
+                    logging.info(f"✅ Transcribed {label} with {name} in {time.time() - start:.1f}s")
+                    conn.send({"ok": True, "result": result})
+                elif op == "transcribe_stream":
+                    name, model = load_model(
+                        request.get("model_size", "large-v3"), request.get("device", "cpu"),
+                        request.get("compute_type", "int8"), num_workers=num_workers,
+                        fallbacks=tuple(request.get("fallbacks", ()))
+                    )
+                    segments, info = _iter_segments(model, request["audio"], request.get("options", {}))
+                    try:
+                        for segment in segments:
+                            conn.send({"ok": True, "segment": segment})
+                        conn.send({"ok": True, "done": True, "language": info.language,
+                                   "duration": info.duration, "model": name})
+                    except (BrokenPipeError, ConnectionResetError, EOFError):
+                        # The client stopped reading (e.g. the batch was cancelled); stop decoding.
+                        logging.info("ℹ️ Stream client went away, transcription abandoned.")
+                        return
+                else:
+                    conn.send({"ok": False, "error": f"Unknown operation: {op}"})
+            except Exception as e:
+                logging.error(f"❌ Request failed: {e}", exc_info=True)
+                conn.send({"ok": False, "error": str(e)})
+    finally:
+        conn.close()
+        _track_connection(-1)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, authkey=None, preload=(), num_workers=2, idle_exit=0):
+    """Serves until killed, or until idle for idle_exit seconds when that is set."""
+    authkey = authkey or load_authkey()
+    for spec in preload:
+        size, _, compute_type = spec.partition(":")
+        load_model(size, compute_type=compute_type or "int8", num_workers=num_workers)
+    with Listener((host, port), authkey=authkey) as listener:
+        logging.info(f"🎧 Whisper server listening on {host}:{port}")
+        if idle_exit:
+            _track_connection(0)
+            threading.Thread(target=_exit_when_idle, args=(idle_exit,), daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                logging.warning(f"⚠️ Rejected connection: {e}")
+                continue
+            threading.Thread(target=_handle_connection, args=(conn, num_workers), daemon=True).start()
+
+
+# --- Client ---
+
+def _connect(host, port, authkey):
+    try:
+        return Client((host, port), authkey=authkey)
+    except (ConnectionRefusedError, OSError):
+        return None
+
+
+def start_server(host=DEFAULT_HOST, port=DEFAULT_PORT, wait=15, authkey=None, idle_exit=DEFAULT_IDLE_EXIT):
+    """
+    Launches the server in the background and waits until it accepts
+    connections. It uses authkey (default: load_authkey()) and exits after
+    idle_exit seconds without requests.
+    """
+    authkey = authkey or load_authkey()
+    creationflags = 0
+    if os.name == 'nt':
+        creationflags = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    # Handed over in the environment, not on the command line where other users could read it.
+    env = dict(os.environ, WHISPER_SERVER_AUTHKEY=authkey.decode("utf-8"))
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--host", host, "--port", str(port),
+         "--idle-exit", str(idle_exit)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, env=env,
+        creationflags=creationflags, start_new_session=(os.name != 'nt')
+    )
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        conn = _connect(host, port, authkey)
+        if conn is not None:
+            conn.close()
+            return True
+        time.sleep(0.25)
+    return False
+
+
+def transcribe(audio, model_size="large-v3", device="cpu", compute_type="int8", fallbacks=(),
+               autostart=True, host=DEFAULT_HOST, port=DEFAULT_PORT, authkey=None, **options):
+    """
+    Transcribes through the shared server, starting it on first use. If the
+    server cannot be reached the model is loaded in this process instead.
+    audio is a file path or a 16 kHz mono float32 array (see audio_stream.py).
+    Extra keyword arguments go straight to WhisperModel.transcribe.
+    Returns {"segments": [...], "language", "duration", "model"}.
+    """
+    audio = os.path.abspath(audio) if isinstance(audio, str) else audio
+    authkey = authkey or load_authkey()
+    conn = _connect(host, port, authkey)
+    if conn is None and autostart and start_server(host, port, authkey=authkey):
+        conn = _connect(host, port, authkey)
+    if conn is None:
+        logging.info("ℹ️ Whisper server unavailable, transcribing in-process.")
+        return transcribe_local(audio, model_size, device, compute_type, fallbacks=fallbacks, **options)
+    try:
+        conn.send({
+            "op": "transcribe", "audio": audio, "model_size": model_size, "device": device,
+            "compute_type": compute_type, "fallbacks": list(fallbacks), "options": options
+        })
+        reply = conn.recv()
+    finally:
+        conn.close()
+    if not reply.get("ok"):
+        raise RuntimeError(f"Whisper server error: {reply.get('error')}")
+    return reply["result"]
+
+
+def transcribe_stream(audio, model_size="large-v3", device="cpu", compute_type="int8", fallbacks=(),
+                      autostart=True, host=DEFAULT_HOST, port=DEFAULT_PORT, authkey=None, summary=None, **options):
+    """
+    Like transcribe(), but yields each segment dict as soon as Whisper has
+    decoded it instead of returning the whole transcript at the end. A
+    summary dict, if given, gets "language", "duration" and "model" (the
+    model that actually ran, which may be a fallback) once the stream ends.
+    """
+    audio = os.path.abspath(audio) if isinstance(audio, str) else audio
+    authkey = authkey or load_authkey()
+    conn = _connect(host, port, authkey)
+    if conn is None and autostart and start_server(host, port, authkey=authkey):
+        conn = _connect(host, port, authkey)
+    if conn is None:
+        logging.info("ℹ️ Whisper server unavailable, transcribing in-process.")
+        name, model = load_model(model_size, device, compute_type, fallbacks=fallbacks)
+        segments, info = _iter_segments(model, audio, options)
+        yield from segments
+        if summary is not None:
+            summary.update(language=info.language, duration=info.duration, model=name)
+        return
+    try:
+        conn.send({
+            "op": "transcribe_stream", "audio": audio, "model_size": model_size, "device": device,
+            "compute_type": compute_type, "fallbacks": list(fallbacks), "options": options
+        })
+        while True:
+            reply = conn.recv()
+            if not reply.get("ok"):
+                raise RuntimeError(f"Whisper server error: {reply.get('error')}")
+            if reply.get("done"):
+                if summary is not None:
+                    summary.update(language=reply.get("language"), duration=reply.get("duration"),
+                                   model=reply.get("model"))
+                return
+            yield reply["segment"]
+    finally:
+        conn.close()
+
+
+def transcribe_words(audio, **kwargs):
+    """Same as transcribe() but returns the flat word list."""
+    result = transcribe(audio, **kwargs)
+    return [w for segment in result["segments"] for w in segment["words"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared faster-whisper transcription server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--preload", action="append", default=[],
+                        help="Model to load at startup, e.g. large-v3 or medium:int8 (repeatable)")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent transcriptions per model")
+    parser.add_argument("--idle-exit", type=float, default=0,
+                        help="Exit after this many seconds without requests (0: run until stopped)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    serve(args.host, args.port, preload=args.preload, num_workers=args.workers, idle_exit=args.idle_exit)
+
+
+if __name__ == "__main__":
+    main()